@@ -1,8 +1,5 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import pandas as pd
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import json
 from datetime import datetime
 import os
@@ -16,6 +13,8 @@ class ExpenseTracker:
         # Initialize data storage
         self.data_file = "expenses.json"
         self.expenses = self.load_expenses()
+        # Values of the rows currently shown in the tree, in order
+        self.shown_rows = []
         
         # Categories
         self.categories = ["Food", "Transport", "Entertainment", "Bills", "Shopping", "Other"]
@@ -107,16 +106,31 @@ class ExpenseTracker:
             messagebox.showerror("Error", "Please enter a valid amount")
             
     def update_expense_list(self):
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-            
-        for expense in self.expenses:
-            self.tree.insert("", "end", values=(
-                expense["date"],
-                f"${expense['amount']:.2f}",
-                expense["category"],
-                expense["description"]
-            ))
+        # Only touch the rows that changed: skip the unchanged rows at both
+        # ends and replace what lies between them
+        rows = [(
+            expense["date"],
+            f"${expense['amount']:.2f}",
+            expense["category"],
+            expense["description"]
+        ) for expense in self.expenses]
+        shown = self.shown_rows
+
+        head = 0
+        while head < min(len(rows), len(shown)) and rows[head] == shown[head]:
+            head += 1
+        tail = 0
+        while (tail < min(len(rows), len(shown)) - head
+               and rows[-1 - tail] == shown[-1 - tail]):
+            tail += 1
+
+        items = self.tree.get_children()
+        stale = items[head:len(items) - tail]
+        if stale:
+            self.tree.delete(*stale)
+        for position in range(head, len(rows) - tail):
+            self.tree.insert("", position, values=rows[position])
+        self.shown_rows = rows
             
     def delete_expense(self):
         selected_item = self.tree.selection()
@@ -131,6 +145,8 @@ class ExpenseTracker:
             self.update_expense_list()
             
     def export_to_csv(self):
+        import pandas as pd
+
         df = pd.DataFrame(self.expenses)
         df.to_csv("expenses_export.csv", index=False)
         messagebox.showinfo("Success", "Expenses exported to expenses_export.csv")
@@ -139,7 +155,13 @@ class ExpenseTracker:
         if not self.expenses:
             messagebox.showwarning("Warning", "No expenses to display")
             return
-            
+
+        # pandas and matplotlib are only needed here; importing them lazily
+        # keeps start-up fast
+        import pandas as pd
+        import matplotlib.pyplot as plt
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
         df = pd.DataFrame(self.expenses)
         df['amount'] = pd.to_numeric(df['amount'])
         
@@ -1,30 +1,77 @@
 """Main entry point for the expense tracker application."""
+import os
 import tkinter as tk
+from tkinter import messagebox
 
 from expense_tracker.services.expense_manager import ExpenseManager
-from expense_tracker.services.storage import JSONStorage
+from expense_tracker.services.storage import STORAGE_URL_ENV_VAR
 from expense_tracker.ui.expense_view import ExpenseView
+from expense_tracker.ui.worker import BackgroundWorker
 
 
 def main():
-    """Start the expense tracker application."""
-    # Initialize services
-    storage = JSONStorage("expenses.json")
-    manager = ExpenseManager(storage)
+    """Start the expense tracker application.
 
+    Loading, saving and aggregation run on a background worker so slow
+    disks and large ledgers never block the Tk event loop.
+    """
     # Create and configure root window
     root = tk.Tk()
     root.title("Expense Tracker")
 
-    # Create view with callbacks
+    manager = None
+    changes = None
+
+    def load():
+        nonlocal manager, changes
+        url = os.environ.get(STORAGE_URL_ENV_VAR) or "json://expenses.json"
+        manager = ExpenseManager(url)
+        changes = manager.changes.subscribe_queue()
+        return snapshot()
+
+    def snapshot():
+        changes.drain()  # the snapshot already reflects them
+        return manager.get_all_expenses(), manager.get_category_totals()
+
+    def add(amount, category, description):
+        manager.add_expense(amount, category, description)
+
+    def delete(expense_id):
+        manager.delete_expense(expense_id)
+
+    def show(result):
+        expenses, category_totals = result
+        view.update_expenses(expenses, category_totals)
+
+    def show_changes(_result=None):
+        # Apply only what changed; fall back to a snapshot after a reload
+        if not view.apply_changes(changes.drain()):
+            worker.submit(snapshot, on_success=show, on_error=show_error)
+
+    def show_error(error):
+        messagebox.showerror("Error", str(error))
+
+    # Create view with callbacks that hand the work to the worker
     view = ExpenseView(
         root,
-        on_add_expense=manager.add_expense,
-        on_delete_expense=manager.delete_expense,
+        on_add_expense=lambda *args: worker.submit(
+            add, *args, on_success=show_changes, on_error=show_error
+        ),
+        on_delete_expense=lambda expense_id: worker.submit(
+            delete, expense_id, on_success=show_changes, on_error=show_error
+        ),
     )
+    worker = BackgroundWorker(root, on_pending_change=view.set_pending)
 
     # Load and display initial expenses
-    view.update_expenses(manager.get_expenses())
+    worker.submit(load, on_success=show, on_error=show_error)
+
+    def close():
+        # Let queued saves finish before exiting
+        worker.shutdown(wait=True)
+        root.destroy()
+
+    root.protocol("WM_DELETE_WINDOW", close)
 
     # Start the application
     root.mainloop()
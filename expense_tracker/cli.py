@@ -1,12 +1,27 @@
 """Command Line Interface for the Expense Tracker application."""
 import argparse
+import csv
+import heapq
+import json
 import sys
-from datetime import date
+from datetime import date, datetime, timedelta
 from decimal import Decimal, InvalidOperation
-from typing import Dict, List
+from itertools import islice
+from operator import attrgetter
+from typing import Dict, Iterable, List, Optional, TextIO
 
+from expense_tracker import daemon, migrate
+from expense_tracker.models.duplicates import DEFAULT_WINDOW_DAYS
 from expense_tracker.models.expense import Expense
 from expense_tracker.models.expense_manager import ExpenseManager
+from expense_tracker.models.histograms import AmountHistogram
+from expense_tracker.models.query import QuerySyntaxError, parse_query
+from expense_tracker.models.rollups import (
+    GROUP_DIMENSIONS,
+    StatsResult,
+    from_cents,
+    next_period,
+)
 
 
 def create_parser() -> argparse.ArgumentParser:
@@ -18,6 +33,13 @@ def create_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(
         description="Expense Tracker - Track and manage your expenses"
     )
+    parser.add_argument(
+        "--workers",
+        type=non_negative_int,
+        default=1,
+        help="Processes that split loading a large ledger and rebuilding its "
+        "rollups, for engines with range scans such as SQLite (default: 1)",
+    )
     subparsers = parser.add_subparsers(dest="command", help="Available commands")
 
     # Add expense command
@@ -40,17 +62,270 @@ def create_parser() -> argparse.ArgumentParser:
         help="Sort expenses by field",
         required=False,
     )
+    list_parser.add_argument(
+        "--reverse",
+        action="store_true",
+        help="Reverse the sort order (e.g. newest first)",
+    )
+    list_parser.add_argument(
+        "--since",
+        type=parse_date,
+        help="Only include expenses on or after this date (YYYY-MM-DD)",
+    )
+    list_parser.add_argument(
+        "--until",
+        type=parse_date,
+        help="Only include expenses on or before this date (YYYY-MM-DD)",
+    )
+    list_parser.add_argument(
+        "--limit", type=non_negative_int, help="Show at most this many expenses"
+    )
+    list_parser.add_argument(
+        "--offset",
+        type=non_negative_int,
+        default=0,
+        help="Skip this many expenses first",
+    )
+    list_parser.add_argument(
+        "--format",
+        choices=["table", "csv", "json"],
+        default="table",
+        help="Output format",
+    )
+
+    # Query command
+    query_parser = subparsers.add_parser(
+        "query", help="List expenses matching a filter expression"
+    )
+    query_parser.add_argument(
+        "expression",
+        help='Filter, e.g. \'amount > 50 and category in (Food, Bills) '
+        'and description ~ "uber"\'',
+    )
+    query_parser.add_argument(
+        "--reverse", action="store_true", help="Show newest expenses first"
+    )
+    query_parser.add_argument(
+        "--limit", type=non_negative_int, help="Show at most this many expenses"
+    )
+    query_parser.add_argument(
+        "--format",
+        choices=["table", "csv", "json"],
+        default="table",
+        help="Output format",
+    )
+    query_parser.add_argument(
+        "--explain",
+        action="store_true",
+        help="Print the index the query would use instead of running it",
+    )
+
+    # Search command
+    search_parser = subparsers.add_parser(
+        "search", help="Find expenses by words in their description"
+    )
+    search_parser.add_argument("text", help="Words to search for")
+    search_parser.add_argument(
+        "--exact",
+        action="store_true",
+        help="Match whole words only instead of word prefixes",
+    )
+    search_parser.add_argument(
+        "--limit", type=non_negative_int, help="Show at most this many expenses"
+    )
+    search_parser.add_argument(
+        "--format",
+        choices=["table", "csv", "json"],
+        default="table",
+        help="Output format",
+    )
 
     # Delete expense command
     delete_parser = subparsers.add_parser("delete", help="Delete an expense")
-    delete_parser.add_argument("id", type=int, help="ID of the expense to delete")
+    delete_parser.add_argument("id", help="ID of the expense to delete")
 
     # Stats command
-    subparsers.add_parser("stats", help="View expense statistics")
+    stats_parser = subparsers.add_parser("stats", help="View expense statistics")
+    stats_parser.add_argument(
+        "--by",
+        choices=["day", "week", "month", "year"],
+        help="Break totals down by period and category",
+    )
+    stats_parser.add_argument(
+        "--category",
+        action="append",
+        help="Only include this category (may be repeated)",
+    )
+    stats_parser.add_argument(
+        "--since",
+        type=parse_date,
+        help="Only include expenses on or after this date (YYYY-MM-DD)",
+    )
+    stats_parser.add_argument(
+        "--until",
+        type=parse_date,
+        help="Only include expenses on or before this date (YYYY-MM-DD)",
+    )
+    stats_parser.add_argument(
+        "--quantiles",
+        action="store_true",
+        help="Show median and 90th percentile expense amounts per category",
+    )
+    stats_parser.add_argument(
+        "--distinct",
+        action="store_true",
+        help="Show the number of distinct descriptions per month",
+    )
+    stats_parser.add_argument(
+        "--exact",
+        action="store_true",
+        help="Compute --quantiles and --distinct exactly instead of estimating",
+    )
+
+    # Histogram command
+    histogram_parser = subparsers.add_parser(
+        "histogram", help="View the distribution of expense amounts"
+    )
+    histogram_parser.add_argument(
+        "--by",
+        choices=["month", "year"],
+        help="Show one histogram per period and category",
+    )
+    histogram_parser.add_argument(
+        "--all-categories",
+        action="store_true",
+        help="Combine categories instead of showing one histogram each",
+    )
+    histogram_parser.add_argument(
+        "--category",
+        action="append",
+        help="Only include this category (may be repeated)",
+    )
+    histogram_parser.add_argument(
+        "--since",
+        type=parse_date,
+        help="Only include expenses on or after this date (YYYY-MM-DD)",
+    )
+    histogram_parser.add_argument(
+        "--until",
+        type=parse_date,
+        help="Only include expenses on or before this date (YYYY-MM-DD)",
+    )
+
+    # Dedupe command
+    dedupe_parser = subparsers.add_parser(
+        "dedupe", help="Report expenses that look like duplicates"
+    )
+    dedupe_parser.add_argument(
+        "--window",
+        type=non_negative_int,
+        default=DEFAULT_WINDOW_DAYS,
+        help="Days apart that duplicates may be dated "
+        f"(default: {DEFAULT_WINDOW_DAYS})",
+    )
+
+    # Migration command
+    migrate_parser = subparsers.add_parser(
+        "migrate", help="Import an expenses.json written by the legacy app"
+    )
+    migrate_parser.add_argument("source", help="Path of the legacy expenses.json")
+    migrate_parser.add_argument(
+        "--data-dir",
+        default=None,
+        help="Ledger directory to import into (default: ~/.expense_tracker)",
+    )
+    migrate_parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=migrate.DEFAULT_BATCH_SIZE,
+        help="Records written per batch and checkpoint",
+    )
+    migrate_parser.add_argument(
+        "--restart",
+        action="store_true",
+        help="Ignore an earlier checkpoint and start from the beginning",
+    )
+    migrate_parser.add_argument(
+        "--duplicates",
+        choices=["keep", "skip", "flag"],
+        default="keep",
+        help="Skip or count records that duplicate existing expenses "
+        "(checking loads the target ledger)",
+    )
+
+    # Daemon command
+    serve_parser = subparsers.add_parser(
+        "serve", help="Keep the ledger loaded and serve other CLI calls"
+    )
+    serve_parser.add_argument(
+        "--socket",
+        default=None,
+        help=f"Unix socket path (default: ${daemon.SOCKET_ENV_VAR} or "
+        f"{daemon.DEFAULT_SOCKET_PATH})",
+    )
 
     return parser
 
 
+def parse_date(value: str) -> datetime:
+    """Parse a YYYY-MM-DD command line date.
+
+    Raises:
+        argparse.ArgumentTypeError: If the value is not a valid date.
+    """
+    try:
+        return datetime.strptime(value, "%Y-%m-%d")
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(
+            f"invalid date: {value!r} (use YYYY-MM-DD)"
+        ) from e
+
+
+def non_negative_int(value: str) -> int:
+    """Parse a command line count that may be zero but not negative.
+
+    Raises:
+        argparse.ArgumentTypeError: If the value is not such an integer.
+    """
+    try:
+        number = int(value)
+        if number < 0:
+            raise ValueError(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(f"invalid count: {value!r}") from e
+    return number
+
+
+class ChunkedWriter:
+    """Collect many small writes and pass them to a stream in large chunks."""
+
+    def __init__(self, stream: TextIO, chunk_size: int = 64 * 1024):
+        """Initialize the writer.
+
+        Args:
+            stream: Stream receiving the output.
+            chunk_size: Number of characters to collect before writing.
+        """
+        self._stream = stream
+        self._chunk_size = chunk_size
+        self._parts: List[str] = []
+        self._size = 0
+
+    def write(self, text: str) -> None:
+        """Queue text, writing the chunk out once it is large enough."""
+        self._parts.append(text)
+        self._size += len(text)
+        if self._size >= self._chunk_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write any queued text to the stream."""
+        if self._parts:
+            self._stream.write("".join(self._parts))
+            self._parts = []
+            self._size = 0
+
+
 def format_expense(expense: Expense) -> str:
     """Format an expense for display.
 
@@ -90,6 +365,122 @@ def format_expense_stats(expenses: List[Expense]) -> str:
     return "\n".join(lines)
 
 
+def format_stats_result(result: StatsResult) -> str:
+    """Format per-category statistics from a stats query for display.
+
+    Produces the same layout as format_expense_stats().
+    """
+    lines = [f"Total expenses: ${result.total:.2f}"]
+    for group in result.groups:
+        lines.append(
+            f"{group.key['category']}: ${group.total:.2f} ({group.percentage:.1f}%)"
+        )
+    return "\n".join(lines)
+
+
+def format_table(rows: List[List[str]]) -> str:
+    """Align rows of cells into columns, left-justifying the first."""
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    return "\n".join(
+        "  ".join(
+            cell.ljust(width) if i == 0 else cell.rjust(width)
+            for i, (cell, width) in enumerate(zip(row, widths))
+        )
+        for row in rows
+    )
+
+
+def format_quantiles(quantiles: Dict[str, Dict[float, Decimal]]) -> str:
+    """Format per-category amount quantiles as an aligned table."""
+    levels = list(next(iter(quantiles.values())))
+    rows = [["Category"] + [f"p{q * 100:g}" for q in levels]]
+    for category, values in quantiles.items():
+        rows.append([category] + [f"${values[q]:.2f}" for q in levels])
+    return format_table(rows)
+
+
+def format_distinct(months: Dict[str, int]) -> str:
+    """Format distinct description counts per month, one line each."""
+    return "\n".join(f"{month}: {count}" for month, count in months.items())
+
+
+def format_histogram(histogram: AmountHistogram, width: int = 40) -> str:
+    """Format a histogram as one bar per bucket, scaled to ``width``."""
+    buckets = histogram.buckets()
+    largest = max(count for _, _, count in buckets)
+    rows = []
+    for low, high, count in buckets:
+        label = f"${from_cents(low):.2f} - " + (
+            f"${from_cents(high):.2f}" if high is not None else "up"
+        )
+        bar = "#" * max(1 if count else 0, round(count / largest * width))
+        rows.append([label, bar.ljust(width), str(count)])
+    return format_table(rows)
+
+
+def period_key_start(key: str, period: str) -> date:
+    """Return the first day of the period a stats key names (e.g. 2024-W05)."""
+    if period == "day":
+        return date.fromisoformat(key)
+    if period == "week":
+        year, week = key.split("-W")
+        return date.fromisocalendar(int(year), int(week), 1)
+    if period == "month":
+        year, month = key.split("-")
+        return date(int(year), int(month), 1)
+    return date(int(key), 1, 1)  # year
+
+
+def period_keys(first: str, last: str, period: str) -> List[str]:
+    """Return the keys of every period from ``first`` to ``last`` inclusive."""
+    key_function, format_key = GROUP_DIMENSIONS[period]
+    start = period_key_start(first, period)
+    keys = [first]
+    while keys[-1] != last:
+        start = next_period(period, start)
+        keys.append(format_key(key_function(start, "")))
+    return keys
+
+
+def format_period_table(result: StatsResult, period: str) -> str:
+    """Format a period-by-category table with period-over-period changes.
+
+    Args:
+        result: Stats grouped by [period, "category"].
+        period: The period dimension used for grouping.
+
+    Returns:
+        An aligned text table, one row per period including empty ones.
+    """
+    totals: Dict[str, Dict[str, Decimal]] = {}
+    for group in result.groups:
+        totals.setdefault(group.key[period], {})[group.key["category"]] = group.total
+    categories = sorted({group.key["category"] for group in result.groups})
+
+    keys = sorted(totals)
+    periods = period_keys(keys[0], keys[-1], period)
+
+    rows = [["Period"] + categories + ["Total", "Change"]]
+    previous: Optional[Decimal] = None
+    for key in periods:
+        amounts = totals.get(key, {})
+        total = sum(amounts.values(), Decimal("0"))
+        if previous is None:
+            change = "-"
+        elif previous:
+            change = f"{total - previous:+.2f} ({(total - previous) / previous:+.1%})"
+        else:
+            change = f"{total - previous:+.2f}"
+        rows.append(
+            [key]
+            + [f"${amounts[c]:.2f}" if c in amounts else "-" for c in categories]
+            + [f"${total:.2f}", change]
+        )
+        previous = total
+
+    return format_table(rows) + f"\n\nTotal expenses: ${result.total:.2f}"
+
+
 def handle_add(args: argparse.Namespace, manager: ExpenseManager) -> None:
     """Handle the add expense command.
 
@@ -101,7 +492,6 @@ def handle_add(args: argparse.Namespace, manager: ExpenseManager) -> None:
         amount = Decimal(args.amount)
         expense = manager.add_expense(
             amount=amount,
-            date=date.today(),
             category=args.category,
             description=args.description,
         )
@@ -115,6 +505,89 @@ def handle_add(args: argparse.Namespace, manager: ExpenseManager) -> None:
         sys.exit(1)
 
 
+def select_expenses(
+    args: argparse.Namespace, manager: ExpenseManager
+) -> Iterable[Expense]:
+    """Select the expenses to list, reading as little of the ledger as possible.
+
+    Date-sorted listings stream straight from the manager's date index and
+    stop after offset + limit rows. Other sort keys keep only the top
+    offset + limit rows in a heap when a limit is given.
+
+    Args:
+        args: Parsed command line arguments.
+        manager: The expense manager instance.
+
+    Returns:
+        The selected expenses in display order.
+    """
+    end = args.until + timedelta(days=1) if args.until else None
+    stop = args.offset + args.limit if args.limit is not None else None
+
+    if args.sort == "date":
+        expenses = manager.iter_expenses(
+            start=args.since,
+            end=end,
+            category=args.category,
+            newest_first=args.reverse,
+        )
+        return islice(expenses, args.offset, stop)
+
+    expenses = manager.iter_expenses(start=args.since, end=end, category=args.category)
+    key = attrgetter(args.sort)  # amount or category
+    if stop is None:
+        ordered = sorted(expenses, key=key, reverse=args.reverse)
+    elif args.reverse:
+        ordered = heapq.nlargest(stop, expenses, key=key)
+    else:
+        ordered = heapq.nsmallest(stop, expenses, key=key)
+    return ordered[args.offset:]
+
+
+def write_table(expenses: Iterable[Expense], out: ChunkedWriter) -> None:
+    """Write expenses one per line followed by their total."""
+    total = Decimal("0")
+    count = 0
+    for expense in expenses:
+        out.write(format_expense(expense) + "\n")
+        total += expense.amount
+        count += 1
+
+    if not count:
+        out.write("No expenses found.\n")
+        return
+    out.write(f"\nTotal: ${total:.2f}\n")
+
+
+def write_csv(expenses: Iterable[Expense], out: ChunkedWriter) -> None:
+    """Write expenses as CSV with a header row."""
+    writer = csv.writer(out, lineterminator="\n")
+    writer.writerow(["id", "date", "amount", "category", "description"])
+    for expense in expenses:
+        writer.writerow(
+            [
+                expense.id,
+                expense.date.isoformat(),
+                str(expense.amount),
+                expense.category,
+                expense.description,
+            ]
+        )
+
+
+def write_json(expenses: Iterable[Expense], out: ChunkedWriter) -> None:
+    """Write expenses as a JSON array, one object per line."""
+    out.write("[")
+    separator = "\n"
+    for expense in expenses:
+        out.write(separator + json.dumps(expense.to_dict()))
+        separator = ",\n"
+    out.write("\n]\n" if separator != "\n" else "]\n")
+
+
+LIST_WRITERS = {"table": write_table, "csv": write_csv, "json": write_json}
+
+
 def handle_list(args: argparse.Namespace, manager: ExpenseManager) -> None:
     """Handle the list expenses command.
 
@@ -122,31 +595,47 @@ def handle_list(args: argparse.Namespace, manager: ExpenseManager) -> None:
         args: Parsed command line arguments.
         manager: The expense manager instance.
     """
-    expenses = manager.get_expenses()
+    out = ChunkedWriter(sys.stdout)
+    LIST_WRITERS[args.format](select_expenses(args, manager), out)
+    out.flush()
 
-    # Apply category filter
-    if args.category:
-        expenses = [e for e in expenses if e.category == args.category]
 
-    # Sort expenses
-    if args.sort == "amount":
-        expenses.sort(key=lambda x: x.amount)
-    elif args.sort == "category":
-        expenses.sort(key=lambda x: x.category)
-    else:  # date
-        expenses.sort(key=lambda x: x.date)
+def handle_query(args: argparse.Namespace, manager: ExpenseManager) -> None:
+    """Handle the query command.
 
-    if not expenses:
-        print("No expenses found.")
-        return
+    Args:
+        args: Parsed command line arguments.
+        manager: The expense manager instance.
+    """
+    try:
+        if args.explain:
+            plan, _ = manager.plan_query(parse_query(args.expression))
+            print(f"Plan: {plan}")
+            return
+        expenses = manager.iter_query(args.expression, newest_first=args.reverse)
+    except QuerySyntaxError as e:
+        print(f"Error: {str(e)}", file=sys.stderr)
+        sys.exit(2)
+    if args.limit is not None:
+        expenses = islice(expenses, args.limit)
 
-    # Print expenses
-    for expense in expenses:
-        print(format_expense(expense))
+    out = ChunkedWriter(sys.stdout)
+    LIST_WRITERS[args.format](expenses, out)
+    out.flush()
+
+
+def handle_search(args: argparse.Namespace, manager: ExpenseManager) -> None:
+    """Handle the search command.
+
+    Args:
+        args: Parsed command line arguments.
+        manager: The expense manager instance.
+    """
+    expenses = manager.search(args.text, prefix=not args.exact, limit=args.limit)
 
-    # Print summary
-    total = sum(e.amount for e in expenses)
-    print(f"\nTotal: ${total:.2f}")
+    out = ChunkedWriter(sys.stdout)
+    LIST_WRITERS[args.format](expenses, out)
+    out.flush()
 
 
 def handle_delete(args: argparse.Namespace, manager: ExpenseManager) -> None:
@@ -157,7 +646,8 @@ def handle_delete(args: argparse.Namespace, manager: ExpenseManager) -> None:
         manager: The expense manager instance.
     """
     try:
-        manager.delete_expense(args.id)
+        if not manager.delete_expense(args.id):
+            raise KeyError(args.id)
         print(f"Deleted expense with ID: {args.id}")
     except KeyError:
         print(f"Error: No expense found with ID {args.id}", file=sys.stderr)
@@ -170,38 +660,220 @@ def handle_delete(args: argparse.Namespace, manager: ExpenseManager) -> None:
 def handle_stats(args: argparse.Namespace, manager: ExpenseManager) -> None:
     """Handle the stats command.
 
+    Totals come from the manager's precomputed rollups, so the cost depends
+    on the number of days and categories in range, not on the number of
+    expenses. Quantiles and distinct counts likewise come from per-month
+    sketches unless --exact is given.
+
     Args:
         args: Parsed command line arguments.
         manager: The expense manager instance.
     """
-    expenses = manager.get_expenses()
-    if not expenses:
+    query = {
+        "start": args.since.date() if args.since else None,
+        "end": args.until.date() if args.until else None,
+        "categories": args.category,
+    }
+    group_by = [args.by, "category"] if args.by else ["category"]
+    result = manager.query_stats(group_by=group_by, **query)
+    if not result.count:
         print("No expenses found.")
         return
 
-    print(format_expense_stats(expenses))
+    if args.by:
+        print(format_period_table(result, args.by))
+    else:
+        print(format_stats_result(result))
+    if args.quantiles:
+        print()
+        print(format_quantiles(manager.amount_quantiles(exact=args.exact, **query)))
+    if args.distinct:
+        print("\nDistinct descriptions per month:")
+        print(format_distinct(manager.distinct_descriptions(exact=args.exact, **query)))
 
 
-def main() -> None:
-    """Run the CLI application."""
-    parser = create_parser()
-    args = parser.parse_args()
+def handle_histogram(args: argparse.Namespace, manager: ExpenseManager) -> None:
+    """Handle the histogram command.
 
-    if not args.command:
-        parser.print_help()
-        sys.exit(1)
+    Bucket counts are maintained per month and category, so the cost depends
+    on the number of months in range, not on the number of expenses.
+
+    Args:
+        args: Parsed command line arguments.
+        manager: The expense manager instance.
+    """
+    group_by = [] if args.all_categories else ["category"]
+    if args.by:
+        group_by.insert(0, args.by)
+    histograms = manager.amount_histograms(
+        start=args.since.date() if args.since else None,
+        end=args.until.date() if args.until else None,
+        categories=args.category,
+        group_by=group_by,
+    )
+    if not histograms:
+        print("No expenses found.")
+        return
+
+    sections = []
+    for key, histogram in histograms.items():
+        title = " / ".join(key) if key else "All expenses"
+        sections.append(
+            f"{title} ({len(histogram)} expenses)\n{format_histogram(histogram)}"
+        )
+    print("\n\n".join(sections))
+
+
+def handle_dedupe(args: argparse.Namespace, manager: ExpenseManager) -> None:
+    """Handle the dedupe command.
+
+    Only reports; nothing is deleted. Candidates come from the manager's
+    fingerprint index, so the report takes one lookup per expense rather
+    than comparing every pair.
+
+    Args:
+        args: Parsed command line arguments.
+        manager: The expense manager instance.
+    """
+    groups = manager.duplicate_groups(window_days=args.window)
+    if not groups:
+        print("No duplicates found.")
+        return
+
+    for group in groups:
+        print(f"{len(group)} x ${group[0].amount:.2f} {group[0].description}:")
+        for expense in group:
+            print(f"  {format_expense(expense)}")
+    extra = sum(len(group) - 1 for group in groups)
+    print(f"\n{len(groups)} groups, {extra} possible duplicates")
 
-    manager = ExpenseManager()
 
-    # Handle commands
+def run_command(args: argparse.Namespace, manager: ExpenseManager) -> None:
+    """Dispatch parsed arguments to the matching command handler.
+
+    Args:
+        args: Parsed command line arguments.
+        manager: The expense manager instance.
+    """
     if args.command == "add":
         handle_add(args, manager)
     elif args.command == "list":
         handle_list(args, manager)
+    elif args.command == "query":
+        handle_query(args, manager)
+    elif args.command == "search":
+        handle_search(args, manager)
     elif args.command == "delete":
         handle_delete(args, manager)
     elif args.command == "stats":
         handle_stats(args, manager)
+    elif args.command == "histogram":
+        handle_histogram(args, manager)
+    elif args.command == "dedupe":
+        handle_dedupe(args, manager)
+
+
+def run_argv(argv: List[str], manager: ExpenseManager) -> None:
+    """Parse and run a command line against an existing manager.
+
+    Used by the daemon to serve forwarded invocations.
+
+    Args:
+        argv: Command line arguments, without the program name.
+        manager: The expense manager instance.
+    """
+    args = create_parser().parse_args(argv)
+    if args.command in (None, "serve", "migrate"):
+        print("Error: Command not supported by the daemon", file=sys.stderr)
+        sys.exit(2)
+    run_command(args, manager)
+
+
+def handle_migrate(args: argparse.Namespace) -> None:
+    """Handle the migrate command.
+
+    Runs in this process rather than through the daemon, since the source
+    path is relative to the caller. Progress goes to stderr.
+
+    Args:
+        args: Parsed command line arguments.
+    """
+    manager = ExpenseManager(args.data_dir, rebuild_workers=args.workers)
+    try:
+        report = migrate.migrate_legacy(
+            args.source,
+            manager,
+            batch_size=args.batch_size,
+            restart=args.restart,
+            progress=lambda report: print(report.summary(), file=sys.stderr),
+            duplicates=args.duplicates,
+        )
+    except (OSError, migrate.MigrationError) as e:
+        print(f"Error: {str(e)}", file=sys.stderr)
+        print(
+            "Re-run the same command to resume from the last checkpoint.",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+
+    if report.already_done:
+        print(f"{args.source} has already been migrated (use --restart to redo it)")
+    else:
+        print(f"Done: {report.summary()}")
+
+
+def handle_serve(args: argparse.Namespace) -> None:
+    """Handle the serve command.
+
+    Args:
+        args: Parsed command line arguments.
+    """
+    path = args.socket or daemon.socket_path()
+    try:
+        server = daemon.CLIDaemon(path, ExpenseManager(), run_argv)
+    except OSError as e:
+        print(f"Error: {str(e)}", file=sys.stderr)
+        sys.exit(1)
+    print(f"Serving expense tracker commands on {path}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.manager.close()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Run the CLI application."""
+    parser = create_parser()
+    argv = sys.argv[1:] if argv is None else argv
+    args = parser.parse_args(argv)
+
+    if not args.command:
+        parser.print_help()
+        sys.exit(1)
+
+    if args.command == "serve":
+        handle_serve(args)
+        return
+    if args.command == "migrate":
+        handle_migrate(args)
+        return
+
+    # Hand the command to a running daemon if it serves the same ledger
+    manager = ExpenseManager(rebuild_workers=args.workers)
+    ledger = daemon.ledger_url(manager)
+    response = daemon.forward(argv, ledger=ledger) if ledger else None
+    if response is not None:
+        sys.stdout.write(response["stdout"])
+        sys.stderr.write(response["stderr"])
+        sys.exit(response["code"])
+
+    try:
+        run_command(args, manager)
+    finally:
+        manager.close()  # saves a search index built by this command
 
 
 if __name__ == "__main__":
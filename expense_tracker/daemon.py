@@ -0,0 +1,219 @@
+"""Persistent CLI daemon serving commands over a Unix socket.
+
+``expense-tracker serve`` keeps one warm ExpenseManager in memory. Other CLI
+invocations send their arguments over the socket and print the reply, so they
+skip loading the ledger entirely. When no daemon is listening, or the daemon
+serves a different ledger, the CLI runs the command directly.
+
+The protocol is one JSON line per connection in each direction::
+
+    -> {"argv": ["add", "12.50", "Food", "Lunch"], "ledger": "json:///..."}
+    <- {"code": 0, "stdout": "Added expense: ...", "stderr": "",
+        "ledger": "json:///..."}
+
+A daemon whose ledger differs from the one in the request runs nothing and
+replies with just its own ``ledger`` URL.
+"""
+import contextlib
+import errno
+import io
+import json
+import os
+import socket
+import socketserver
+from typing import Callable, List, Optional
+
+from expense_tracker.models.expense_manager import ExpenseManager
+
+DEFAULT_SOCKET_PATH = os.path.join(
+    os.path.expanduser("~"), ".expense_tracker", "cli.sock"
+)
+SOCKET_ENV_VAR = "EXPENSE_TRACKER_SOCKET"
+
+# Seconds a client waits for the daemon before falling back to direct mode
+CONNECT_TIMEOUT = 0.5
+
+
+def socket_path() -> str:
+    """Return the socket path from the environment or the default."""
+    return os.environ.get(SOCKET_ENV_VAR, DEFAULT_SOCKET_PATH)
+
+
+def ledger_url(manager: ExpenseManager) -> Optional[str]:
+    """Return the storage URL identifying a manager's ledger across processes.
+
+    Returns:
+        The URL with an absolute path, or None for engines that are not
+        kept in a file and so cannot be shared with a daemon.
+    """
+    storage = manager.storage
+    if storage.filepath is None:
+        return None
+    return f"{storage.scheme}://{os.path.abspath(storage.filepath)}"
+
+
+class _CommandHandler(socketserver.StreamRequestHandler):
+    """Run one forwarded CLI command and reply with its output."""
+
+    def handle(self):
+        """Read a request line, run the command and write the response."""
+        try:
+            request = json.loads(self.rfile.readline())
+            argv = [str(arg) for arg in request["argv"]]
+            ledger = request.get("ledger")
+        except (ValueError, KeyError, TypeError, AttributeError):
+            response = {"code": 2, "stdout": "", "stderr": "Error: Bad request\n"}
+        else:
+            if ledger is not None and ledger != self.server.ledger:
+                response = {"ledger": self.server.ledger}
+            else:
+                response = self.server.execute(argv)
+        self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+
+
+class CLIDaemon(socketserver.UnixStreamServer):
+    """Unix socket server holding a warm expense manager.
+
+    Requests are handled one at a time, which keeps the manager free of
+    concurrent mutation and makes redirecting stdout/stderr safe.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        manager: ExpenseManager,
+        runner: Callable[[List[str], ExpenseManager], None],
+    ):
+        """Bind the daemon to a socket path.
+
+        Args:
+            path: Filesystem path of the Unix socket
+            manager: Manager kept loaded for the daemon's lifetime
+            runner: Callable parsing argv and running the command
+
+        Raises:
+            OSError: If another daemon is already listening on the socket.
+        """
+        self.manager = manager
+        self.ledger = ledger_url(manager)
+        self._runner = runner
+        if os.path.exists(path):
+            if _listening(path):
+                raise OSError(
+                    errno.EADDRINUSE, f"A daemon is already listening on {path}"
+                )
+            os.unlink(path)  # left behind by a daemon that did not exit cleanly
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        old_umask = os.umask(0o177)
+        try:
+            super().__init__(path, _CommandHandler)
+        finally:
+            os.umask(old_umask)
+        self._ledger_stamp = self._stamp()
+
+    def _stamp(self):
+        """Return a cheap fingerprint of the ledger file on disk."""
+        if self.manager.expenses_file is None:
+            return None
+        try:
+            stat = os.stat(self.manager.expenses_file)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def execute(self, argv: List[str]) -> dict:
+        """Run a command against the warm manager, capturing its output."""
+        # Another process (the web app, or a direct-mode CLI call) may have
+        # written the ledger since we last looked; pick up its changes.
+        if self._stamp() != self._ledger_stamp:
+            self.manager.reload()
+
+        stdout, stderr = io.StringIO(), io.StringIO()
+        code = 0
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            try:
+                self._runner(argv, self.manager)
+            except SystemExit as e:
+                if e.code is None or isinstance(e.code, int):
+                    code = e.code or 0
+                else:
+                    code = 1
+                    print(e.code, file=stderr)
+            except Exception as e:  # keep the daemon alive on command errors
+                code = 1
+                print(f"Error: {str(e)}", file=stderr)
+        self._ledger_stamp = self._stamp()
+        return {
+            "code": code,
+            "stdout": stdout.getvalue(),
+            "stderr": stderr.getvalue(),
+            "ledger": self.ledger,
+        }
+
+    def server_close(self):
+        """Close the socket and remove its file."""
+        super().server_close()
+        with contextlib.suppress(OSError):
+            os.unlink(self.server_address)
+
+
+def _listening(path: str) -> bool:
+    """Return whether a daemon accepts connections on a socket path."""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(CONNECT_TIMEOUT)
+        sock.connect(path)
+    except OSError:
+        return False
+    finally:
+        sock.close()
+    return True
+
+
+def forward(
+    argv: List[str], path: Optional[str] = None, ledger: Optional[str] = None
+) -> Optional[dict]:
+    """Send a command to a running daemon.
+
+    Args:
+        argv: Command line arguments, without the program name
+        path: Socket path, defaulting to socket_path()
+        ledger: URL of the caller's ledger (see ledger_url()); the command
+            only runs on a daemon serving the same ledger
+
+    Returns:
+        The daemon's response, or None if no daemon is reachable or it
+        serves another ledger.
+    """
+    path = path or socket_path()
+    if not os.path.exists(path):
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(CONNECT_TIMEOUT)
+        try:
+            sock.connect(path)
+        except OSError:
+            # Stale socket file or daemon not accepting: use direct mode
+            return None
+        # Once connected the command may already have run, so never fall
+        # back to direct mode from here on.
+        sock.settimeout(None)
+        request = {"argv": argv}
+        if ledger is not None:
+            request["ledger"] = ledger
+        try:
+            sock.sendall(json.dumps(request).encode("utf-8") + b"\n")
+            with sock.makefile("rb") as reader:
+                line = reader.readline()
+            response = json.loads(line)
+            # A daemon serving another ledger ran nothing
+            return response if "code" in response else None
+        except (OSError, ValueError):
+            return {
+                "code": 1,
+                "stdout": "",
+                "stderr": "Error: Lost connection to the expense tracker daemon\n",
+            }
+    finally:
+        sock.close()
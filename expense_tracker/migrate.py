@@ -0,0 +1,324 @@
+"""
+Migration of ledgers written by the legacy ``expense_tracker.py`` app.
+
+The legacy app stores ``expenses.json`` as one JSON array of dicts with
+float amounts, ``"%Y-%m-%d %H:%M:%S"`` date strings and no ids. The file is
+read incrementally, one record at a time, so its size does not matter.
+Amounts are parsed straight from their JSON text into Decimal, so ``12.1``
+becomes ``Decimal("12.1")`` rather than the nearest binary float. Each
+record gets an id derived from its position and content, so re-running a
+migration produces the same ids.
+
+Progress is checkpointed after every batch; an interrupted migration resumes
+from the last checkpoint and skips records the target already holds.
+"""
+import codecs
+import json
+import os
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from decimal import Decimal
+from itertools import islice
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Iterator, List, Optional, Set, Tuple
+
+from expense_tracker.models.expense import Expense
+from expense_tracker.models.expense_manager import ExpenseManager
+
+LEGACY_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Namespace for the ids of migrated records
+LEGACY_NAMESPACE = uuid.UUID("6b1f3c3e-5f6a-4a43-9a55-2d0a8c1e7f21")
+
+CHECKPOINT_FILE = "migration.checkpoint.json"
+DEFAULT_BATCH_SIZE = 5000
+READ_CHUNK_SIZE = 1024 * 1024
+
+
+class MigrationError(ValueError):
+    """Raised when the legacy file cannot be migrated."""
+
+
+@dataclass
+class MigrationReport:
+    """Progress of a migration."""
+
+    records: int = 0  # records written by this run
+    skipped: int = 0  # records already present in the target
+    duplicates: int = 0  # records that look like duplicates (see duplicates=)
+    bytes_read: int = 0
+    seconds: float = 0.0
+    offset: int = 0  # byte offset of the next unread record
+    resumed: bool = False
+    complete: bool = False
+    already_done: bool = False  # an earlier run had finished
+
+    @property
+    def records_per_second(self) -> float:
+        """Records written per second."""
+        return self.records / self.seconds if self.seconds else 0.0
+
+    @property
+    def megabytes_per_second(self) -> float:
+        """Megabytes of legacy data read per second."""
+        return self.bytes_read / 1e6 / self.seconds if self.seconds else 0.0
+
+    def summary(self) -> str:
+        """Return a one-line description of the progress."""
+        duplicates = f", {self.duplicates} duplicates" if self.duplicates else ""
+        return (
+            f"{self.records} records migrated, {self.skipped} skipped{duplicates} "
+            f"({self.records_per_second:,.0f} records/s, "
+            f"{self.megabytes_per_second:.1f} MB/s)"
+        )
+
+
+def iter_json_array(
+    stream: BinaryIO, offset: int = 0, chunk_size: int = READ_CHUNK_SIZE
+) -> Iterator[Tuple[Any, int]]:
+    """Yield the elements of a top-level JSON array one at a time.
+
+    Floats are parsed as Decimal. Only the current read chunk and element are
+    held in memory.
+
+    Args:
+        stream: Binary file positioned anywhere; it is seeked to ``offset``
+        offset: 0 to start at the beginning, or an offset previously yielded
+            to resume after that element
+        chunk_size: Bytes read at a time
+
+    Yields:
+        (element, offset) pairs, where offset is the byte position just past
+        the element.
+
+    Raises:
+        MigrationError: If the data is not a well-formed JSON array.
+    """
+    decoder = json.JSONDecoder(parse_float=Decimal)
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    stream.seek(offset)
+    buffer = ""
+    start = 0  # index in buffer of the first unconsumed character
+    position = offset  # byte offset of buffer[start]
+    eof = False
+    state = "open" if offset == 0 else "after_value"
+
+    def fill() -> None:
+        nonlocal buffer, start, eof
+        chunk = stream.read(chunk_size)
+        eof = not chunk
+        buffer = buffer[start:] + utf8.decode(chunk, final=eof)
+        start = 0
+
+    while True:
+        while start < len(buffer) and buffer[start] in " \t\r\n":
+            start += 1
+            position += 1
+        if start == len(buffer):
+            if eof:
+                raise MigrationError(f"Unexpected end of file at byte {position}")
+            fill()
+            continue
+
+        char = buffer[start]
+        if state == "open":
+            if char != "[":
+                raise MigrationError("Legacy data must be a JSON array")
+            start += 1
+            position += 1
+            state = "first"
+        elif state == "after_value":
+            if char == "]":
+                return
+            if char != ",":
+                raise MigrationError(f"Expected ',' or ']' at byte {position}")
+            start += 1
+            position += 1
+            state = "value"
+        elif state == "first" and char == "]":
+            return
+        else:
+            try:
+                value, end = decoder.raw_decode(buffer, start)
+            except json.JSONDecodeError as e:
+                if eof:
+                    raise MigrationError(f"Invalid JSON at byte {position}: {e.msg}")
+                fill()  # the element continues in the next chunk
+                continue
+            if end == len(buffer) and not eof:
+                fill()  # a number could continue in the next chunk
+                continue
+            position += len(buffer[start:end].encode("utf-8"))
+            start = end
+            state = "after_value"
+            yield value, position
+
+
+def convert_record(record: Any, ordinal: int) -> Expense:
+    """Convert one legacy record into an Expense with a stable id.
+
+    Args:
+        record: Dict with date, amount, category and description
+        ordinal: Position of the record in the legacy file
+
+    Raises:
+        MigrationError: If the record is malformed.
+    """
+    try:
+        amount = Decimal(record["amount"])
+        raw_date = record["date"]
+        try:
+            date = datetime.strptime(raw_date, LEGACY_DATE_FORMAT)
+        except ValueError:
+            date = datetime.fromisoformat(raw_date)
+        category = str(record.get("category") or "Other")
+        description = str(record.get("description") or "")
+    except (KeyError, TypeError, ValueError, ArithmeticError) as e:
+        raise MigrationError(
+            f"Invalid legacy record #{ordinal}: {record!r} ({e})"
+        ) from e
+
+    key = f"{ordinal}|{raw_date}|{amount}|{category}|{description}"
+    return Expense(
+        amount=amount,
+        category=category,
+        description=description,
+        date=date,
+        id=str(uuid.uuid5(LEGACY_NAMESPACE, key)),
+    )
+
+
+def _source_stamp(source: Path) -> dict:
+    """Identify a legacy file, so checkpoints are not applied to another."""
+    stat = source.stat()
+    return {
+        "path": str(source.resolve()),
+        "size": stat.st_size,
+        "mtime": stat.st_mtime_ns,
+    }
+
+
+def _written_ids(manager: ExpenseManager, pending: List[Expense]) -> Set[str]:
+    """Return the ids of pending expenses the ledger already holds.
+
+    Only the dates spanned by the pending expenses are read when the engine
+    supports range scans; otherwise the engine is read directly, so the
+    manager stays unloaded and later batches are still appended.
+    """
+    if not pending:
+        return set()
+    ids = {expense.id for expense in pending}
+    if manager.loaded or manager.storage.capabilities.range_scans:
+        start = min(expense.date for expense in pending)
+        end = max(expense.date for expense in pending) + timedelta(microseconds=1)
+        stored = manager.iter_expenses(start, end)
+    else:
+        stored = manager.storage.load_expenses()
+    return {expense.id for expense in stored if expense.id in ids}
+
+
+def migrate_legacy(
+    source: str,
+    manager: ExpenseManager,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    restart: bool = False,
+    progress: Optional[Callable[[MigrationReport], None]] = None,
+    duplicates: str = "keep",
+) -> MigrationReport:
+    """Stream a legacy expenses.json into a managed ledger.
+
+    Args:
+        source: Path of the legacy file
+        manager: Ledger to write into; written in batches without loading it
+            unless duplicates are checked
+        batch_size: Records per write and checkpoint
+        restart: Ignore any checkpoint and start from the beginning
+        progress: Called with the report after every batch
+        duplicates: "skip" leaves out and "flag" counts records that look
+            like duplicates of expenses already in the ledger, as for
+            ExpenseManager.add_expenses(); "keep" does not check
+
+    Returns:
+        The final report.
+
+    Raises:
+        MigrationError: If the legacy data is malformed.
+    """
+    source_path = Path(source)
+    checkpoint_path = manager.storage_path / CHECKPOINT_FILE
+    stamp = _source_stamp(source_path)
+    checkpoint = None
+    if not restart and checkpoint_path.exists():
+        checkpoint = json.loads(checkpoint_path.read_text())
+        if checkpoint.get("source") != stamp:
+            checkpoint = None
+
+    report = MigrationReport()
+    if checkpoint is not None and checkpoint.get("complete"):
+        report.complete = report.already_done = True
+        report.offset = checkpoint["offset"]
+        return report
+
+    offset = checkpoint["offset"] if checkpoint else 0
+    ordinal = checkpoint["ordinal"] if checkpoint else 0
+    existing = set()
+    if checkpoint is not None:
+        # Only the batch after the last checkpoint may have been written
+        report.resumed = True
+        with open(source_path, "rb") as f:
+            pending = [
+                convert_record(record, ordinal + position)
+                for position, (record, _) in enumerate(
+                    islice(iter_json_array(f, offset), batch_size)
+                )
+            ]
+        existing = _written_ids(manager, pending)
+
+    def save_checkpoint(complete: bool = False) -> None:
+        data = {
+            "source": stamp,
+            "offset": report.offset,
+            "ordinal": ordinal,
+            "complete": complete,
+        }
+        temporary = checkpoint_path.with_suffix(".tmp")
+        temporary.write_text(json.dumps(data))
+        os.replace(temporary, checkpoint_path)
+
+    started = time.perf_counter()
+    report.offset = offset
+    batch: List[Expense] = []
+
+    def write_batch() -> None:
+        with manager.transaction():
+            found = manager.add_expenses(batch, duplicates)
+        manager.flush()
+        report.duplicates += len(found)
+        report.records += len(batch) - (len(found) if duplicates == "skip" else 0)
+        batch.clear()
+        report.seconds = time.perf_counter() - started
+        save_checkpoint()
+        if progress is not None:
+            progress(report)
+
+    with open(source_path, "rb") as f:
+        for record, end in iter_json_array(f, offset):
+            expense = convert_record(record, ordinal)
+            ordinal += 1
+            if expense.id in existing:
+                report.skipped += 1
+            else:
+                batch.append(expense)
+            report.bytes_read = end - offset
+            report.offset = end
+            if len(batch) >= batch_size:
+                write_batch()
+        if batch:
+            write_batch()
+
+    report.seconds = time.perf_counter() - started
+    report.complete = True
+    save_checkpoint(complete=True)
+    return report
@@ -0,0 +1,212 @@
+"""
+Change feed publishing ledger mutations to interested parties.
+
+Every mutation of an ExpenseManager is published as a ChangeEvent with a
+sequence number that increases by one per event. Subscribers are either
+synchronous callbacks, called on the thread that made the change, or queues
+that another thread (such as the Tk main loop) drains at its own pace.
+
+Recent events are kept in a bounded history, so a subscriber that remembers
+the last sequence number it saw can resume from there. If it has fallen
+further behind than the history reaches, ChangeFeedGap tells it to reload
+instead.
+"""
+import logging
+import queue
+import threading
+from collections import deque
+from dataclasses import dataclass
+from enum import Enum
+from typing import Callable, Deque, List, Optional
+
+from .expense import Expense
+
+logger = logging.getLogger(__name__)
+
+# Number of recent events kept for resuming subscribers
+DEFAULT_HISTORY = 1000
+
+
+class ChangeType(str, Enum):
+    """Kinds of ledger change."""
+
+    ADDED = "added"
+    UPDATED = "updated"
+    DELETED = "deleted"
+    RELOADED = "reloaded"  # anything may have changed; re-read the ledger
+
+
+@dataclass(frozen=True)
+class ChangeEvent:
+    """One change to a ledger."""
+
+    sequence: int
+    type: ChangeType
+    expense: Optional[Expense] = None  # new state, or the deleted expense
+    previous: Optional[Expense] = None  # state before an update
+
+    def to_dict(self) -> dict:
+        """Convert the event to a JSON-serialisable dictionary."""
+        return {
+            "sequence": self.sequence,
+            "type": self.type.value,
+            "expense": self.expense.to_dict() if self.expense else None,
+            "previous": self.previous.to_dict() if self.previous else None,
+        }
+
+
+class ChangeFeedGap(LookupError):
+    """Raised when resuming from a sequence number no longer in the history."""
+
+
+class Subscription:
+    """A registered subscriber; call unsubscribe() to stop receiving events."""
+
+    def __init__(self, feed: "ChangeFeed", callback: Callable[[ChangeEvent], None]):
+        self._feed = feed
+        self._callback = callback
+
+    def _deliver(self, event: ChangeEvent) -> None:
+        self._callback(event)
+
+    def unsubscribe(self) -> None:
+        """Stop receiving events."""
+        self._feed._remove(self)
+
+
+class QueueSubscription(Subscription):
+    """A subscriber whose events are buffered for another thread."""
+
+    def __init__(self, feed: "ChangeFeed"):
+        self.queue: "queue.Queue[ChangeEvent]" = queue.Queue()
+        super().__init__(feed, self.queue.put)
+
+    def get(self, timeout: Optional[float] = None) -> ChangeEvent:
+        """Wait for the next event.
+
+        Raises:
+            queue.Empty: If no event arrived within the timeout.
+        """
+        return self.queue.get(timeout=timeout)
+
+    def drain(self) -> List[ChangeEvent]:
+        """Return every buffered event without waiting."""
+        events = []
+        while True:
+            try:
+                events.append(self.queue.get_nowait())
+            except queue.Empty:
+                return events
+
+
+class ChangeFeed:
+    """Publishes ChangeEvents to subscribers and keeps a resumable history."""
+
+    def __init__(self, history: int = DEFAULT_HISTORY):
+        """Initialize the feed.
+
+        Args:
+            history: Number of recent events kept for resuming
+        """
+        self._history: Deque[ChangeEvent] = deque(maxlen=history)
+        self._sequence = 0
+        self._subscribers: List[Subscription] = []
+        # Held while delivering, so every subscriber sees events in order
+        self._lock = threading.RLock()
+
+    @property
+    def sequence(self) -> int:
+        """Sequence number of the latest event, or 0 before the first."""
+        return self._sequence
+
+    def publish(
+        self,
+        type: ChangeType,
+        expense: Optional[Expense] = None,
+        previous: Optional[Expense] = None,
+    ) -> ChangeEvent:
+        """Record an event and deliver it to every subscriber.
+
+        A synchronous subscriber that raises is logged and skipped, so one
+        faulty subscriber cannot break the change that was published.
+        """
+        with self._lock:
+            self._sequence += 1
+            event = ChangeEvent(self._sequence, type, expense, previous)
+            self._history.append(event)
+            for subscription in list(self._subscribers):
+                self._deliver(subscription, event)
+        return event
+
+    @staticmethod
+    def _deliver(subscription: Subscription, event: ChangeEvent) -> None:
+        try:
+            subscription._deliver(event)
+        except Exception:
+            logger.exception(
+                "Change feed subscriber failed on event %d", event.sequence
+            )
+
+    def events_since(self, sequence: int) -> List[ChangeEvent]:
+        """Return the events published after a sequence number.
+
+        Raises:
+            ChangeFeedGap: If some of those events have left the history, or
+                the sequence number was not issued by this feed.
+        """
+        with self._lock:
+            if sequence > self._sequence:
+                raise ChangeFeedGap(
+                    f"Sequence {sequence} is ahead of this feed ({self._sequence}); "
+                    "it was probably recreated"
+                )
+            oldest = self._history[0].sequence if self._history else self._sequence + 1
+            if sequence < oldest - 1:
+                raise ChangeFeedGap(
+                    f"Events after {sequence} are no longer available; "
+                    f"the oldest is {oldest}"
+                )
+            return [event for event in self._history if event.sequence > sequence]
+
+    def subscribe(
+        self, callback: Callable[[ChangeEvent], None], since: Optional[int] = None
+    ) -> Subscription:
+        """Call a function with every future event.
+
+        The callback runs on the publishing thread while the feed is locked,
+        so it should be quick and must not wait on other publishers.
+
+        Args:
+            callback: Function taking a ChangeEvent
+            since: Also replay the events published after this sequence
+                number before any new ones
+
+        Raises:
+            ChangeFeedGap: If the events after ``since`` are no longer held.
+        """
+        return self._add(Subscription(self, callback), since)
+
+    def subscribe_queue(self, since: Optional[int] = None) -> QueueSubscription:
+        """Buffer every future event in a queue, for consumption on another thread.
+
+        Args:
+            since: Also enqueue the events published after this sequence
+                number
+
+        Raises:
+            ChangeFeedGap: If the events after ``since`` are no longer held.
+        """
+        return self._add(QueueSubscription(self), since)
+
+    def _add(self, subscription: Subscription, since: Optional[int]) -> Subscription:
+        with self._lock:
+            backlog = self.events_since(since) if since is not None else []
+            for event in backlog:
+                self._deliver(subscription, event)
+            self._subscribers.append(subscription)
+        return subscription
+
+    def _remove(self, subscription: Subscription) -> None:
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
@@ -0,0 +1,114 @@
+"""
+Module containing fingerprint-based duplicate detection.
+
+Overlapping bank statements import the same transaction twice, usually with
+the same amount and description but sometimes a posting date a day or two
+apart. Expenses are fingerprinted by (day, amount in cents, description
+reduced to its words) and hashed on that fingerprint, so finding the
+candidates for one expense probes one key per day of the tolerance window
+instead of comparing it with every other expense.
+"""
+import re
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from .expense import Expense
+from .rollups import to_cents
+
+DEFAULT_WINDOW_DAYS = 2
+
+# Approximate resident size of one fingerprint key and its bucket
+FINGERPRINT_MEMORY_ESTIMATE = 300
+
+DUPLICATE_MODES = ("keep", "skip", "flag")
+
+_NON_WORD = re.compile(r"[\W_]+")
+
+Fingerprint = Tuple[int, int, str]
+
+
+def match_description(description: str) -> str:
+    """Reduce a description to the words used to match duplicates.
+
+    Case, punctuation and numbers of three or more digits, such as card or
+    reference numbers, are dropped, so "TESCO STORES 2041" matches "Tesco
+    Stores" while "7-Eleven" keeps its 7.
+    """
+    words = _NON_WORD.sub(" ", description.casefold()).split()
+    return " ".join(
+        word for word in words if not (word.isdigit() and len(word) >= 3)
+    )
+
+
+def fingerprint(expense: Expense) -> Fingerprint:
+    """Return the (day ordinal, cents, description) key of an expense."""
+    return (
+        expense.date.toordinal(),
+        to_cents(expense.amount),
+        match_description(expense.description),
+    )
+
+
+class DuplicateIndex:
+    """Expenses hashed by fingerprint.
+
+    The index is built from the source on the first lookup rather than when
+    the ledger loads, and then kept up to date as expenses change.
+
+    Args:
+        source: Returns every expense, to build the index from
+    """
+
+    def __init__(self, source: Callable[[], Iterable[Expense]]):
+        self._source = source
+        self._buckets: Optional[Dict[Fingerprint, List[Expense]]] = None
+
+    def clear(self) -> None:
+        """Drop the index; it is rebuilt from the source when needed."""
+        self._buckets = None
+
+    def estimated_size(self) -> int:
+        """Return an approximate in-memory size of the index in bytes."""
+        if self._buckets is None:
+            return 0
+        return len(self._buckets) * FINGERPRINT_MEMORY_ESTIMATE
+
+    def add(self, expense: Expense) -> None:
+        """Index a new expense."""
+        if self._buckets is not None:
+            self._buckets.setdefault(fingerprint(expense), []).append(expense)
+
+    def remove(self, expense: Expense) -> None:
+        """Stop indexing an expense."""
+        if self._buckets is None:
+            return
+        key = fingerprint(expense)
+        bucket = self._buckets.get(key, [])
+        for position, candidate in enumerate(bucket):
+            if candidate is expense:
+                del bucket[position]
+                if not bucket:
+                    del self._buckets[key]
+                return
+
+    def matches(
+        self, expense: Expense, window_days: int = DEFAULT_WINDOW_DAYS
+    ) -> List[Expense]:
+        """Return indexed expenses that look like duplicates of one expense.
+
+        A match has the same amount and matching description, dated within
+        window_days days either side. The expense itself (or an indexed
+        expense with its id) is not included.
+        """
+        if self._buckets is None:
+            self._buckets = {}
+            for indexed in self._source():
+                self.add(indexed)
+        day, cents, description = fingerprint(expense)
+        found = []
+        for offset in range(-window_days, window_days + 1):
+            for candidate in self._buckets.get((day + offset, cents, description), ()):
+                if candidate is not expense and (
+                    expense.id is None or candidate.id != expense.id
+                ):
+                    found.append(candidate)
+        return found
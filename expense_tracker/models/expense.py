@@ -1,7 +1,7 @@
 """
 Module containing the Expense model and related functionality.
 """
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
 from decimal import Decimal
 from typing import Optional
@@ -10,12 +10,16 @@ from typing import Optional
 class Expense:
     """
     Represents an expense entry with amount, category, and description.
+
+    ``version`` starts at 1 and is incremented by every update, so writers
+    can detect that the expense changed since they read it.
     """
     amount: Decimal
     category: str
     description: str
-    date: datetime = datetime.now()
+    date: datetime = field(default_factory=datetime.now)
     id: Optional[str] = None
+    version: int = 1
 
     def to_dict(self) -> dict:
         """Convert expense to dictionary format for storage."""
@@ -24,7 +28,8 @@ class Expense:
             'amount': str(self.amount),
             'category': self.category,
             'description': self.description,
-            'date': self.date.isoformat()
+            'date': self.date.isoformat(),
+            'version': self.version
         }
 
     @classmethod
@@ -35,5 +40,6 @@ class Expense:
             amount=Decimal(data['amount']),
             category=data['category'],
             description=data['description'],
-            date=datetime.fromisoformat(data['date'])
+            date=datetime.fromisoformat(data['date']),
+            version=data.get('version', 1)
         )
@@ -1,87 +1,882 @@
 """
 Module for managing expenses, including CRUD operations and analysis.
 """
+import heapq
 import json
 import os
-from datetime import datetime
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
 from decimal import Decimal
+from operator import attrgetter
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import (
+    Collection,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
 
+from expense_tracker.services.metrics import record_cache_lookup
+from expense_tracker.services.storage import (
+    STORAGE_URL_ENV_VAR,
+    JSONStorage,
+    StorageEngine,
+    VersionMismatch,
+    Write,
+    open_storage,
+)
+
+from .changes import ChangeFeed, ChangeType
+from .duplicates import DEFAULT_WINDOW_DAYS, DUPLICATE_MODES, DuplicateIndex
 from .expense import Expense
+from .fenwick import DayTotals
+from .histograms import (
+    HISTOGRAM_GROUPS,
+    AmountHistogram,
+    HistogramIndex,
+    group_key,
+)
+from .ids import new_id
+from .indexes import CategoryIndex, DateIndex
+from .query import Query, parse_query
+from .rollups import (
+    PARALLEL_REBUILD_MIN_ROWS,
+    RollupCube,
+    StatsResult,
+    from_cents,
+    month_bounds,
+    next_period,
+    period_start,
+    to_cents,
+)
+from .search import SearchIndex
+from .sketches import (
+    DEFAULT_QUANTILES,
+    HyperLogLog,
+    KLLSketch,
+    StatsSketches,
+    exact_quantile,
+    normalize_description,
+)
+
+# Approximate resident size of one loaded Expense (object, Decimal, datetime
+# and short strings, about 300 bytes) and its entries in the date, category
+# and search indexes and the rollups, used to budget memory when many
+# ledgers are cached. Lazily built indexes report their own size.
+EXPENSE_MEMORY_ESTIMATE = 1350
+
+# Number of distinct statistics queries cached per ledger
+STATS_CACHE_SIZE = 128
+
+
+class ConflictError(Exception):
+    """Raised when an expense changed since the caller last read it.
+
+    ``actual`` is None when another writer deleted the expense.
+    """
+
+    def __init__(self, expense_id: str, expected: int, actual: Optional[int]):
+        super().__init__(expense_id, expected, actual)
+        self.expense_id = expense_id
+        self.expected = expected
+        self.actual = actual
+
+    def __str__(self) -> str:
+        """Describe the conflict from the stored fields."""
+        if self.actual is None:
+            return f"Expense {self.expense_id} was deleted"
+        return (
+            f"Expense {self.expense_id} is at version {self.actual}, "
+            f"not {self.expected}"
+        )
+
+
+@dataclass
+class _Transaction:
+    """Changes staged by ExpenseManager.transaction()."""
+
+    snapshot: Optional[List[Expense]]  # loaded expenses at the start, if any
+    operations: List[tuple] = field(default_factory=list)  # _push_down() args
+    events: List[tuple] = field(default_factory=list)  # _publish() args
+    unloaded: List[Expense] = field(default_factory=list)  # adds not in memory
 
 
 class ExpenseManager:
-    """Manages expense operations including storage, retrieval, and analysis."""
+    """Manages expense operations including storage, retrieval, and analysis.
+
+    The ledger is loaded on first access to ``expenses``. Adding an expense
+    before that appends it straight to storage, so one-off writers such as
+    the CLI never parse the existing data.
+
+    Every change is published on ``changes`` (see
+    expense_tracker.models.changes), so views and caches can follow the
+    ledger without re-reading it.
+
+    Mutations hold a per-manager lock, and first reload the ledger if
+    another process wrote it since it was read, so version checks compare
+    against what is stored. Engines with point operations also check the
+    version in the write itself.
+    """
+
+    def __init__(
+        self,
+        storage_path: Optional[str] = None,
+        autosave: bool = True,
+        storage: Union[str, StorageEngine, None] = None,
+        rebuild_workers: int = 1,
+    ):
+        """Initialize ExpenseManager with optional storage path.
 
-    def __init__(self, storage_path: Optional[str] = None):
-        """Initialize ExpenseManager with optional storage path."""
+        Args:
+            storage_path: Directory holding the ledger files
+            autosave: Persist after every mutation; when False, changes are
+                only written by flush()
+            storage: Storage URL (see expense_tracker.services.storage) or
+                engine; defaults to expenses.json in storage_path, or to
+                $EXPENSE_TRACKER_STORAGE_URL when neither is given
+            rebuild_workers: Processes that split the scan of a large ledger
+                and the rebuild of its rollup when it loads from an engine
+                with range scans. Off (1) by default; only opt in from the
+                main thread of a batch job, since it starts a process pool
+        """
+        if storage is None and storage_path is None:
+            storage = os.environ.get(STORAGE_URL_ENV_VAR) or None
+        if isinstance(storage, str):
+            storage = open_storage(storage)
         if storage_path is None:
-            storage_path = os.path.join(os.path.expanduser("~"), ".expense_tracker")
+            if storage is not None and storage.filepath is not None:
+                storage_path = os.path.dirname(os.path.abspath(storage.filepath))
+            else:
+                storage_path = os.path.join(os.path.expanduser("~"), ".expense_tracker")
         self.storage_path = Path(storage_path)
-        self.expenses_file = self.storage_path / "expenses.json"
+        if storage is None:
+            storage = JSONStorage(str(self.storage_path / "expenses.json"))
+        self._storage = storage
+        self.expenses_file = Path(storage.filepath) if storage.filepath else None
+        self.search_file = (
+            self.storage_path / "search_index.json" if self.expenses_file else None
+        )
+        self.autosave = autosave
+        self.rebuild_workers = rebuild_workers
+        self._dirty = False
+        self._lock = threading.RLock()
+        self._stamp: Optional[list] = None  # ledger file as last read or written
+        self.version = 0
+        self._rollup = RollupCube()
+        self._day_totals = DayTotals()
+        self._sketches = StatsSketches(lambda: self._expenses, self._month_expenses)
+        self._histograms = HistogramIndex(lambda: self._expenses)
+        self._duplicates = DuplicateIndex(lambda: self._expenses)
+        self._date_index = DateIndex()
+        self._category_index = CategoryIndex()
+        self._search_index = SearchIndex()
+        self._search_unsaved = False  # search_file is behind the index
+        self._by_id: Dict[str, Expense] = {}
+        self._stats_cache: "OrderedDict[tuple, StatsResult]" = OrderedDict()
+        self._expenses: Optional[List[Expense]] = None
+        self._transaction: Optional[_Transaction] = None
+        self.changes = ChangeFeed()
         self._ensure_storage_exists()
-        self.expenses: List[Expense] = self._load_expenses()
+
+    @property
+    def storage(self) -> StorageEngine:
+        """The storage engine holding the ledger."""
+        return self._storage
+
+    @property
+    def expenses(self) -> List[Expense]:
+        """All loaded expenses, loading the ledger on first access."""
+        self._ensure_loaded()
+        return self._expenses
+
+    def _ensure_loaded(self) -> None:
+        """Load the ledger if it has not been read yet."""
+        if self._expenses is None:
+            stamp = self._stamp = self._source_stamp()
+            rolled_up = self._load_in_parallel()
+            if not rolled_up:
+                self._expenses = self._load_expenses()
+            if self._transaction is not None and self._transaction.unloaded:
+                # Adds staged before the ledger was loaded are not stored yet
+                self._expenses.extend(self._transaction.unloaded)
+                stamp = None
+                rolled_up = False
+            self._rebuild_indexes(stamp, rolled_up)
+
+    def _rebuild_indexes(
+        self, stamp: Optional[list] = None, rolled_up: bool = False
+    ) -> None:
+        """Rebuild every derived structure from the loaded expenses.
+
+        Args:
+            stamp: Stamp of the ledger file the expenses were read from, if
+                they are exactly what is stored; the saved search index is
+                reused when it was written for it
+            rolled_up: The rollup was already built while loading
+        """
+        self._date_index.rebuild(self._expenses)
+        if not rolled_up:
+            self._rollup.rebuild(self._expenses)
+        self._day_totals.clear()
+        for expense in self._expenses:
+            self._day_totals.add(expense.date.date(), to_cents(expense.amount))
+        self._category_index.rebuild(self._expenses)
+        self._sketches.clear()
+        self._histograms.clear()
+        self._duplicates.clear()
+        self._by_id = {}
+        for expense in self._expenses:
+            self._by_id.setdefault(expense.id, expense)
+        if stamp is None or not self._load_search_index(stamp):
+            self._search_index.rebuild(
+                (expense.id, expense.description) for expense in self._by_id.values()
+            )
+            self._search_unsaved = True
+        else:
+            self._search_unsaved = False
+
+    def _load_in_parallel(self) -> bool:
+        """Load a large ledger and build its rollup in worker processes.
+
+        Workers scan their own date partitions from storage, which needs an
+        engine that scans date ranges and can be reopened from its URL. The
+        partitions are sized from the engine's month counts, so nothing is
+        read here first.
+
+        Returns:
+            Whether the ledger was loaded, in date order; if not, nothing
+            was read.
+        """
+        storage = self._storage
+        if (
+            self.rebuild_workers <= 1
+            or not storage.capabilities.range_scans
+            or storage.filepath is None
+        ):
+            return False
+        counts = storage.month_counts()
+        if sum(counts.values()) < PARALLEL_REBUILD_MIN_ROWS:
+            return False
+        self._expenses = self._rollup.load_parallel(
+            f"{storage.scheme}://{storage.filepath}",
+            month_bounds(counts, self.rebuild_workers * 4),
+            self.rebuild_workers,
+        )
+        return True
+
+    def _index_add(self, expense: Expense) -> None:
+        """Add an expense to the derived structures."""
+        self._rollup.add(expense)
+        self._day_totals.add(expense.date.date(), to_cents(expense.amount))
+        self._date_index.add(expense)
+        self._category_index.add(expense)
+        self._sketches.add(expense)
+        self._histograms.add(expense)
+        self._duplicates.add(expense)
+        if self._by_id.setdefault(expense.id, expense) is expense:
+            self._search_index.add(expense.id, expense.description)
+            self._search_unsaved = True
+
+    def _index_remove(self, expense: Expense) -> None:
+        """Remove an expense from the derived structures."""
+        self._rollup.remove(expense)
+        self._day_totals.add(expense.date.date(), -to_cents(expense.amount))
+        self._date_index.remove(expense)
+        self._category_index.remove(expense)
+        self._sketches.remove(expense)
+        self._histograms.remove(expense)
+        self._duplicates.remove(expense)
+        if self._by_id.get(expense.id) is expense:
+            del self._by_id[expense.id]
+            self._search_index.remove(expense.id)
+            self._search_unsaved = True
+
+    def _source_stamp(self) -> Optional[list]:
+        """Return the size and modification time of the ledger file."""
+        if self.expenses_file is None:
+            return None
+        try:
+            stat = self.expenses_file.stat()
+        except OSError:
+            return None
+        return [stat.st_size, stat.st_mtime_ns]
+
+    def _load_search_index(self, stamp: list) -> bool:
+        """Restore the saved search index if it matches the ledger file.
+
+        Returns:
+            Whether the saved index was used.
+        """
+        if self.search_file is None:
+            return False
+        try:
+            data = json.loads(self.search_file.read_text())
+        except (OSError, ValueError):
+            return False
+        if not isinstance(data, dict) or data.get("source") != stamp:
+            return False
+        self._search_index = SearchIndex.from_dict(data["postings"])
+        return True
+
+    def _save_search_index(self) -> None:
+        """Save the search index next to the ledger it was built from.
+
+        Nothing is written unless the ledger file is the one this manager
+        last read or wrote, so the saved index always matches its stamp.
+        The index is a cache, so a failed write only costs a rebuild on the
+        next load.
+        """
+        if self.search_file is None or self._transaction is not None:
+            return
+        stamp = self._source_stamp()
+        if self._dirty or stamp is None or stamp != self._stamp:
+            return
+        data = {"source": stamp, "postings": self._search_index.to_dict()}
+        try:
+            self.search_file.write_text(json.dumps(data))
+        except OSError:
+            return
+        self._search_unsaved = False
+
+    @property
+    def loaded(self) -> bool:
+        """Whether the ledger has been read into memory."""
+        return self._expenses is not None
+
+    def reload(self) -> None:
+        """Discard in-memory state and reload the ledger from storage."""
+        stamp = self._stamp = self._source_stamp()
+        rolled_up = self._load_in_parallel()
+        if not rolled_up:
+            self._expenses = self._load_expenses()
+        self._rebuild_indexes(stamp, rolled_up)
+        self._dirty = False
+        self.version += 1
+        self._publish(ChangeType.RELOADED)
+
+    def _refresh(self) -> None:
+        """Reload the ledger if another process wrote it since it was read.
+
+        Unsaved changes and open transactions are left alone; they are
+        written over whatever is stored.
+        """
+        if self._expenses is None or self._dirty or self._transaction is not None:
+            return
+        stamp = self._source_stamp()
+        if stamp is not None and stamp != self._stamp:
+            self.reload()
 
     def _ensure_storage_exists(self) -> None:
         """Ensure storage directory and files exist."""
-        self.storage_path.mkdir(parents=True, exist_ok=True)
-        if not self.expenses_file.exists():
-            self.expenses_file.write_text("[]")
+        if self.expenses_file is not None:
+            self.storage_path.mkdir(parents=True, exist_ok=True)
+        self._storage.create()
 
     def _load_expenses(self) -> List[Expense]:
         """Load expenses from storage."""
         try:
-            data = json.loads(self.expenses_file.read_text())
-            return [Expense.from_dict(expense_data) for expense_data in data]
+            return self._storage.load_expenses()
         except Exception:
             return []
 
     def _save_expenses(self) -> None:
         """Save expenses to storage."""
-        data = [expense.to_dict() for expense in self.expenses]
-        self.expenses_file.write_text(json.dumps(data, indent=2))
+        self._storage.save_expenses(self.expenses)
+        self._stamp = self._source_stamp()
+        self._dirty = False
 
-    def add_expense(self, expense: Expense) -> None:
-        """Add a new expense."""
-        if expense.id is None:
-            expense.id = str(len(self.expenses))
-        self.expenses.append(expense)
-        self._save_expenses()
+    def _changed(
+        self,
+        appended: Sequence[Expense] = (),
+        updated: Optional[Expense] = None,
+        deleted: Optional[Expense] = None,
+    ) -> None:
+        """Record a mutation, persisting it immediately when autosaving.
 
-    def get_expense(self, expense_id: str) -> Optional[Expense]:
-        """Get expense by ID."""
-        for expense in self.expenses:
-            if expense.id == expense_id:
-                return expense
-        return None
-
-    def update_expense(self, expense_id: str, updated_expense: Expense) -> bool:
-        """Update an existing expense."""
-        for i, expense in enumerate(self.expenses):
-            if expense.id == expense_id:
-                updated_expense.id = expense_id
-                self.expenses[i] = updated_expense
+        Single-expense changes are pushed down to engines that can store them
+        without rewriting the ledger; anything else is a full save.
+
+        Args:
+            appended: The new expenses when the mutation was a plain add
+            updated: The new version of an expense replaced in place
+            deleted: A removed expense
+
+        Raises:
+            ConflictError: If the engine found the stored expense at another
+                version; the ledger has been reloaded from storage.
+        """
+        self.version += 1
+        if self._transaction is not None:
+            self._transaction.operations.append((appended, updated, deleted))
+        elif not self.autosave:
+            self._dirty = True
+        elif self._dirty or not self._push_down(appended, updated, deleted):
+            self._save_expenses()
+
+    def _push_down(
+        self,
+        appended: Sequence[Expense],
+        updated: Optional[Expense],
+        deleted: Optional[Expense],
+    ) -> bool:
+        """Try to store a change with a targeted engine operation.
+
+        Updates and deletes are conditional on the stored version being the
+        one this manager replaced, where the engine can check it. A row that
+        is no longer stored is a conflict rather than a reason to rewrite
+        the ledger, which would bring it back.
+
+        Returns:
+            Whether the engine stored the change.
+
+        Raises:
+            ConflictError: If the stored expense is at another version or
+                gone, including when another process wrote or deleted it.
+        """
+        capabilities = self._storage.capabilities
+        try:
+            if appended and capabilities.append:
+                stored = self._storage.append_expenses(list(appended))
+            elif updated is not None and capabilities.point_ops:
+                expected = updated.version - 1
+                if not self._storage.update_expense(updated, expected):
+                    raise VersionMismatch(updated.id, expected, None)
+                stored = True
+            elif deleted is not None and capabilities.point_ops:
+                if not self._storage.delete_expense(deleted.id, deleted.version):
+                    raise VersionMismatch(deleted.id, deleted.version, None)
+                stored = True
+            else:
+                return False
+        except VersionMismatch as e:
+            # Memory is behind storage; take what is stored
+            self.reload()
+            raise ConflictError(e.expense_id, e.expected, e.actual) from e
+        if stored:
+            self._stamp = self._source_stamp()
+        return stored
+
+    def _push_batch(self, operations: List[tuple]) -> bool:
+        """Try to store a transaction's changes with one atomic engine write.
+
+        Returns:
+            Whether the engine stored the changes; if not, it stored none.
+
+        Raises:
+            ConflictError: If a stored expense is at another version; nothing
+                from the batch was written.
+        """
+        writes = []
+        for appended, updated, deleted in operations:
+            if appended:
+                writes.append(Write(appended=list(appended)))
+            elif updated is not None:
+                writes.append(
+                    Write(updated=updated, expected_version=updated.version - 1)
+                )
+            elif deleted is not None:
+                writes.append(
+                    Write(deleted=deleted.id, expected_version=deleted.version)
+                )
+        try:
+            stored = self._storage.write_batch(writes)
+        except VersionMismatch as e:
+            self.reload()
+            raise ConflictError(e.expense_id, e.expected, e.actual) from e
+        if stored:
+            self._stamp = self._source_stamp()
+        return stored
+
+    @contextmanager
+    def transaction(self) -> Iterator["ExpenseManager"]:
+        """Group mutations into one unit of work.
+
+        Adds, updates and deletes made inside the block are applied in
+        memory as usual but only persisted when the block exits, with a
+        single write where the engine allows it. If the block raises, the
+        ledger and its indexes are restored to their state at the start and
+        nothing is written. Nested blocks join the outermost one.
+
+        Example::
+
+            with manager.transaction():
+                manager.delete_expense(old.id)
+                manager.add_expenses([first, second])
+
+        The block holds the manager's lock, so other threads' changes wait
+        for it rather than joining it.
+
+        Yields:
+            The manager itself.
+        """
+        with self._lock:
+            if self._transaction is not None:
+                yield self
+                return
+
+            self._refresh()
+            transaction = _Transaction(
+                snapshot=list(self._expenses) if self._expenses is not None else None
+            )
+            self._transaction = transaction
+            try:
+                yield self
+            except BaseException:
+                self._transaction = None
+                self._rollback(transaction)
+                raise
+            self._transaction = None
+            try:
+                self._commit(transaction)
+            except ConflictError:
+                # The ledger was reloaded from storage; the staged changes are gone
+                raise
+            except BaseException:
+                # Memory holds the changes even if writing them failed
+                self._publish_staged(transaction)
+                raise
+            self._publish_staged(transaction)
+
+    def _publish_staged(self, transaction: _Transaction) -> None:
+        """Publish the events held back by a transaction."""
+        for event in transaction.events:
+            self.changes.publish(*event)
+
+    def _rollback(self, transaction: _Transaction) -> None:
+        """Restore the in-memory ledger to its state before a transaction."""
+        self._expenses = transaction.snapshot
+        if self._expenses is not None:
+            self._rebuild_indexes()
+        # Versions seen inside the transaction must not be reused, or stale
+        # cached statistics could be returned for them
+        self.version += 1
+
+    def _commit(self, transaction: _Transaction) -> None:
+        """Persist the changes staged by a transaction.
+
+        Raises:
+            ConflictError: If an expense changed in storage meanwhile; the
+                ledger has been reloaded and nothing more is written.
+        """
+        operations = transaction.operations
+        if not operations:
+            return
+        if not self.autosave:
+            self._dirty = True
+            return
+
+        try:
+            if self._dirty:
+                stored = False
+            elif all(appended for appended, _, _ in operations):
+                stored = self._push_down(
+                    [e for appended, _, _ in operations for e in appended],
+                    None,
+                    None,
+                )
+            else:
+                stored = self._push_batch(operations)
+            if not stored:
                 self._save_expenses()
-                return True
-        return False
-
-    def delete_expense(self, expense_id: str) -> bool:
-        """Delete an expense by ID."""
-        for i, expense in enumerate(self.expenses):
-            if expense.id == expense_id:
-                del self.expenses[i]
+        except ConflictError:
+            raise
+        except BaseException:
+            # Memory holds the committed state; a later flush() retries
+            if self._expenses is not None:
+                self._dirty = True
+            raise
+
+    def _publish(
+        self,
+        type: ChangeType,
+        expense: Optional[Expense] = None,
+        previous: Optional[Expense] = None,
+    ) -> None:
+        """Publish a change, or hold it until the current transaction commits."""
+        if self._transaction is not None:
+            self._transaction.events.append((type, expense, previous))
+        else:
+            self.changes.publish(type, expense, previous)
+
+    @property
+    def dirty(self) -> bool:
+        """Whether there are changes that have not been written yet."""
+        return self._dirty
+
+    def flush(self) -> None:
+        """Write pending changes and the search index, if they changed."""
+        with self._lock:
+            if self._dirty:
                 self._save_expenses()
-                return True
-        return False
+            if self._search_unsaved:
+                self._save_search_index()
+
+    def close(self) -> None:
+        """Flush, then close the storage engine."""
+        self.flush()
+        self._storage.close()
+
+    def estimated_size(self) -> int:
+        """Return an approximate in-memory size of the ledger in bytes."""
+        if self._expenses is None:
+            return 0
+        return (
+            len(self._expenses) * EXPENSE_MEMORY_ESTIMATE
+            + self._duplicates.estimated_size()
+            + self._sketches.estimated_size()
+            + self._histograms.estimated_size()
+        )
+
+    def add_expense(
+        self,
+        expense: Optional[Expense] = None,
+        *,
+        amount: Optional[Decimal] = None,
+        category: Optional[str] = None,
+        description: Optional[str] = None,
+        date: Optional[datetime] = None,
+    ) -> Expense:
+        """Add a new expense.
+
+        Either pass an Expense, or its fields as keyword arguments. When the
+        ledger has not been loaded yet the expense is appended to storage
+        without reading the existing data.
+
+        Returns:
+            The stored expense, with its id assigned.
+        """
+        if expense is None:
+            if amount is None or category is None or description is None:
+                raise ValueError("amount, category and description are required")
+            expense = Expense(
+                amount=amount,
+                category=category,
+                description=description,
+                date=date or datetime.now(),
+            )
+        self.add_expenses([expense])
+        return expense
+
+    def add_expenses(
+        self, expenses: Sequence[Expense], duplicates: str = "keep"
+    ) -> List[Tuple[Expense, Expense]]:
+        """Add several expenses with a single write.
+
+        Expenses without an id are given one. As with add_expense(), an
+        unloaded ledger is appended to without reading it.
+
+        Args:
+            expenses: The expenses to add
+            duplicates: "keep" adds every expense without checking; "skip"
+                leaves out expenses that look like duplicates of ones
+                already in the ledger (see find_duplicates()) and "flag"
+                adds them but reports them. Checking loads the ledger.
+
+        Returns:
+            (new, existing) pairs for the duplicates found; always empty
+            for "keep".
+
+        Raises:
+            ValueError: If duplicates is not a known mode.
+        """
+        if duplicates not in DUPLICATE_MODES:
+            raise ValueError(f"Unknown duplicate handling: {duplicates}")
+        with self._lock:
+            self._refresh()
+            for expense in expenses:
+                if expense.id is None:
+                    expense.id = new_id()
+            found: List[Tuple[Expense, Expense]] = []
+            if duplicates != "keep":
+                found = self._match_duplicates(expenses)
+                if duplicates == "skip":
+                    skipped = {id(expense) for expense, _ in found}
+                    expenses = [e for e in expenses if id(e) not in skipped]
+            if not expenses:
+                return found
+
+            if (
+                self._expenses is None
+                and self.autosave
+                and self._storage.capabilities.append
+            ):
+                if self._transaction is not None:
+                    self._transaction.unloaded.extend(expenses)
+                    self._changed(appended=expenses)
+                    self._publish_added(expenses)
+                    return found
+                if self._storage.append_expenses(list(expenses)):
+                    self.version += 1
+                    self._publish_added(expenses)
+                    return found
+            self.expenses.extend(expenses)
+            for expense in expenses:
+                self._index_add(expense)
+            self._changed(appended=expenses)
+            self._publish_added(expenses)
+            return found
+
+    def _match_duplicates(
+        self, expenses: Sequence[Expense]
+    ) -> List[Tuple[Expense, Expense]]:
+        """Pair new expenses with existing ones they duplicate.
+
+        Each existing expense is matched at most once, so importing two
+        identical coffees over a statement that already has one flags just
+        one of them. New expenses are not compared with each other.
+        """
+        self._ensure_loaded()
+        claimed = set()
+        pairs = []
+        for expense in expenses:
+            for match in self._duplicates.matches(expense):
+                if id(match) not in claimed:
+                    claimed.add(id(match))
+                    pairs.append((expense, match))
+                    break
+        return pairs
+
+    def _publish_added(self, expenses: Sequence[Expense]) -> None:
+        """Publish an added event for each new expense."""
+        for expense in expenses:
+            self._publish(ChangeType.ADDED, expense)
+
+    def get_expense(self, expense_id: str) -> Optional[Expense]:
+        """Get expense by ID."""
+        self._ensure_loaded()
+        return self._by_id.get(expense_id)
+
+    def _position(self, expense: Expense) -> int:
+        """Return the position of an expense in the loaded list."""
+        for i, candidate in enumerate(self._expenses):
+            if candidate is expense:
+                return i
+        raise ValueError("Expense is not loaded")
+
+    def _check_version(
+        self, expense: Expense, expected_version: Optional[int]
+    ) -> None:
+        """Raise ConflictError unless the expense is at the expected version."""
+        if expected_version is not None and expense.version != expected_version:
+            raise ConflictError(expense.id, expected_version, expense.version)
+
+    def update_expense(
+        self,
+        expense_id: str,
+        updated_expense: Expense,
+        expected_version: Optional[int] = None,
+    ) -> bool:
+        """Update an existing expense.
+
+        Args:
+            expense_id: Id of the expense to replace
+            updated_expense: New contents; its id and version are assigned
+            expected_version: Version the caller last read, or None to
+                replace whatever is stored
+
+        Returns:
+            False if there is no expense with this id.
+
+        Raises:
+            ConflictError: If the stored expense is at another version,
+                including one written by another process.
+        """
+        with self._lock:
+            self._refresh()
+            expense = self.get_expense(expense_id)
+            if expense is None:
+                return False
+            self._check_version(expense, expected_version)
+            updated_expense.id = expense_id
+            updated_expense.version = expense.version + 1
+            self._expenses[self._position(expense)] = updated_expense
+            self._index_remove(expense)
+            self._index_add(updated_expense)
+            self._changed(updated=updated_expense)
+            self._publish(ChangeType.UPDATED, updated_expense, expense)
+            return True
+
+    def delete_expense(
+        self, expense_id: str, expected_version: Optional[int] = None
+    ) -> bool:
+        """Delete an expense by ID.
+
+        Args:
+            expense_id: Id of the expense to delete
+            expected_version: Version the caller last read, or None to
+                delete whatever is stored
+
+        Returns:
+            False if there is no expense with this id.
+
+        Raises:
+            ConflictError: If the stored expense is at another version,
+                including one written by another process.
+        """
+        with self._lock:
+            self._refresh()
+            expense = self.get_expense(expense_id)
+            if expense is None:
+                return False
+            self._check_version(expense, expected_version)
+            del self._expenses[self._position(expense)]
+            self._index_remove(expense)
+            self._changed(deleted=expense)
+            self._publish(ChangeType.DELETED, expense)
+            return True
 
     def get_expenses(self) -> List[Expense]:
         """Get all expenses (alias for get_all_expenses)."""
         return self.get_all_expenses()
 
     def get_all_expenses(self) -> List[Expense]:
-        """Get all expenses."""
-        return sorted(self.expenses, key=lambda x: x.date, reverse=True)
+        """Get all expenses, newest first."""
+        return list(self.iter_expenses(newest_first=True))
+
+    def iter_expenses(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        category: Optional[str] = None,
+        newest_first: bool = False,
+    ) -> Iterator[Expense]:
+        """Iterate over expenses in date order without copying the ledger.
+
+        Args:
+            start: Inclusive lower date bound, or None
+            end: Exclusive upper date bound, or None
+            category: Only yield expenses in this category
+            newest_first: Yield the most recent expenses first
+
+        Returns:
+            An iterator over matching expenses, read from the date index. A
+            date range on an unloaded ledger whose engine supports range
+            scans is read straight from storage instead of loading it.
+        """
+        if (
+            self._expenses is None
+            and self._transaction is None
+            and (start is not None or end is not None)
+            and self._storage.capabilities.range_scans
+        ):
+            expenses = self._storage.load_range(start, end)
+            if newest_first:
+                expenses.reverse()
+            expenses = iter(expenses)
+        else:
+            self._ensure_loaded()
+            expenses = self._date_index.scan(start, end, reverse=newest_first)
+        if category is None:
+            return expenses
+        return (expense for expense in expenses if expense.category == category)
 
     def get_expenses_by_category(self, category: str) -> List[Expense]:
         """Get expenses filtered by category."""
@@ -93,14 +888,15 @@ class ExpenseManager:
 
     def get_total_expenses(self) -> Decimal:
         """Get total of all expenses."""
-        return sum((expense.amount for expense in self.expenses), Decimal("0"))
+        self._ensure_loaded()
+        return from_cents(self._day_totals.total())
 
     def get_category_totals(self) -> Dict[str, Decimal]:
-        """Get total expenses by category."""
-        totals: Dict[str, Decimal] = {}
-        for expense in self.expenses:
-            totals[expense.category] = totals.get(expense.category, Decimal('0')) + expense.amount
-        return totals
+        """Get total expenses by category, from the rollup."""
+        return {
+            group.key["category"]: group.total
+            for group in self.query_stats(group_by=["category"]).groups
+        }
 
     def get_expenses_by_date_range(
         self, start_date: datetime, end_date: datetime
@@ -122,5 +918,463 @@ class ExpenseManager:
 
     def get_monthly_total(self, year: int, month: int) -> Decimal:
         """Get total expenses for a specific month."""
-        monthly_expenses = self.get_monthly_expenses(year, month)
-        return sum((expense.amount for expense in monthly_expenses), Decimal("0"))
+        first = date(year, month, 1)
+        last = date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+        return self.get_total_between(first, last)
+
+    def get_total_between(
+        self, start: Optional[date] = None, end: Optional[date] = None
+    ) -> Decimal:
+        """Get the total spent on the days from start to end, inclusive.
+
+        Answered from per-day totals in logarithmic time, however many
+        expenses fall in the range.
+        """
+        self._ensure_loaded()
+        return from_cents(self._day_totals.total(start, end))
+
+    def get_daily_totals(self, start: date, end: date) -> List[Tuple[date, Decimal]]:
+        """Get (day, total) for every day from start to end, inclusive."""
+        self._ensure_loaded()
+        return [
+            (day, from_cents(cents))
+            for day, cents in self._day_totals.series(start, end)
+        ]
+
+    def search(
+        self, text: str, prefix: bool = True, limit: Optional[int] = None
+    ) -> List[Expense]:
+        """Find expenses whose description contains every word of text.
+
+        Args:
+            text: Search terms
+            prefix: Also match words that only start with a term, for
+                type-ahead
+            limit: Return at most this many; only these are ordered
+
+        Returns:
+            Matching expenses, newest first.
+        """
+        self._ensure_loaded()
+        matches = (
+            self._by_id[expense_id]
+            for expense_id in self._search_index.search(text, prefix)
+        )
+        newest = attrgetter("date")
+        if limit is not None:
+            return heapq.nlargest(limit, matches, key=newest)
+        return sorted(matches, key=newest, reverse=True)
+
+    def search_count(self, text: str, prefix: bool = True) -> int:
+        """Return the number of expenses search() finds, without ordering them."""
+        self._ensure_loaded()
+        return len(self._search_index.search(text, prefix))
+
+    def query_stats(
+        self,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        group_by: Sequence[str] = ("category",),
+        categories: Optional[Collection[str]] = None,
+    ) -> StatsResult:
+        """Get totals for a date range grouped by one or more dimensions.
+
+        Results come from the daily rollup and are cached per data version,
+        so repeated queries between changes are answered from memory.
+
+        Args:
+            start: First day to include, or None for no lower bound
+            end: Last day to include, or None for no upper bound
+            group_by: Dimensions such as category, day, week, month, year or
+                weekday
+            categories: Only include these categories, or None for all
+
+        Returns:
+            The aggregated statistics.
+        """
+        self._ensure_loaded()
+        key = (
+            self.version,
+            start,
+            end,
+            tuple(group_by),
+            frozenset(categories) if categories is not None else None,
+        )
+        result = self._stats_cache.get(key)
+        record_cache_lookup("stats", result is not None)
+        if result is not None:
+            self._stats_cache.move_to_end(key)
+            return result
+
+        result = self._rollup.query(start, end, group_by, categories)
+        self._stats_cache[key] = result
+        if len(self._stats_cache) > STATS_CACHE_SIZE:
+            self._stats_cache.popitem(last=False)
+        return result
+
+    def _days_between(
+        self, start: Optional[date], end: Optional[date]
+    ) -> Iterator[Expense]:
+        """Yield loaded expenses dated from start to end, inclusive, in order."""
+        return self._date_index.scan(
+            datetime(start.year, start.month, start.day) if start else None,
+            datetime.combine(end + timedelta(days=1), datetime.min.time())
+            if end
+            else None,
+        )
+
+    def _month_expenses(self, month: date, category: str) -> Iterator[Expense]:
+        """Yield a category's expenses in the month starting on ``month``."""
+        last = next_period("month", month) - timedelta(days=1)
+        return (
+            expense
+            for expense in self._days_between(month, last)
+            if expense.category == category
+        )
+
+    def _month_ranges(
+        self, start: Optional[date], end: Optional[date]
+    ) -> Tuple[Optional[date], Optional[date], List[Tuple[date, date]]]:
+        """Split a day range into whole months and ragged edges.
+
+        Returns:
+            The first and last whole months (as first days, None when
+            unbounded) and the (start, end) day ranges left over. When no
+            whole month fits, the first month is after the last.
+        """
+        first = start
+        if start is not None and start.day != 1:
+            first = next_period("month", period_start("month", start))
+        last = end
+        if end is not None:
+            last = period_start("month", end)
+            if next_period("month", last) - timedelta(days=1) != end:
+                last = period_start("month", last - timedelta(days=1))
+        if first is not None and last is not None and first > last:
+            return first, last, [(start, end)]
+        edges = []
+        if start is not None and start < first:
+            edges.append((start, first - timedelta(days=1)))
+        if end is not None and last is not None:
+            after = next_period("month", last)
+            if after <= end:
+                edges.append((after, end))
+        return first, last, edges
+
+    def _sketch_cells(
+        self,
+        start: Optional[date],
+        end: Optional[date],
+        categories: Optional[Collection[str]],
+    ) -> Iterator[Tuple[date, str, KLLSketch, HyperLogLog]]:
+        """Yield (month, category, quantiles, distinct) sketches for a range.
+
+        Whole months come from the maintained sketches; days at ragged ends
+        of the range are read from the date index into fresh sketches.
+        """
+        first, last, edges = self._month_ranges(start, end)
+        if first is None or last is None or first <= last:
+            yield from self._sketches.cells(first, last, categories)
+        for edge_start, edge_end in edges:
+            partial: Dict[Tuple[date, str], Tuple[KLLSketch, HyperLogLog]] = {}
+            for expense in self._days_between(edge_start, edge_end):
+                if categories is not None and expense.category not in categories:
+                    continue
+                key = (period_start("month", expense.date.date()), expense.category)
+                if key not in partial:
+                    partial[key] = (KLLSketch(), HyperLogLog())
+                quantiles, distinct = partial[key]
+                quantiles.update(to_cents(expense.amount))
+                distinct.add(normalize_description(expense.description))
+            for (month, category), (quantiles, distinct) in sorted(partial.items()):
+                yield month, category, quantiles, distinct
+
+    def amount_quantiles(
+        self,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        categories: Optional[Collection[str]] = None,
+        quantiles: Sequence[float] = DEFAULT_QUANTILES,
+        exact: bool = False,
+    ) -> Dict[str, Dict[float, Decimal]]:
+        """Get quantiles of expense amounts per category over a date range.
+
+        By default the answer merges per-month KLL sketches, whose ranks are
+        within about 1% of the truth. ``exact`` sorts every matching amount
+        instead, which is slower on large ledgers.
+
+        Args:
+            start: First day to include, or None for no lower bound
+            end: Last day to include, or None for no upper bound
+            categories: Only include these categories, or None for all
+            quantiles: Fractions between 0 and 1, such as 0.5 for the median
+            exact: Compute from every amount instead of the sketches
+
+        Returns:
+            For each category with expenses in the range, each requested
+            quantile mapped to an amount.
+        """
+        self._ensure_loaded()
+        result: Dict[str, Dict[float, Decimal]] = {}
+        if exact:
+            amounts: Dict[str, List[int]] = {}
+            for expense in self._days_between(start, end):
+                if categories is None or expense.category in categories:
+                    amounts.setdefault(expense.category, []).append(
+                        to_cents(expense.amount)
+                    )
+            for category, values in sorted(amounts.items()):
+                values.sort()
+                result[category] = {
+                    q: from_cents(exact_quantile(values, q)) for q in quantiles
+                }
+            return result
+
+        merged: Dict[str, KLLSketch] = {}
+        for _, category, sketch, _ in self._sketch_cells(start, end, categories):
+            if category not in merged:
+                merged[category] = KLLSketch()
+            merged[category].merge(sketch)
+        for category, sketch in sorted(merged.items()):
+            result[category] = {
+                q: from_cents(sketch.quantile(q)) for q in quantiles
+            }
+        return result
+
+    def distinct_descriptions(
+        self,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        categories: Optional[Collection[str]] = None,
+        exact: bool = False,
+    ) -> Dict[str, int]:
+        """Get the number of distinct descriptions (merchants) per month.
+
+        Descriptions are compared case-insensitively with whitespace
+        collapsed. By default counts come from per-month HyperLogLog
+        sketches, within a few percent of the truth; ``exact`` collects
+        every description instead.
+
+        Args:
+            start: First day to include, or None for no lower bound
+            end: Last day to include, or None for no upper bound
+            categories: Only include these categories, or None for all
+            exact: Count every description instead of using the sketches
+
+        Returns:
+            Counts keyed by month as YYYY-MM, oldest first.
+        """
+        self._ensure_loaded()
+        if exact:
+            seen: Dict[str, set] = {}
+            for expense in self._days_between(start, end):
+                if categories is None or expense.category in categories:
+                    seen.setdefault(expense.date.strftime("%Y-%m"), set()).add(
+                        normalize_description(expense.description)
+                    )
+            return {month: len(seen[month]) for month in sorted(seen)}
+
+        merged: Dict[date, HyperLogLog] = {}
+        for month, _, _, sketch in self._sketch_cells(start, end, categories):
+            if month not in merged:
+                merged[month] = HyperLogLog()
+            merged[month].merge(sketch)
+        return {
+            month.strftime("%Y-%m"): merged[month].count() for month in sorted(merged)
+        }
+
+    def amount_histograms(
+        self,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        categories: Optional[Collection[str]] = None,
+        group_by: Sequence[str] = ("category",),
+    ) -> Dict[tuple, AmountHistogram]:
+        """Get logarithmically bucketed amount histograms over a date range.
+
+        Whole months are summed from histograms maintained per month and
+        category, so the cost grows with the number of months and buckets
+        rather than with the number of expenses.
+
+        Args:
+            start: First day to include, or None for no lower bound
+            end: Last day to include, or None for no upper bound
+            categories: Only include these categories, or None for all
+            group_by: Any of category, month and year; empty for a single
+                histogram over everything
+
+        Returns:
+            Histograms keyed by a tuple of group values in group_by order,
+            sorted by key.
+
+        Raises:
+            ValueError: If group_by names an unknown dimension.
+        """
+        unknown = set(group_by) - set(HISTOGRAM_GROUPS)
+        if unknown:
+            raise ValueError(
+                f"Cannot group histograms by {', '.join(sorted(unknown))}"
+            )
+        self._ensure_loaded()
+        groups: Dict[tuple, AmountHistogram] = {}
+
+        def histogram(month: date, category: str) -> AmountHistogram:
+            key = group_key(month, category, group_by)
+            if key not in groups:
+                groups[key] = AmountHistogram()
+            return groups[key]
+
+        first, last, edges = self._month_ranges(start, end)
+        if first is None or last is None or first <= last:
+            for month, category, cell in self._histograms.cells(
+                first, last, categories
+            ):
+                histogram(month, category).merge(cell)
+        for edge_start, edge_end in edges:
+            for expense in self._days_between(edge_start, edge_end):
+                if categories is None or expense.category in categories:
+                    histogram(
+                        period_start("month", expense.date.date()), expense.category
+                    ).add(to_cents(expense.amount))
+        return {key: groups[key] for key in sorted(groups) if groups[key]}
+
+    def find_duplicates(
+        self, expense: Expense, window_days: int = DEFAULT_WINDOW_DAYS
+    ) -> List[Expense]:
+        """Find expenses that look like duplicates of one expense.
+
+        Duplicates have the same amount and the same description once case,
+        punctuation and numbers such as card references are ignored, and
+        are dated within window_days days either side. Lookups go through a
+        fingerprint index, so each costs O(window_days).
+        """
+        self._ensure_loaded()
+        return self._duplicates.matches(expense, window_days)
+
+    def duplicate_groups(
+        self, window_days: int = DEFAULT_WINDOW_DAYS
+    ) -> List[List[Expense]]:
+        """Group the ledger's likely duplicates.
+
+        Expenses are grouped when they are duplicates of each other, directly
+        or through another member of the group.
+
+        Returns:
+            Groups of two or more expenses, each and the list in date order.
+        """
+        self._ensure_loaded()
+        parent: Dict[int, Expense] = {}
+
+        def root(expense: Expense) -> Expense:
+            while id(expense) in parent:
+                expense = parent[id(expense)]
+            return expense
+
+        ordered = list(self._date_index.scan())
+        for expense in ordered:
+            for match in self._duplicates.matches(expense, window_days):
+                first, second = root(expense), root(match)
+                if first is not second:
+                    parent[id(second)] = first
+        groups: Dict[int, List[Expense]] = {}
+        for expense in ordered:
+            groups.setdefault(id(root(expense)), []).append(expense)
+        return [group for group in groups.values() if len(group) > 1]
+
+    def plan_query(
+        self, query: Query, newest_first: bool = False
+    ) -> Tuple[str, Iterable[Expense]]:
+        """Choose the cheapest index that can answer a query.
+
+        Id lookups win outright; otherwise the category and date indexes are
+        compared by how many candidates each would yield, falling back to a
+        full scan when the query constrains neither.
+
+        Args:
+            query: A parsed query
+            newest_first: Have the "date" and "scan" plans read the date
+                index backwards
+
+        Returns:
+            The plan name ("id", "category", "date" or "scan") and the
+            candidate expenses, which still need the query's predicate. The
+            "date" and "scan" candidates are lazy and in date order.
+        """
+        self._ensure_loaded()
+        constraints = query.constraints
+        if constraints.ids is not None:
+            found = (self._by_id.get(expense_id) for expense_id in constraints.ids)
+            return "id", [expense for expense in found if expense is not None]
+
+        costs = {}
+        if constraints.categories is not None:
+            costs["category"] = sum(
+                self._category_index.count(category)
+                for category in set(c.casefold() for c in constraints.categories)
+            )
+        if constraints.start is not None or constraints.end is not None:
+            costs["date"] = self._date_index.count(constraints.start, constraints.end)
+        if not costs:
+            return "scan", self._date_index.scan(reverse=newest_first)
+
+        plan = min(costs, key=costs.get)
+        if plan == "category":
+            categories = set(c.casefold() for c in constraints.categories)
+            return plan, [
+                expense
+                for category in categories
+                for expense in self._category_index.get(category)
+            ]
+        return plan, self._date_index.scan(
+            constraints.start, constraints.end, reverse=newest_first
+        )
+
+    def iter_query(
+        self, query: Union[str, Query], newest_first: bool = False
+    ) -> Iterator[Expense]:
+        """Iterate over expenses matching a filter expression.
+
+        Plans that read the date index are filtered as the iterator is
+        consumed, so stopping after the first few matches skips the rest
+        of the scan. Id and category plans are sorted up front.
+
+        Args:
+            query: Query text (see expense_tracker.models.query) or a query
+                already parsed with parse_query
+            newest_first: Yield the most recent expenses first
+
+        Returns:
+            An iterator over matching expenses in date order.
+
+        Raises:
+            QuerySyntaxError: If the query text is malformed; raised by this
+                call, not on iteration.
+        """
+        if isinstance(query, str):
+            query = parse_query(query)
+        plan, candidates = self.plan_query(query, newest_first)
+        if plan in ("id", "category"):
+            matches = [expense for expense in candidates if query(expense)]
+            matches.sort(key=lambda expense: expense.date)
+            if newest_first:
+                matches.reverse()
+            return iter(matches)
+        return (expense for expense in candidates if query(expense))
+
+    def query(
+        self, query: Union[str, Query], newest_first: bool = False
+    ) -> List[Expense]:
+        """Get expenses matching a filter expression.
+
+        Args:
+            query: Query text (see expense_tracker.models.query) or a query
+                already parsed with parse_query
+            newest_first: Return the most recent expenses first
+
+        Returns:
+            Matching expenses in date order.
+
+        Raises:
+            QuerySyntaxError: If the query text is malformed.
+        """
+        return list(self.iter_query(query, newest_first))
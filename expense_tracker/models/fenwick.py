@@ -0,0 +1,110 @@
+"""
+Module containing per-day totals held in a Fenwick (binary indexed) tree.
+
+Days are keyed by their ordinal, so any date range maps to a contiguous run
+of slots and its total is the difference of two prefix sums: O(log n) in the
+number of days covered by the tree, however many expenses fall in the range.
+"""
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+MIN_SLOTS = 1024  # about three years of days
+
+
+class FenwickTree:
+    """Fixed-size array of integers supporting point updates and prefix sums."""
+
+    def __init__(self, size: int):
+        """Initialize a tree of ``size`` zeros."""
+        self._tree = [0] * (size + 1)
+
+    def __len__(self) -> int:
+        return len(self._tree) - 1
+
+    def add(self, index: int, delta: int) -> None:
+        """Add delta to the value at a 0-based index."""
+        i = index + 1
+        while i < len(self._tree):
+            self._tree[i] += delta
+            i += i & -i
+
+    def prefix_sum(self, end: int) -> int:
+        """Return the sum of the values at indexes below ``end``."""
+        total = 0
+        i = min(end, len(self._tree) - 1)
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+
+class DayTotals:
+    """Integer totals per calendar day with logarithmic range sums.
+
+    The tree covers a window of days that doubles (and is rebuilt) whenever a
+    day outside it is added, so growth costs amortized O(1) per slot.
+    """
+
+    def __init__(self):
+        """Initialize empty totals."""
+        self.clear()
+
+    def clear(self) -> None:
+        """Remove all totals."""
+        self._days: Dict[int, int] = {}  # ordinal -> total, non-zero only
+        self._origin = 0  # ordinal of slot 0
+        self._tree = FenwickTree(0)
+
+    def add(self, day: date, amount: int) -> None:
+        """Add an amount (which may be negative) to a day's total."""
+        if not amount:
+            return
+        ordinal = day.toordinal()
+        if not self._origin <= ordinal < self._origin + len(self._tree):
+            self._grow(ordinal)
+        total = self._days.get(ordinal, 0) + amount
+        if total:
+            self._days[ordinal] = total
+        else:
+            del self._days[ordinal]
+        self._tree.add(ordinal - self._origin, amount)
+
+    def _grow(self, ordinal: int) -> None:
+        """Rebuild the tree over a window that also covers ``ordinal``."""
+        ordinals = list(self._days) + [ordinal]
+        low, high = min(ordinals), max(ordinals)
+        size = max(MIN_SLOTS, 2 * len(self._tree))
+        while size <= high - low:
+            size *= 2
+        # Leave room on both sides so ledgers growing either way rarely rebuild
+        self._origin = low - (size - (high - low)) // 2
+        self._tree = FenwickTree(size)
+        for day, total in self._days.items():
+            self._tree.add(day - self._origin, total)
+
+    def _prefix(self, ordinal: int) -> int:
+        """Return the total of all days before ``ordinal``."""
+        return self._tree.prefix_sum(max(0, ordinal - self._origin))
+
+    def total(self, start: Optional[date] = None, end: Optional[date] = None) -> int:
+        """Return the total for days within [start, end], both inclusive."""
+        if not self._days:
+            return 0
+        high = end.toordinal() + 1 if end else self._origin + len(self._tree)
+        low = start.toordinal() if start else self._origin
+        if low >= high:
+            return 0
+        return self._prefix(high) - self._prefix(low)
+
+    def get(self, day: date) -> int:
+        """Return one day's total."""
+        return self._days.get(day.toordinal(), 0)
+
+    def series(self, start: date, end: date) -> List[Tuple[date, int]]:
+        """Return (day, total) for every day in [start, end], including zeros."""
+        return [
+            (start + timedelta(days=offset), self._days.get(ordinal, 0))
+            for offset, ordinal in enumerate(
+                range(start.toordinal(), end.toordinal() + 1)
+            )
+        ]
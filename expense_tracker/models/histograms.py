@@ -0,0 +1,165 @@
+"""
+Module containing logarithmically bucketed amount histograms.
+
+Bucket edges follow the 1-2-5 series ($0.01, $0.02, $0.05, $0.10, ... $1,
+$2, $5, $10, ...), so each decade of amounts gets three buckets with round
+edges. Histograms are kept per month and category; unlike sketches they are
+exact counts, so removals simply decrement and histograms for any range of
+months are the sum of their months.
+"""
+from bisect import bisect_right
+from datetime import date
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from .expense import Expense
+from .rollups import period_start, to_cents
+
+# Lower edges in cents, up to $10 billion
+BUCKET_EDGES = [
+    step * 10 ** exponent for exponent in range(13) for step in (1, 2, 5)
+]
+
+# Approximate resident size of the histogram of one month and category
+CELL_MEMORY_ESTIMATE = 600
+
+
+def bucket_index(cents: int) -> int:
+    """Return the bucket holding an amount in cents; 0 also takes smaller."""
+    return max(0, bisect_right(BUCKET_EDGES, cents) - 1)
+
+
+def bucket_bounds(index: int) -> Tuple[int, Optional[int]]:
+    """Return a bucket's lower (inclusive) and upper (exclusive) cents."""
+    upper = BUCKET_EDGES[index + 1] if index + 1 < len(BUCKET_EDGES) else None
+    return BUCKET_EDGES[index], upper
+
+
+class AmountHistogram:
+    """Counts of amounts per logarithmic bucket."""
+
+    def __init__(self):
+        """Initialize an empty histogram."""
+        self._counts: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        """Return the number of amounts counted."""
+        return sum(self._counts.values())
+
+    def add(self, cents: int, count: int = 1) -> None:
+        """Count an amount; a negative count removes it again."""
+        index = bucket_index(cents)
+        total = self._counts.get(index, 0) + count
+        if total:
+            self._counts[index] = total
+        else:
+            del self._counts[index]
+
+    def merge(self, other: "AmountHistogram") -> None:
+        """Add every count from another histogram."""
+        for index, count in other._counts.items():
+            self._counts[index] = self._counts.get(index, 0) + count
+
+    def buckets(self) -> List[Tuple[int, Optional[int], int]]:
+        """Return (lower, upper, count) for each bucket in the occupied span.
+
+        Empty buckets between the lowest and highest occupied ones are
+        included, so the result can be charted directly.
+        """
+        if not self._counts:
+            return []
+        return [
+            bucket_bounds(index) + (self._counts.get(index, 0),)
+            for index in range(min(self._counts), max(self._counts) + 1)
+        ]
+
+
+HISTOGRAM_GROUPS = ("category", "month", "year")
+
+
+class HistogramIndex:
+    """Amount histograms per month and category.
+
+    Histograms are built from the source on the first query rather than
+    when the ledger loads, and then kept up to date as expenses change.
+
+    Args:
+        source: Returns every expense, to build the histograms from
+    """
+
+    def __init__(self, source: Callable[[], Iterable[Expense]]):
+        self._source = source
+        self._cells: Optional[Dict[Tuple[date, str], AmountHistogram]] = None
+
+    def clear(self) -> None:
+        """Drop all histograms; they are rebuilt from the source when needed."""
+        self._cells = None
+
+    def estimated_size(self) -> int:
+        """Return an approximate in-memory size of the histograms in bytes."""
+        if self._cells is None:
+            return 0
+        return len(self._cells) * CELL_MEMORY_ESTIMATE
+
+    def add(self, expense: Expense) -> None:
+        """Count a new expense."""
+        self._apply(expense, 1)
+
+    def remove(self, expense: Expense) -> None:
+        """Stop counting an expense."""
+        self._apply(expense, -1)
+
+    def _apply(self, expense: Expense, count: int) -> None:
+        if self._cells is None:
+            return
+        key = (period_start("month", expense.date.date()), expense.category)
+        histogram = self._cells.get(key)
+        if histogram is None:
+            histogram = self._cells[key] = AmountHistogram()
+        histogram.add(to_cents(expense.amount), count)
+        if not histogram:
+            del self._cells[key]
+
+    def cells(
+        self,
+        first_month: Optional[date] = None,
+        last_month: Optional[date] = None,
+        categories: Optional[Sequence[str]] = None,
+    ) -> Iterator[Tuple[date, str, AmountHistogram]]:
+        """Yield (month, category, histogram) for whole months.
+
+        Args:
+            first_month: First month to include, as its first day, or None
+            last_month: Last month to include, as its first day, or None
+            categories: Only include these categories, or None for all
+        """
+        if self._cells is None:
+            self._cells = {}
+            for expense in self._source():
+                self.add(expense)
+        for (month, category), histogram in self._cells.items():
+            if first_month is not None and month < first_month:
+                continue
+            if last_month is not None and month > last_month:
+                continue
+            if categories is not None and category not in categories:
+                continue
+            yield month, category, histogram
+
+
+def group_key(month: date, category: str, group_by: Sequence[str]) -> tuple:
+    """Return the key of the group a month and category fall in."""
+    values = {
+        "category": category,
+        "month": month.strftime("%Y-%m"),
+        "year": str(month.year),
+    }
+    return tuple(values[dimension] for dimension in group_by)
@@ -0,0 +1,72 @@
+"""
+Time-ordered expense ids.
+
+New ids follow the UUIDv7 layout (RFC 9562): a 48-bit Unix timestamp in
+milliseconds, then a 12-bit counter, then random bits. Written in the usual
+lowercase hex form they sort in creation order, so storage appends in id
+order.
+
+Ids are generated from the clock alone, without looking at the ledger. The
+counter keeps ids from one process strictly increasing even within the same
+millisecond or if the clock steps back. Older random (uuid4) and migrated
+(uuid5) ids remain valid; they simply carry no timestamp.
+"""
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Optional
+
+_COUNTER_BITS = 12
+_RANDOM_BITS = 62
+
+_lock = threading.Lock()
+_last_millis = -1
+_counter = 0
+
+
+def _format(millis: int, counter: int, random_bits: int) -> str:
+    """Assemble a version 7, variant 1 UUID string from its fields."""
+    value = (
+        (millis & ((1 << 48) - 1)) << 80
+        | 0x7 << 76
+        | counter << 64
+        | 0b10 << 62
+        | random_bits
+    )
+    return str(uuid.UUID(int=value))
+
+
+def new_id() -> str:
+    """Return a new id that sorts after every id this process made before."""
+    global _last_millis, _counter
+    random_bits = int.from_bytes(os.urandom(8), "big") & ((1 << _RANDOM_BITS) - 1)
+    with _lock:
+        millis = time.time_ns() // 1_000_000
+        if millis > _last_millis:
+            _last_millis = millis
+            _counter = 0
+        else:
+            # Same millisecond, or the clock went back: keep counting from
+            # the last timestamp, borrowing the next millisecond on overflow
+            _counter += 1
+            if _counter >> _COUNTER_BITS:
+                _last_millis += 1
+                _counter = 0
+        return _format(_last_millis, _counter, random_bits)
+
+
+def id_time(expense_id: str) -> Optional[datetime]:
+    """Return the (UTC) creation time encoded in an id.
+
+    Returns:
+        None for ids that are not time-ordered, such as legacy uuid4 ids.
+    """
+    try:
+        parsed = uuid.UUID(expense_id)
+    except (TypeError, ValueError):
+        return None
+    if parsed.version != 7:
+        return None
+    return datetime.fromtimestamp((parsed.int >> 80) / 1000, tz=timezone.utc)
@@ -0,0 +1,113 @@
+"""
+Module containing in-memory indexes over loaded expenses.
+"""
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from .expense import Expense
+
+
+class DateIndex:
+    """Expenses kept in date order for range scans and newest-first listing."""
+
+    def __init__(self):
+        """Initialize an empty index."""
+        # Parallel lists: sorted dates and the expense at each position
+        self._dates: List[datetime] = []
+        self._expenses: List[Expense] = []
+
+    def __len__(self) -> int:
+        """Return the number of indexed expenses."""
+        return len(self._expenses)
+
+    def rebuild(self, expenses: Iterable[Expense]) -> None:
+        """Index a full set of expenses from scratch."""
+        ordered = sorted(expenses, key=lambda expense: expense.date)
+        self._expenses = ordered
+        self._dates = [expense.date for expense in ordered]
+
+    def add(self, expense: Expense) -> None:
+        """Index a new expense after any others with the same date."""
+        position = bisect_right(self._dates, expense.date)
+        self._dates.insert(position, expense.date)
+        self._expenses.insert(position, expense)
+
+    def remove(self, expense: Expense) -> None:
+        """Remove an indexed expense."""
+        position = bisect_left(self._dates, expense.date)
+        while position < len(self._expenses) and self._dates[position] == expense.date:
+            if self._expenses[position] is expense:
+                del self._dates[position]
+                del self._expenses[position]
+                return
+            position += 1
+        raise ValueError("Expense is not indexed")
+
+    def count(
+        self, start: Optional[datetime] = None, end: Optional[datetime] = None
+    ) -> int:
+        """Return the number of expenses with start <= date < end."""
+        lo = bisect_left(self._dates, start) if start is not None else 0
+        hi = bisect_left(self._dates, end) if end is not None else len(self._dates)
+        return max(hi - lo, 0)
+
+    def scan(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        reverse: bool = False,
+    ) -> Iterator[Expense]:
+        """Yield expenses with start <= date < end in date order.
+
+        Only the positions inside the range are visited, so reading the first
+        few rows of a large range costs no more than the rows read.
+
+        Args:
+            start: Inclusive lower bound, or None
+            end: Exclusive upper bound, or None
+            reverse: Yield newest first
+        """
+        lo = bisect_left(self._dates, start) if start is not None else 0
+        hi = bisect_left(self._dates, end) if end is not None else len(self._dates)
+        positions = range(hi - 1, lo - 1, -1) if reverse else range(lo, hi)
+        expenses = self._expenses
+        for position in positions:
+            yield expenses[position]
+
+
+class CategoryIndex:
+    """Expenses grouped by case-folded category."""
+
+    def __init__(self):
+        """Initialize an empty index."""
+        # category -> id(expense) -> expense, so removal needs no search
+        self._groups: Dict[str, Dict[int, Expense]] = {}
+
+    def rebuild(self, expenses: Iterable[Expense]) -> None:
+        """Index a full set of expenses from scratch."""
+        self._groups = {}
+        for expense in expenses:
+            self.add(expense)
+
+    def add(self, expense: Expense) -> None:
+        """Index a new expense."""
+        key = expense.category.casefold()
+        self._groups.setdefault(key, {})[id(expense)] = expense
+
+    def remove(self, expense: Expense) -> None:
+        """Remove an indexed expense."""
+        key = expense.category.casefold()
+        group = self._groups.get(key)
+        if group is None or group.pop(id(expense), None) is None:
+            raise ValueError("Expense is not indexed")
+        if not group:
+            del self._groups[key]
+
+    def count(self, category: str) -> int:
+        """Return the number of expenses in a category."""
+        return len(self._groups.get(category.casefold(), ()))
+
+    def get(self, category: str) -> Iterator[Expense]:
+        """Yield the expenses in a category, in no particular order."""
+        return iter(self._groups.get(category.casefold(), {}).values())
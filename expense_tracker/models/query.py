@@ -0,0 +1,339 @@
+"""
+Module implementing a small filter language for expenses.
+
+Example::
+
+    amount > 50 and category in (Food, Bills) and description ~ "uber"
+
+Fields are ``id``, ``amount``, ``category``, ``description`` and ``date``.
+Operators are ``=``, ``!=``, ``<``, ``<=``, ``>``, ``>=``, ``~`` (contains)
+and ``in (...)``; conditions combine with ``and``, ``or``, ``not`` and
+parentheses. Text comparisons ignore case. Dates are written ``YYYY-MM-DD``
+and compare by day.
+
+A query is parsed once into a predicate plus the constraints the manager can
+answer from an index: id equality, a date range and category membership.
+"""
+import re
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from decimal import Decimal, InvalidOperation
+from typing import Callable, List, Optional, Tuple, Union
+
+from .expense import Expense
+
+FIELDS = ("id", "amount", "category", "description", "date")
+OPERATORS = ("=", "!=", "<", "<=", ">", ">=", "~", "in")
+
+_TOKEN = re.compile(
+    r"""\s*(?:
+        (?P<string>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+        |(?P<op>==|!=|<=|>=|=|<|>|~)
+        |(?P<punct>[(),])
+        |(?P<word>[^\s(),=!<>~"']+)
+    )""",
+    re.VERBOSE,
+)
+
+
+class QuerySyntaxError(ValueError):
+    """Raised when a query cannot be parsed."""
+
+
+@dataclass
+class Comparison:
+    """A single ``field op value`` condition."""
+
+    field: str
+    op: str
+    value: Union[str, List[str]]
+
+
+@dataclass
+class BoolOp:
+    """Conjunction or disjunction of conditions."""
+
+    op: str  # 'and' or 'or'
+    items: List["Node"]
+
+
+@dataclass
+class Not:
+    """Negated condition."""
+
+    item: "Node"
+
+
+Node = Union[Comparison, BoolOp, Not]
+
+
+@dataclass
+class Constraints:
+    """Index-answerable restrictions implied by every matching expense."""
+
+    ids: Optional[List[str]] = None
+    categories: Optional[List[str]] = None
+    start: Optional[datetime] = None  # inclusive
+    end: Optional[datetime] = None  # exclusive
+
+
+@dataclass
+class Query:
+    """A parsed query: its source, syntax tree and compiled predicate."""
+
+    text: str
+    tree: Optional[Node]
+    predicate: Callable[[Expense], bool]
+    constraints: Constraints = field(default_factory=Constraints)
+
+    def __call__(self, expense: Expense) -> bool:
+        """Return whether an expense matches the query."""
+        return self.predicate(expense)
+
+
+def _tokenize(text: str) -> List[Tuple[str, str]]:
+    """Split query text into (kind, value) tokens."""
+    tokens = []
+    position = 0
+    text = text.rstrip()
+    while position < len(text):
+        match = _TOKEN.match(text, position)
+        if not match or match.end() == position:
+            raise QuerySyntaxError(
+                f"Unexpected character at {position}: {text[position:]!r}"
+            )
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == "string":
+            value = re.sub(r"\\(.)", r"\1", value[1:-1])
+        elif kind == "op" and value == "==":
+            value = "="
+        elif kind == "word" and value.lower() in ("and", "or", "not", "in"):
+            kind, value = "keyword", value.lower()
+        tokens.append((kind, value))
+        position = match.end()
+    return tokens
+
+
+class _Parser:
+    """Recursive-descent parser producing a syntax tree."""
+
+    def __init__(self, text: str):
+        self.tokens = _tokenize(text)
+        self.position = 0
+
+    def peek(self) -> Tuple[Optional[str], Optional[str]]:
+        if self.position < len(self.tokens):
+            return self.tokens[self.position]
+        return None, None
+
+    def take(self, kind: Optional[str] = None, value: Optional[str] = None) -> str:
+        token_kind, token_value = self.peek()
+        if token_kind is None:
+            raise QuerySyntaxError("Unexpected end of query")
+        if (kind and token_kind != kind) or (value and token_value != value):
+            expected = value or kind
+            raise QuerySyntaxError(f"Expected {expected}, found {token_value!r}")
+        self.position += 1
+        return token_value
+
+    def parse(self) -> Node:
+        node = self.parse_or()
+        if self.position != len(self.tokens):
+            raise QuerySyntaxError(f"Unexpected {self.peek()[1]!r}")
+        return node
+
+    def parse_or(self) -> Node:
+        items = [self.parse_and()]
+        while self.peek() == ("keyword", "or"):
+            self.take()
+            items.append(self.parse_and())
+        return items[0] if len(items) == 1 else BoolOp("or", items)
+
+    def parse_and(self) -> Node:
+        items = [self.parse_not()]
+        while self.peek() == ("keyword", "and"):
+            self.take()
+            items.append(self.parse_not())
+        return items[0] if len(items) == 1 else BoolOp("and", items)
+
+    def parse_not(self) -> Node:
+        if self.peek() == ("keyword", "not"):
+            self.take()
+            return Not(self.parse_not())
+        if self.peek() == ("punct", "("):
+            self.take()
+            node = self.parse_or()
+            self.take("punct", ")")
+            return node
+        return self.parse_comparison()
+
+    def parse_value(self) -> str:
+        kind, value = self.peek()
+        if kind not in ("word", "string"):
+            raise QuerySyntaxError(f"Expected a value, found {value!r}")
+        self.position += 1
+        return value
+
+    def parse_comparison(self) -> Comparison:
+        name = self.take("word").lower()
+        if name not in FIELDS:
+            raise QuerySyntaxError(
+                f"Unknown field {name!r}; use one of {', '.join(FIELDS)}"
+            )
+        kind, op = self.peek()
+        if (kind, op) == ("keyword", "in"):
+            self.take()
+            self.take("punct", "(")
+            values = [self.parse_value()]
+            while self.peek() == ("punct", ","):
+                self.take()
+                values.append(self.parse_value())
+            self.take("punct", ")")
+            return Comparison(name, "in", values)
+        if kind != "op":
+            raise QuerySyntaxError(f"Expected an operator after {name!r}")
+        self.take()
+        return Comparison(name, op, self.parse_value())
+
+
+def _parse_amount(value: str) -> Decimal:
+    try:
+        return Decimal(value)
+    except InvalidOperation as e:
+        raise QuerySyntaxError(f"Invalid amount: {value!r}") from e
+
+
+def _parse_day(value: str) -> datetime:
+    try:
+        return datetime.strptime(value, "%Y-%m-%d")
+    except ValueError as e:
+        raise QuerySyntaxError(f"Invalid date: {value!r} (use YYYY-MM-DD)") from e
+
+
+def _compile_comparison(node: Comparison) -> Callable[[Expense], bool]:
+    """Compile one comparison into a predicate."""
+    name, op, value = node.field, node.op, node.value
+
+    if name == "date":
+        if op == "~":
+            raise QuerySyntaxError("'~' cannot be used with date")
+        if op == "in":
+            days = {_parse_day(v).date() for v in value}
+            return lambda e: e.date.date() in days
+        start = _parse_day(value)
+        end = start + timedelta(days=1)
+        return {
+            "=": lambda e: start <= e.date < end,
+            "!=": lambda e: not start <= e.date < end,
+            "<": lambda e: e.date < start,
+            "<=": lambda e: e.date < end,
+            ">": lambda e: e.date >= end,
+            ">=": lambda e: e.date >= start,
+        }[op]
+
+    if name == "amount":
+        if op == "~":
+            raise QuerySyntaxError("'~' cannot be used with amount")
+        if op == "in":
+            amounts = {_parse_amount(v) for v in value}
+            return lambda e: e.amount in amounts
+        amount = _parse_amount(value)
+        return {
+            "=": lambda e: e.amount == amount,
+            "!=": lambda e: e.amount != amount,
+            "<": lambda e: e.amount < amount,
+            "<=": lambda e: e.amount <= amount,
+            ">": lambda e: e.amount > amount,
+            ">=": lambda e: e.amount >= amount,
+        }[op]
+
+    # Text fields: ids compare exactly, everything else ignores case
+    if name == "id":
+        def get(e):
+            return str(e.id)
+
+        def norm(v):
+            return v
+    else:
+        def get(e):
+            return getattr(e, name).casefold()
+
+        def norm(v):
+            return v.casefold()
+
+    if op == "in":
+        values = {norm(v) for v in value}
+        return lambda e: get(e) in values
+    text = norm(value)
+    return {
+        "=": lambda e: get(e) == text,
+        "!=": lambda e: get(e) != text,
+        "<": lambda e: get(e) < text,
+        "<=": lambda e: get(e) <= text,
+        ">": lambda e: get(e) > text,
+        ">=": lambda e: get(e) >= text,
+        "~": lambda e: text in get(e),
+    }[op]
+
+
+def _compile(node: Node) -> Callable[[Expense], bool]:
+    """Compile a syntax tree into a predicate."""
+    if isinstance(node, Comparison):
+        return _compile_comparison(node)
+    if isinstance(node, Not):
+        inner = _compile(node.item)
+        return lambda e: not inner(e)
+    predicates = [_compile(item) for item in node.items]
+    if node.op == "and":
+        return lambda e: all(p(e) for p in predicates)
+    return lambda e: any(p(e) for p in predicates)
+
+
+def _constraints(node: Optional[Node]) -> Constraints:
+    """Collect index-usable constraints from the top-level conjunction."""
+    constraints = Constraints()
+    if node is None:
+        return constraints
+    conjuncts = node.items if isinstance(node, BoolOp) and node.op == "and" else [node]
+    for item in conjuncts:
+        if not isinstance(item, Comparison):
+            continue
+        values = item.value if item.op == "in" else [item.value]
+        if item.field == "id" and item.op in ("=", "in"):
+            constraints.ids = list(values)
+        elif item.field == "category" and item.op in ("=", "in"):
+            constraints.categories = list(values)
+        elif item.field == "date" and item.op != "in":
+            start = _parse_day(item.value)
+            end = start + timedelta(days=1)
+            bounds = {
+                "=": (start, end),
+                "<": (None, start),
+                "<=": (None, end),
+                ">": (end, None),
+                ">=": (start, None),
+            }.get(item.op)
+            if bounds is None:
+                continue
+            low, high = bounds
+            start, end = constraints.start, constraints.end
+            if low is not None and (start is None or low > start):
+                constraints.start = low
+            if high is not None and (end is None or high < end):
+                constraints.end = high
+    return constraints
+
+
+def parse_query(text: str) -> Query:
+    """Parse and compile a query.
+
+    An empty query matches every expense.
+
+    Raises:
+        QuerySyntaxError: If the query is malformed.
+    """
+    if not text.strip():
+        return Query(text, None, lambda e: True)
+    tree = _Parser(text).parse()
+    return Query(text, tree, _compile(tree), _constraints(tree))
@@ -0,0 +1,467 @@
+"""
+Module containing precomputed expense rollups used to answer statistics queries.
+
+Totals are kept per day and category in integer cents, so a statistics query
+touches one cell per (day, category) pair in its range instead of every
+expense. RollupCube also keeps week, month and year totals, so a multi-year
+report touches a handful of cells per category.
+"""
+import os
+from bisect import bisect_left, bisect_right, insort
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from decimal import ROUND_HALF_EVEN, Decimal
+from typing import (
+    Callable,
+    Collection,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from expense_tracker.services.storage import open_storage
+
+from .expense import Expense
+
+WEEKDAYS = [
+    "Monday",
+    "Tuesday",
+    "Wednesday",
+    "Thursday",
+    "Friday",
+    "Saturday",
+    "Sunday",
+]
+
+
+def to_cents(amount: Decimal) -> int:
+    """Convert a Decimal amount to integer cents."""
+    return int((amount * 100).to_integral_value(rounding=ROUND_HALF_EVEN))
+
+
+def from_cents(cents: int) -> Decimal:
+    """Convert integer cents back to a Decimal amount."""
+    return Decimal(cents) / 100
+
+
+KeyFunction = Callable[[date, str], object]
+FormatFunction = Callable[[object], str]
+
+# Group-by dimensions: name -> (sort key from (day, category), display format)
+GROUP_DIMENSIONS: Dict[str, Tuple[KeyFunction, FormatFunction]] = {
+    "category": (lambda day, category: category, str),
+    "day": (lambda day, category: day, lambda key: key.isoformat()),
+    "week": (
+        lambda day, category: day.isocalendar()[:2],
+        lambda key: f"{key[0]:04d}-W{key[1]:02d}",
+    ),
+    "month": (
+        lambda day, category: (day.year, day.month),
+        lambda key: f"{key[0]:04d}-{key[1]:02d}",
+    ),
+    "year": (lambda day, category: day.year, str),
+    "weekday": (lambda day, category: day.weekday(), lambda key: WEEKDAYS[key]),
+}
+
+
+@dataclass
+class StatsGroup:
+    """Aggregated totals for one group of a statistics query."""
+
+    key: Dict[str, str]
+    total: Decimal
+    count: int
+    percentage: Decimal
+
+
+@dataclass
+class StatsResult:
+    """Result of a statistics query."""
+
+    total: Decimal
+    count: int
+    groups: List[StatsGroup] = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        """Convert the result to a JSON-serialisable dictionary."""
+        return {
+            "total": str(self.total),
+            "count": self.count,
+            "groups": [
+                {
+                    "key": group.key,
+                    "total": str(group.total),
+                    "count": group.count,
+                    "percentage": float(round(group.percentage, 2)),
+                }
+                for group in self.groups
+            ],
+        }
+
+
+class DailyRollup:
+    """Per-day, per-category totals maintained as expenses change."""
+
+    def __init__(self):
+        """Initialize an empty rollup."""
+        # day -> category -> [cents, count]
+        self._cells: Dict[date, Dict[str, List[int]]] = {}
+        self._days: List[date] = []
+
+    def clear(self) -> None:
+        """Remove all totals."""
+        self._cells.clear()
+        self._days.clear()
+
+    def rebuild(self, expenses: Iterable[Expense]) -> None:
+        """Recompute all totals from scratch."""
+        self.clear()
+        for expense in expenses:
+            self.add(expense)
+
+    def add(self, expense: Expense) -> None:
+        """Account for a new expense."""
+        self._apply(expense, 1)
+
+    def remove(self, expense: Expense) -> None:
+        """Remove an expense from the totals."""
+        self._apply(expense, -1)
+
+    def _apply(self, expense: Expense, sign: int) -> None:
+        """Add or subtract one expense from its day/category cell."""
+        self._add_cell(
+            expense.date.date(), expense.category, sign * to_cents(expense.amount), sign
+        )
+
+    def _add_cell(self, day: date, category: str, cents: int, count: int) -> None:
+        """Add cents and a count of expenses to a day/category cell."""
+        categories = self._cells.get(day)
+        if categories is None:
+            categories = self._cells[day] = {}
+            insort(self._days, day)
+        cell = categories.setdefault(category, [0, 0])
+        cell[0] += cents
+        cell[1] += count
+        if cell[1] == 0:
+            del categories[category]
+            if not categories:
+                del self._cells[day]
+                del self._days[bisect_left(self._days, day)]
+
+    def merge(self, other: "DailyRollup") -> None:
+        """Add another rollup's totals, such as a partial built elsewhere."""
+        for day, category, cents, count in other.cells():
+            self._add_cell(day, category, cents, count)
+
+    def cells(
+        self, start: Optional[date] = None, end: Optional[date] = None
+    ) -> Iterator[Tuple[date, str, int, int]]:
+        """Yield (day, category, cents, count) for days within [start, end]."""
+        lo = bisect_left(self._days, start) if start else 0
+        hi = bisect_right(self._days, end) if end else len(self._days)
+        for day in self._days[lo:hi]:
+            for category, (cents, count) in self._cells[day].items():
+                yield day, category, cents, count
+
+    def _pieces(
+        self, start: Optional[date], end: Optional[date], group_by: Sequence[str]
+    ) -> Iterator[Tuple[date, str, int, int]]:
+        """Yield (day, category, cents, count) cells covering [start, end].
+
+        Each cell's day stands for whatever period the cell covers, so it
+        must map to the right group for every dimension in group_by.
+        """
+        return self.cells(start, end)
+
+    def query(
+        self,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        group_by: Sequence[str] = ("category",),
+        categories: Optional[Collection[str]] = None,
+    ) -> StatsResult:
+        """Aggregate totals for a date range, grouped by the given dimensions.
+
+        Args:
+            start: First day to include, or None for no lower bound
+            end: Last day to include, or None for no upper bound
+            group_by: Dimension names from GROUP_DIMENSIONS
+            categories: Only include these categories, or None for all
+
+        Returns:
+            Grand total and per-group totals with percentages of the total.
+        """
+        unknown = [name for name in group_by if name not in GROUP_DIMENSIONS]
+        if unknown:
+            raise ValueError(f"Unknown group_by dimension(s): {', '.join(unknown)}")
+        keyfuncs = [GROUP_DIMENSIONS[name][0] for name in group_by]
+
+        groups: Dict[tuple, List[int]] = {}
+        total_cents = 0
+        total_count = 0
+        for day, category, cents, count in self._pieces(start, end, group_by):
+            if categories is not None and category not in categories:
+                continue
+            key = tuple(keyfunc(day, category) for keyfunc in keyfuncs)
+            group = groups.get(key)
+            if group is None:
+                group = groups[key] = [0, 0]
+            group[0] += cents
+            group[1] += count
+            total_cents += cents
+            total_count += count
+
+        result = StatsResult(total=from_cents(total_cents), count=total_count)
+        for key in sorted(groups):
+            cents, count = groups[key]
+            result.groups.append(
+                StatsGroup(
+                    key={
+                        name: GROUP_DIMENSIONS[name][1](value)
+                        for name, value in zip(group_by, key)
+                    },
+                    total=from_cents(cents),
+                    count=count,
+                    percentage=(
+                        Decimal(cents) * 100 / total_cents
+                        if total_cents
+                        else Decimal("0")
+                    ),
+                )
+            )
+        return result
+
+
+# Period levels kept by RollupCube above days, with the level each one is
+# split into at range boundaries
+PERIOD_LEVELS = {"week": "day", "month": "day", "year": "month"}
+
+# Smallest ledger rebuilt in parallel when a manager opts in; below this,
+# starting processes costs more than it saves
+PARALLEL_REBUILD_MIN_ROWS = 200_000
+
+
+def period_start(level: str, day: date) -> date:
+    """Return the first day of the day, week, month or year containing a day."""
+    if level == "day":
+        return day
+    if level == "week":
+        return day - timedelta(days=day.weekday())
+    if level == "month":
+        return day.replace(day=1)
+    return date(day.year, 1, 1)
+
+
+def next_period(level: str, start: date) -> date:
+    """Return the first day of the period after the one starting on ``start``."""
+    if level == "day":
+        return start + timedelta(days=1)
+    if level == "week":
+        return start + timedelta(days=7)
+    if level == "month":
+        return date(start.year + start.month // 12, start.month % 12 + 1, 1)
+    return date(start.year + 1, 1, 1)
+
+
+def _finest_level(group_by: Sequence[str]) -> str:
+    """Return the coarsest period level from which every group can be told."""
+    dimensions = set(group_by)
+    if dimensions & {"day", "weekday"}:
+        return "day"
+    if "week" in dimensions:
+        # ISO weeks straddle months and years
+        return "day" if dimensions & {"month", "year"} else "week"
+    if "month" in dimensions:
+        return "month"
+    return "year"
+
+
+class RollupCube(DailyRollup):
+    """Totals per category for every day, ISO week, month and year.
+
+    All levels are updated together, O(1) per expense. Queries read whole
+    years, months or weeks where the range and grouping allow, and days only
+    at the ragged ends of the range.
+    """
+
+    def __init__(self):
+        """Initialize an empty cube."""
+        super().__init__()
+        # level -> period start -> category -> [cents, count]
+        self._periods: Dict[str, Dict[date, Dict[str, List[int]]]] = {
+            level: {} for level in PERIOD_LEVELS
+        }
+
+    def clear(self) -> None:
+        """Remove all totals."""
+        super().clear()
+        for periods in self._periods.values():
+            periods.clear()
+
+    def _add_cell(self, day: date, category: str, cents: int, count: int) -> None:
+        """Add to a day/category cell and the periods containing it."""
+        super()._add_cell(day, category, cents, count)
+        for level, periods in self._periods.items():
+            start = period_start(level, day)
+            categories = periods.setdefault(start, {})
+            cell = categories.setdefault(category, [0, 0])
+            cell[0] += cents
+            cell[1] += count
+            if cell[1] == 0:
+                del categories[category]
+                if not categories:
+                    del periods[start]
+
+    def rebuild(self, expenses: Iterable[Expense]) -> None:
+        """Recompute all totals, summing day cells before the coarser levels."""
+        self.clear()
+        self._merge_cells(
+            _aggregate_rows(
+                (expense.date.toordinal(), expense.category, expense.amount)
+                for expense in expenses
+            )
+        )
+
+    def _merge_cells(self, cells: Dict[Tuple[int, str], List[int]]) -> None:
+        """Add cells keyed by (day ordinal, category) to every level."""
+        for (ordinal, category), (cents, count) in cells.items():
+            self._add_cell(date.fromordinal(ordinal), category, cents, count)
+
+    def _pieces(
+        self, start: Optional[date], end: Optional[date], group_by: Sequence[str]
+    ) -> Iterator[Tuple[date, str, int, int]]:
+        """Yield the coarsest cells covering [start, end]."""
+        level = _finest_level(group_by)
+        if level == "day" or not self._days:
+            return self.cells(start, end)
+        # Clamp to the data so open ranges do not walk empty centuries
+        start = max(start, self._days[0]) if start else self._days[0]
+        end = min(end, self._days[-1]) if end else self._days[-1]
+        if start > end:
+            return iter(())
+        return self._tile(start, end, level)
+
+    def _tile(
+        self, start: date, end: date, level: str
+    ) -> Iterator[Tuple[date, str, int, int]]:
+        """Yield cells of ``level`` for whole periods, finer cells at the ends."""
+        if level == "day":
+            yield from self.cells(start, end)
+            return
+        first = period_start(level, start)
+        if first < start:
+            first = next_period(level, first)
+        stop = period_start(level, end + timedelta(days=1))
+        finer = PERIOD_LEVELS[level]
+        if first >= stop:
+            yield from self._tile(start, end, finer)
+            return
+        if start < first:
+            yield from self._tile(start, first - timedelta(days=1), finer)
+        periods = self._periods[level]
+        current = first
+        while current < stop:
+            for category, (cents, count) in periods.get(current, {}).items():
+                yield current, category, cents, count
+            current = next_period(level, current)
+        if stop <= end:
+            yield from self._tile(stop, end, finer)
+
+    def load_parallel(
+        self, url: str, bounds: Sequence[datetime], workers: Optional[int] = None
+    ) -> List[Expense]:
+        """Load a ledger and recompute all totals in worker processes.
+
+        Each worker opens the ledger at ``url`` itself, reads one slice of
+        dates with a range scan and sums it into day/category cells, so the
+        scan and the aggregation are split between the workers rather than
+        done here. Only the bounds are sent to workers; the rows and cells
+        come back and are joined in date order.
+
+        Args:
+            url: Storage URL of a ledger whose engine supports range scans
+            bounds: Increasing dates; each consecutive pair is one partition,
+                such as month_bounds() returns
+            workers: Number of processes, or None for one per CPU
+
+        Returns:
+            The expenses within the bounds, in date order.
+        """
+        self.clear()
+        partitions = list(zip(bounds, bounds[1:]))
+        if not partitions:
+            return []
+        workers = min(workers or os.cpu_count() or 1, len(partitions))
+        starts, ends = zip(*partitions)
+        expenses: List[Expense] = []
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for rows, cells in pool.map(
+                _load_partition, [url] * len(starts), starts, ends
+            ):
+                expenses.extend(rows)
+                self._merge_cells(cells)
+        return expenses
+
+
+def month_bounds(counts: Dict[Tuple[int, int], int], parts: int) -> List[datetime]:
+    """Return month starts splitting a ledger into about ``parts`` slices.
+
+    Slices hold roughly equal numbers of expenses and always start on the
+    first of a month; the last bound is the month after the newest expense,
+    so consecutive bounds cover every counted month.
+
+    Args:
+        counts: Number of expenses per (year, month), such as
+            StorageEngine.month_counts() returns
+        parts: Number of slices wanted
+    """
+    months = sorted(month for month, count in counts.items() if count)
+    if not months:
+        return []
+    total = sum(counts[month] for month in months)
+    bounds: List[datetime] = []
+    seen = 0
+    for year, month in months:
+        if seen * parts >= total * len(bounds):
+            bounds.append(datetime(year, month, 1))
+        seen += counts[(year, month)]
+    year, month = months[-1]
+    bounds.append(datetime(year + month // 12, month % 12 + 1, 1))
+    return bounds
+
+
+def _aggregate_rows(
+    rows: Iterable[Tuple[int, str, Decimal]]
+) -> Dict[Tuple[int, str], List[int]]:
+    """Sum (day ordinal, category, amount) rows into cents and counts per cell."""
+    cells: Dict[Tuple[int, str], List[int]] = {}
+    for ordinal, category, amount in rows:
+        cell = cells.get((ordinal, category))
+        if cell is None:
+            cell = cells[(ordinal, category)] = [0, 0]
+        cell[0] += to_cents(amount)
+        cell[1] += 1
+    return cells
+
+
+def _load_partition(
+    url: str, start: datetime, end: datetime
+) -> Tuple[List[Expense], Dict[Tuple[int, str], List[int]]]:
+    """Read the expenses with start <= date < end and sum them into cells.
+
+    Runs in worker processes for RollupCube.load_parallel().
+    """
+    storage = open_storage(url)
+    try:
+        expenses = storage.load_range(start, end)
+    finally:
+        storage.close()
+    return expenses, _aggregate_rows(
+        (expense.date.toordinal(), expense.category, expense.amount)
+        for expense in expenses
+    )
@@ -0,0 +1,129 @@
+"""
+Module containing an inverted index for searching expense descriptions.
+
+Descriptions are split into case-folded word tokens; each token maps to the
+ids of the expenses containing it. Tokens are also kept sorted, so a prefix
+finds every token it starts with by bisection, which makes type-ahead search
+independent of the number of expenses.
+"""
+import re
+from bisect import bisect_left, insort
+from typing import Dict, Hashable, Iterable, List, Set, Tuple
+
+_WORD = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into case-folded word tokens."""
+    return _WORD.findall(text.casefold())
+
+
+class SearchIndex:
+    """Token -> posting set index over document texts."""
+
+    def __init__(self):
+        """Initialize an empty index."""
+        self._postings: Dict[str, Set[Hashable]] = {}
+        self._tokens: List[str] = []  # sorted keys of _postings
+        self._documents: Dict[Hashable, Tuple[str, ...]] = {}
+
+    def __len__(self) -> int:
+        """Return the number of indexed documents."""
+        return len(self._documents)
+
+    def __contains__(self, doc_id: Hashable) -> bool:
+        """Return whether a document is indexed."""
+        return doc_id in self._documents
+
+    def clear(self) -> None:
+        """Remove every document."""
+        self._postings.clear()
+        self._tokens.clear()
+        self._documents.clear()
+
+    def rebuild(self, documents: Iterable[Tuple[Hashable, str]]) -> None:
+        """Index a full set of (id, text) documents from scratch."""
+        self.clear()
+        for doc_id, text in documents:
+            tokens = tuple(set(tokenize(text)))
+            self._documents[doc_id] = tokens
+            for token in tokens:
+                self._postings.setdefault(token, set()).add(doc_id)
+        self._tokens = sorted(self._postings)
+
+    def add(self, doc_id: Hashable, text: str) -> None:
+        """Index a document, replacing any earlier text for the same id."""
+        if doc_id in self._documents:
+            self.remove(doc_id)
+        tokens = tuple(set(tokenize(text)))
+        self._documents[doc_id] = tokens
+        for token in tokens:
+            posting = self._postings.get(token)
+            if posting is None:
+                posting = self._postings[token] = set()
+                insort(self._tokens, token)
+            posting.add(doc_id)
+
+    def remove(self, doc_id: Hashable) -> None:
+        """Remove a document, if it is indexed."""
+        for token in self._documents.pop(doc_id, ()):
+            posting = self._postings[token]
+            posting.discard(doc_id)
+            if not posting:
+                del self._postings[token]
+                del self._tokens[bisect_left(self._tokens, token)]
+
+    def _prefix_matches(self, prefix: str) -> Set[Hashable]:
+        """Return the ids of documents with a token starting with prefix."""
+        matches: Set[Hashable] = set()
+        position = bisect_left(self._tokens, prefix)
+        tokens = self._tokens
+        while position < len(tokens) and tokens[position].startswith(prefix):
+            matches |= self._postings[tokens[position]]
+            position += 1
+        return matches
+
+    def search(self, text: str, prefix: bool = True) -> Set[Hashable]:
+        """Find documents containing every token of text.
+
+        Args:
+            text: Search terms
+            prefix: Match tokens that start with each term rather than only
+                whole tokens, for type-ahead
+
+        Returns:
+            The ids of matching documents; empty when text has no tokens.
+        """
+        terms = tokenize(text)
+        if not terms:
+            return set()
+        postings = [
+            self._prefix_matches(term) if prefix else self._postings.get(term, set())
+            for term in terms
+        ]
+        postings.sort(key=len)
+        result = set(postings[0])
+        for posting in postings[1:]:
+            result &= posting
+            if not result:
+                break
+        return result
+
+    def to_dict(self) -> Dict[str, list]:
+        """Convert the index to a JSON-serialisable dictionary."""
+        return {token: sorted(map(str, ids)) for token, ids in self._postings.items()}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, list]) -> "SearchIndex":
+        """Restore an index saved with to_dict()."""
+        index = cls()
+        documents: Dict[Hashable, List[str]] = {}
+        for token, ids in data.items():
+            index._postings[token] = set(ids)
+            for doc_id in ids:
+                documents.setdefault(doc_id, []).append(token)
+        index._tokens = sorted(index._postings)
+        index._documents = {
+            doc_id: tuple(tokens) for doc_id, tokens in documents.items()
+        }
+        return index
@@ -0,0 +1,273 @@
+"""
+Module containing mergeable sketches for approximate statistics.
+
+KLLSketch estimates quantiles of expense amounts and HyperLogLog counts
+distinct descriptions. Both use memory bounded independently of the number
+of rows and merge losslessly with sketches of the same kind, so per-month
+sketches combine into answers for any range of months.
+
+Neither sketch supports removal. StatsSketches therefore marks the month and
+category of a removed expense as stale and rebuilds just that cell from the
+ledger the next time it is queried.
+"""
+import hashlib
+import math
+import random
+import re
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .expense import Expense
+from .rollups import period_start, to_cents
+
+DEFAULT_QUANTILES = (0.5, 0.9)
+
+# Approximate resident size of the two sketches of a well-filled month and
+# category
+CELL_MEMORY_ESTIMATE = 16_000
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+class KLLSketch:
+    """Quantile sketch after Karnin, Lang and Liberty (2016).
+
+    Items live in a stack of compactors; level h holds items of weight 2**h.
+    A full compactor sorts itself and promotes every other item (at a random
+    offset) one level up. With ``k = 200`` rank errors stay around 1% while
+    at most about 3k items are kept.
+    """
+
+    def __init__(self, k: int = 200, seed: Optional[int] = None):
+        """Initialize an empty sketch.
+
+        Args:
+            k: Accuracy parameter; memory grows linearly with it
+            seed: Seed for the compaction coin flips, for reproducible tests
+        """
+        self.k = k
+        self.count = 0
+        self._compactors: List[List[int]] = [[]]
+        self._random = random.Random(seed)
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self._compactors) - level - 1
+        return int(math.ceil(self.k * (2 / 3) ** depth)) + 1
+
+    def _size(self) -> int:
+        return sum(len(compactor) for compactor in self._compactors)
+
+    def _max_size(self) -> int:
+        return sum(self._capacity(level) for level in range(len(self._compactors)))
+
+    def update(self, value: int) -> None:
+        """Add one value."""
+        self._compactors[0].append(value)
+        self.count += 1
+        if len(self._compactors[0]) >= self._capacity(0):
+            self._compress()
+
+    def _compress(self) -> None:
+        """Compact full levels until the sketch is within its size budget."""
+        while self._size() >= self._max_size():
+            for level, compactor in enumerate(self._compactors):
+                if len(compactor) >= self._capacity(level):
+                    if level + 1 == len(self._compactors):
+                        self._compactors.append([])
+                    compactor.sort()
+                    # Keep the last item back if the count is odd
+                    kept = [compactor.pop()] if len(compactor) % 2 else []
+                    offset = self._random.randrange(2)
+                    self._compactors[level + 1].extend(compactor[offset::2])
+                    compactor[:] = kept
+                    break
+            else:
+                return
+
+    def merge(self, other: "KLLSketch") -> None:
+        """Add every value summarised by another sketch."""
+        while len(self._compactors) < len(other._compactors):
+            self._compactors.append([])
+        for level, compactor in enumerate(other._compactors):
+            self._compactors[level].extend(compactor)
+        self.count += other.count
+        self._compress()
+
+    def quantile(self, q: float) -> Optional[int]:
+        """Return the smallest value whose rank is at least ``q * count``.
+
+        Returns:
+            None if the sketch is empty.
+        """
+        weighted = sorted(
+            (value, 1 << level)
+            for level, compactor in enumerate(self._compactors)
+            for value in compactor
+        )
+        if not weighted:
+            return None
+        total = sum(weight for _, weight in weighted)
+        target = max(1, math.ceil(q * total))
+        seen = 0
+        for value, weight in weighted:
+            seen += weight
+            if seen >= target:
+                return value
+        return weighted[-1][0]
+
+
+class HyperLogLog:
+    """Distinct-count sketch after Flajolet et al. (2007).
+
+    Uses 2**precision one-byte registers; the default of 12 gives a standard
+    error of about 1.6% in 4 KiB.
+    """
+
+    def __init__(self, precision: int = 12):
+        """Initialize an empty sketch."""
+        self.precision = precision
+        self._registers = bytearray(1 << precision)
+
+    def add(self, value: str) -> None:
+        """Add one value."""
+        # A stable hash, so sketches built in different processes merge
+        digest = hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest()
+        hashed = int.from_bytes(digest, "big")
+        index = hashed >> (64 - self.precision)
+        rest = hashed & ((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - rest.bit_length() + 1
+        if rank > self._registers[index]:
+            self._registers[index] = rank
+
+    def merge(self, other: "HyperLogLog") -> None:
+        """Add every value counted by another sketch of the same precision."""
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLogs of different precision")
+        self._registers = bytearray(map(max, self._registers, other._registers))
+
+    def count(self) -> int:
+        """Return the estimated number of distinct values."""
+        m = len(self._registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -r for r in self._registers)
+        zeros = self._registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)  # linear counting for small sets
+        return int(round(estimate))
+
+
+def normalize_description(description: str) -> str:
+    """Return the form of a description used to tell merchants apart."""
+    return _WHITESPACE.sub(" ", description.casefold()).strip()
+
+
+@dataclass
+class _Cell:
+    """Sketches for one month and category."""
+
+    quantiles: KLLSketch = field(default_factory=KLLSketch)
+    distinct: HyperLogLog = field(default_factory=HyperLogLog)
+    stale: bool = False
+
+    def add(self, expense: Expense) -> None:
+        self.quantiles.update(to_cents(expense.amount))
+        self.distinct.add(normalize_description(expense.description))
+
+
+class StatsSketches:
+    """Quantile and distinct-count sketches per month and category.
+
+    Sketches are built on the first query rather than when the ledger loads,
+    and then kept up to date as expenses are added.
+
+    Args:
+        source: Returns every expense, to build the sketches from
+        loader: Returns the expenses of one category in the month starting
+            on a given day; used to rebuild cells made stale by removals
+    """
+
+    def __init__(
+        self,
+        source: Callable[[], Iterable[Expense]],
+        loader: Callable[[date, str], Iterable[Expense]],
+    ):
+        self._source = source
+        self._loader = loader
+        self._cells: Optional[Dict[Tuple[date, str], _Cell]] = None
+
+    def clear(self) -> None:
+        """Drop all sketches; they are rebuilt from the source when needed."""
+        self._cells = None
+
+    def estimated_size(self) -> int:
+        """Return an approximate in-memory size of the sketches in bytes."""
+        if self._cells is None:
+            return 0
+        return len(self._cells) * CELL_MEMORY_ESTIMATE
+
+    def add(self, expense: Expense) -> None:
+        """Account for a new expense."""
+        if self._cells is None:
+            return
+        key = (period_start("month", expense.date.date()), expense.category)
+        cell = self._cells.get(key)
+        if cell is None:
+            cell = self._cells[key] = _Cell()
+        if not cell.stale:
+            cell.add(expense)
+
+    def remove(self, expense: Expense) -> None:
+        """Forget an expense; its cell is rebuilt when next needed."""
+        if self._cells is None:
+            return
+        key = (period_start("month", expense.date.date()), expense.category)
+        cell = self._cells.get(key)
+        if cell is not None:
+            cell.stale = True
+
+    def _cell(self, key: Tuple[date, str]) -> _Cell:
+        """Return a cell, rebuilding it first if it is stale."""
+        cell = self._cells[key]
+        if cell.stale:
+            cell = _Cell()
+            for expense in self._loader(*key):
+                cell.add(expense)
+            self._cells[key] = cell
+        return cell
+
+    def cells(
+        self,
+        first_month: Optional[date] = None,
+        last_month: Optional[date] = None,
+        categories: Optional[Sequence[str]] = None,
+    ) -> Iterable[Tuple[date, str, KLLSketch, HyperLogLog]]:
+        """Yield (month, category, quantiles, distinct) for whole months.
+
+        Args:
+            first_month: First month to include, as its first day, or None
+            last_month: Last month to include, as its first day, or None
+            categories: Only include these categories, or None for all
+        """
+        if self._cells is None:
+            self._cells = {}
+            for expense in self._source():
+                self.add(expense)
+        for key in sorted(self._cells):
+            month, category = key
+            if first_month is not None and month < first_month:
+                continue
+            if last_month is not None and month > last_month:
+                continue
+            if categories is not None and category not in categories:
+                continue
+            cell = self._cell(key)
+            if cell.quantiles.count:
+                yield month, category, cell.quantiles, cell.distinct
+
+
+def exact_quantile(sorted_values: Sequence[int], q: float) -> Optional[int]:
+    """Return the smallest value whose rank is at least ``q * len(values)``."""
+    if not sorted_values:
+        return None
+    return sorted_values[max(1, math.ceil(q * len(sorted_values))) - 1]
@@ -0,0 +1,387 @@
+"""
+Module for collecting runtime metrics and rendering them in Prometheus text format.
+
+Counters and histograms are sharded per thread: each thread updates its own
+plain dictionaries without taking a lock, and the shards are only summed when
+the metrics are scraped. That keeps the cost on the request path to a dict
+lookup and an addition. When a thread exits, its shard is folded into a base
+shard, so servers that start a thread per request do not accumulate shards.
+"""
+import threading
+import time
+import weakref
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+LabelValues = Tuple[str, ...]
+
+# Latency buckets in seconds, from sub-millisecond to multi-second requests.
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+def _format_labels(names: Sequence[str], values: LabelValues, extra: str = "") -> str:
+    """Render a label set as ``{name="value",...}``."""
+    pairs = [
+        f'{name}="{_escape(value)}"' for name, value in zip(names, values)
+    ]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    """Escape a label value for the Prometheus text format."""
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    """Render a sample value, dropping the fraction for whole numbers."""
+    if value == int(value):
+        return str(int(value))
+    return repr(float(value))
+
+
+class _ShardOwner:
+    """Thread-local holder of a shard; collected when its thread exits."""
+
+    __slots__ = ("shard", "__weakref__")
+
+    def __init__(self, shard: dict):
+        self.shard = shard
+
+
+class _Metric:
+    """Base class for metrics that keep one shard of state per thread."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        # Samples of exited threads; always the first shard
+        self._base: dict = {}
+        self._shards: List[dict] = [self._base]
+        # Reentrant, as a finalizer may run while the lock is held
+        self._shards_lock = threading.RLock()
+
+    def _shard(self) -> dict:
+        """Return the calling thread's shard, registering it on first use."""
+        try:
+            return self._local.owner.shard
+        except AttributeError:
+            owner = _ShardOwner({})
+            with self._shards_lock:
+                self._shards.append(owner.shard)
+            weakref.finalize(owner, self._retire, owner.shard)
+            self._local.owner = owner
+            return owner.shard
+
+    def _retire(self, shard: dict) -> None:
+        """Fold the shard of an exited thread into the base shard."""
+        with self._shards_lock:
+            for labels, state in shard.items():
+                self._base[labels] = self._merge(self._base.get(labels), state)
+            self._shards = [s for s in self._shards if s is not shard]
+
+    def _merge(self, total, state):
+        """Return the combination of two shard entries; total may be None."""
+        raise NotImplementedError
+
+    def _snapshot(self) -> List[dict]:
+        """Return copies of all shards for rendering."""
+        with self._shards_lock:
+            return [dict(shard) for shard in self._shards]
+
+    def reset(self) -> None:
+        """Clear all recorded samples."""
+        with self._shards_lock:
+            for shard in self._shards:
+                shard.clear()
+
+    def samples(self) -> List[str]:
+        """Return the sample lines for this metric."""
+        raise NotImplementedError
+
+    def render(self) -> str:
+        """Render the metric including its HELP and TYPE lines."""
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """Monotonically increasing counter."""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1, labels: LabelValues = ()) -> None:
+        """Increment the counter for the given label values."""
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0) + amount
+
+    def _merge(self, total: Optional[float], amount: float) -> float:
+        """Add two partial totals."""
+        return (total or 0) + amount
+
+    def value(self, labels: LabelValues = ()) -> float:
+        """Return the current total for the given label values."""
+        return sum(shard.get(labels, 0) for shard in self._snapshot())
+
+    def totals(self) -> Dict[LabelValues, float]:
+        """Return the totals for every label set seen so far."""
+        totals: Dict[LabelValues, float] = {}
+        for shard in self._snapshot():
+            for labels, amount in shard.items():
+                totals[labels] = totals.get(labels, 0) + amount
+        return totals
+
+    def samples(self) -> List[str]:
+        """Return one sample line per label set."""
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} "
+            f"{_format_value(amount)}"
+            for labels, amount in sorted(self.totals().items())
+        ]
+
+
+class Histogram(_Metric):
+    """Histogram with fixed upper bounds, rendered as cumulative buckets."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, labels: LabelValues = ()) -> None:
+        """Record a single observation."""
+        shard = self._shard()
+        state = shard.get(labels)
+        if state is None:
+            # [per-bucket counts (+Inf last), sum, count]
+            state = shard[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        state[0][bisect_left(self.buckets, value)] += 1
+        state[1] += value
+        state[2] += 1
+
+    def _merge(self, total: Optional[list], state: list) -> list:
+        """Add bucket counts, sums and counts; returns a new entry."""
+        if total is None:
+            return [list(state[0]), state[1], state[2]]
+        return [
+            [a + b for a, b in zip(total[0], state[0])],
+            total[1] + state[1],
+            total[2] + state[2],
+        ]
+
+    @contextmanager
+    def time(self, labels: LabelValues = ()) -> Iterator[None]:
+        """Observe the wall-clock duration of the wrapped block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, labels)
+
+    def totals(self) -> Dict[LabelValues, Tuple[List[int], float, int]]:
+        """Return merged bucket counts, sum and count per label set."""
+        totals: Dict[LabelValues, Tuple[List[int], float, int]] = {}
+        for shard in self._snapshot():
+            for labels, (counts, total, count) in shard.items():
+                merged = totals.get(labels)
+                if merged is None:
+                    totals[labels] = (list(counts), total, count)
+                else:
+                    totals[labels] = (
+                        [a + b for a, b in zip(merged[0], counts)],
+                        merged[1] + total,
+                        merged[2] + count,
+                    )
+        return totals
+
+    def samples(self) -> List[str]:
+        """Return bucket, sum and count lines per label set."""
+        lines = []
+        for labels, (counts, total, count) in sorted(self.totals().items()):
+            cumulative = 0
+            bounds = [_format_value(bound) for bound in self.buckets] + ["+Inf"]
+            for bound, bucket_count in zip(bounds, counts):
+                cumulative += bucket_count
+                label_str = _format_labels(self.labelnames, labels, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{label_str} {cumulative}")
+            label_str = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_str} {_format_value(total)}")
+            lines.append(f"{self.name}_count{label_str} {count}")
+        return lines
+
+
+class Gauge(_Metric):
+    """Gauge whose value is read from a callback at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        function: Optional[Callable[[], float]] = None,
+    ):
+        super().__init__(name, documentation)
+        self._function = function
+
+    def set_function(self, function: Optional[Callable[[], float]]) -> None:
+        """Set the callback used to read the current value."""
+        self._function = function
+
+    def samples(self) -> List[str]:
+        """Return the current value, or nothing if no callback is set."""
+        if self._function is None:
+            return []
+        try:
+            value = self._function()
+        except Exception:
+            return []
+        return [f"{self.name} {_format_value(value)}"]
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        """Register a metric, returning the existing one if the name is taken."""
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> Counter:
+        """Create or fetch a counter."""
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        """Create or fetch a histogram."""
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge(
+        self,
+        name: str,
+        documentation: str,
+        function: Optional[Callable[[], float]] = None,
+    ) -> Gauge:
+        """Create or fetch a callback gauge."""
+        return self.register(Gauge(name, documentation, function))
+
+    def reset(self) -> None:
+        """Clear the samples of every registered metric."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            metric.reset()
+
+    def render(self) -> str:
+        """Render all metrics in Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+REQUEST_LATENCY = REGISTRY.histogram(
+    "expense_tracker_request_duration_seconds",
+    "Latency of HTTP requests by route.",
+    ("method", "route", "status"),
+)
+STORAGE_LOAD_SECONDS = REGISTRY.histogram(
+    "expense_tracker_storage_load_duration_seconds",
+    "Time spent loading expenses from storage.",
+    ("backend",),
+)
+STORAGE_SAVE_SECONDS = REGISTRY.histogram(
+    "expense_tracker_storage_save_duration_seconds",
+    "Time spent writing expenses to storage.",
+    ("backend",),
+)
+STORAGE_BYTES_WRITTEN = REGISTRY.counter(
+    "expense_tracker_storage_bytes_written_total",
+    "Bytes written to storage.",
+    ("backend",),
+)
+CACHE_REQUESTS = REGISTRY.counter(
+    "expense_tracker_cache_requests_total",
+    "Cache lookups by cache name and result.",
+    ("cache", "result"),
+)
+EXPENSE_ROWS = REGISTRY.gauge(
+    "expense_tracker_expenses",
+    "Number of expenses currently loaded.",
+)
+
+
+class _CacheHitRatio(Gauge):
+    """Gauge deriving per-cache hit ratios from the lookup counter."""
+
+    def samples(self) -> List[str]:
+        """Return one hit ratio sample per cache."""
+        hits: Dict[str, float] = {}
+        lookups: Dict[str, float] = {}
+        for (cache, result), amount in CACHE_REQUESTS.totals().items():
+            lookups[cache] = lookups.get(cache, 0) + amount
+            if result == "hit":
+                hits[cache] = hits.get(cache, 0) + amount
+        return [
+            f'{self.name}{{cache="{_escape(cache)}"}} '
+            f"{_format_value(hits.get(cache, 0) / total)}"
+            for cache, total in sorted(lookups.items())
+            if total
+        ]
+
+
+CACHE_HIT_RATIO = REGISTRY.register(
+    _CacheHitRatio(
+        "expense_tracker_cache_hit_ratio",
+        "Fraction of cache lookups that were hits.",
+    )
+)
+
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    """Record a cache hit or miss for the named cache."""
+    CACHE_REQUESTS.inc(labels=(cache, "hit" if hit else "miss"))
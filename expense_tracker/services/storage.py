@@ -1,10 +1,90 @@
 """
 Module for handling expense data storage operations.
+
+Storage engines are registered by URL scheme and opened with
+``open_storage(url)``:
+
+- ``json://path/expenses.json``: one JSON array (the default)
+- ``jsonl://path/expenses.jsonl``: an append-only log of JSON lines
+- ``mmap://path/expenses.jsonl``: the same log, read through a memory map
+- ``sqlite://path/expenses.db``: an SQLite database
+- ``memory://name``: an in-process store, for tests and throwaway ledgers
+
+Each engine declares its ``Capabilities`` so managers can push single-row
+writes and date range reads down to the engines that support them instead
+of rewriting or reading the whole ledger.
 """
 import json
+import mmap
 import os
-from typing import List, Protocol
+import sqlite3
+import textwrap
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import (
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Protocol,
+    Sequence,
+    Tuple,
+    Type,
+)
+
 from expense_tracker.models.expense import Expense
+from expense_tracker.services.metrics import (
+    STORAGE_BYTES_WRITTEN,
+    STORAGE_LOAD_SECONDS,
+    STORAGE_SAVE_SECONDS,
+)
+
+try:
+    import fcntl
+except ImportError:  # Windows: logs are only locked within the process
+    fcntl = None
+
+# Environment variable selecting the storage URL for the CLI and desktop app
+STORAGE_URL_ENV_VAR = "EXPENSE_TRACKER_STORAGE_URL"
+
+
+class VersionMismatch(Exception):
+    """Raised by a conditional write when the stored row is at another version.
+
+    ``actual`` is None when the row is no longer stored at all.
+    """
+
+    def __init__(self, expense_id: str, expected: int, actual: Optional[int]):
+        super().__init__(expense_id, expected, actual)
+        self.expense_id = expense_id
+        self.expected = expected
+        self.actual = actual
+
+    def __str__(self) -> str:
+        """Describe the mismatch from the stored fields."""
+        if self.actual is None:
+            return f"Stored expense {self.expense_id} was deleted"
+        return (
+            f"Stored expense {self.expense_id} is at version {self.actual}, "
+            f"not {self.expected}"
+        )
+
+
+def _check_version(
+    expense_id: str, expected_version: Optional[int], actual: Optional[int]
+) -> None:
+    """Raise VersionMismatch unless a row is at the expected version.
+
+    Args:
+        expense_id: Id of the row being written
+        expected_version: Version the write is conditional on, or None
+        actual: Version of the stored row, or None if there is none
+    """
+    if expected_version is not None and actual != expected_version:
+        raise VersionMismatch(expense_id, expected_version, actual)
+
 
 class StorageInterface(Protocol):
     """Protocol defining the interface for storage implementations."""
@@ -16,23 +96,783 @@ class StorageInterface(Protocol):
         """Load expenses from storage."""
         ...
 
-class JSONStorage:
+
+@dataclass(frozen=True)
+class Capabilities:
+    """Operations an engine performs without rewriting the whole ledger."""
+
+    append: bool = False  # append_expenses()
+    point_ops: bool = False  # update_expense() and delete_expense()
+    range_scans: bool = False  # load_range() reads only the requested dates
+
+
+@dataclass(frozen=True)
+class Write:
+    """One change in a write_batch(): an append, an update or a delete.
+
+    Updates and deletes are conditional on the stored row being at
+    expected_version, unless it is None.
+    """
+
+    appended: Sequence[Expense] = ()
+    updated: Optional[Expense] = None
+    deleted: Optional[str] = None  # id of the expense to delete
+    expected_version: Optional[int] = None
+
+
+class StorageEngine:
+    """Base class for registered storage engines.
+
+    Engines must implement save_expenses() and load_expenses(). The optional
+    operations return False when they did not store the change, in which
+    case the caller falls back to a full save.
+    """
+
+    scheme = ""
+    capabilities = Capabilities()
+    filepath: Optional[str] = None
+
+    def create(self) -> None:
+        """Create empty storage if none exists yet."""
+
+    def save_expenses(self, expenses: List[Expense]) -> None:
+        """Replace the stored ledger."""
+        raise NotImplementedError
+
+    def load_expenses(self) -> List[Expense]:
+        """Load the whole ledger in insertion order."""
+        raise NotImplementedError
+
+    def append_expense(self, expense: Expense) -> bool:
+        """Append one expense; see append_expenses()."""
+        return self.append_expenses([expense])
+
+    def append_expenses(self, expenses: List[Expense]) -> bool:
+        """Append expenses without rewriting the ledger."""
+        return False
+
+    def update_expense(
+        self, expense: Expense, expected_version: Optional[int] = None
+    ) -> bool:
+        """Replace the stored expense with the same id.
+
+        Args:
+            expense: The new version of the expense
+            expected_version: Version the stored row must be at, or None to
+                replace it unconditionally
+
+        Returns:
+            False if the engine did not store the change, or if there is no
+            such row and expected_version is None.
+
+        Raises:
+            VersionMismatch: If the stored row is at another version, or
+                missing while expected_version is set; engines that cannot
+                check leave this to the caller.
+        """
+        return False
+
+    def delete_expense(
+        self, expense_id: str, expected_version: Optional[int] = None
+    ) -> bool:
+        """Delete the stored expense with this id; see update_expense()."""
+        return False
+
+    def write_batch(self, writes: List[Write]) -> bool:
+        """Store several changes in one transaction, all or nothing.
+
+        Returns:
+            True if every write was stored, False if none was (the caller
+            should do a full save).
+
+        Raises:
+            VersionMismatch: If a conditional write found its row at another
+                version; nothing from the batch was stored.
+        """
+        return False
+
+    def load_range(
+        self, start: Optional[datetime] = None, end: Optional[datetime] = None
+    ) -> List[Expense]:
+        """Load expenses with start <= date < end, in date order."""
+        return sorted(
+            (
+                expense
+                for expense in self.load_expenses()
+                if (start is None or expense.date >= start)
+                and (end is None or expense.date < end)
+            ),
+            key=lambda expense: expense.date,
+        )
+
+    def month_counts(self) -> Dict[Tuple[int, int], int]:
+        """Return the number of expenses stored per (year, month).
+
+        Engines with range scans answer this from their date index, without
+        reading the rows.
+        """
+        counts: Dict[Tuple[int, int], int] = {}
+        for expense in self.load_expenses():
+            month = (expense.date.year, expense.date.month)
+            counts[month] = counts.get(month, 0) + 1
+        return counts
+
+    def close(self) -> None:
+        """Release any resources held by the engine."""
+
+
+ENGINES: Dict[str, Type[StorageEngine]] = {}
+
+# File name each file-backed engine uses inside a ledger directory
+DEFAULT_FILENAMES = {
+    "json": "expenses.json",
+    "jsonl": "expenses.jsonl",
+    "mmap": "expenses.jsonl",
+    "sqlite": "expenses.db",
+}
+
+
+def register_engine(
+    scheme: str,
+) -> Callable[[Type[StorageEngine]], Type[StorageEngine]]:
+    """Class decorator registering a storage engine under a URL scheme."""
+
+    def register(cls: Type[StorageEngine]) -> Type[StorageEngine]:
+        cls.scheme = scheme
+        ENGINES[scheme] = cls
+        return cls
+
+    return register
+
+
+def open_storage(url: str) -> StorageEngine:
+    """Open the storage engine described by a URL such as ``sqlite://ledger.db``.
+
+    Raises:
+        ValueError: If the URL is malformed or names an unknown engine.
+    """
+    scheme, separator, location = url.partition("://")
+    if not separator:
+        raise ValueError(f"Storage URL must look like scheme://location: {url!r}")
+    engine = ENGINES.get(scheme)
+    if engine is None:
+        available = ", ".join(sorted(ENGINES))
+        raise ValueError(f"Unknown storage engine {scheme!r}; use one of {available}")
+    return engine(os.path.expanduser(location))
+
+
+def storage_url(scheme: str, directory: str) -> str:
+    """Return the URL of a ledger kept in a directory by the given engine."""
+    if scheme not in ENGINES:
+        raise ValueError(f"Unknown storage engine {scheme!r}")
+    if scheme not in DEFAULT_FILENAMES:
+        return f"{scheme}://{directory}"
+    return f"{scheme}://{Path(directory) / DEFAULT_FILENAMES[scheme]}"
+
+
+@register_engine("json")
+class JSONStorage(StorageEngine):
     """Implementation of expense storage using JSON files."""
-    
+
+    capabilities = Capabilities(append=True)
+
     def __init__(self, filepath: str = "expenses.json"):
         self.filepath = filepath
 
+    def create(self) -> None:
+        """Write an empty array if the file does not exist."""
+        if not os.path.exists(self.filepath):
+            with open(self.filepath, 'w', encoding='utf-8') as f:
+                f.write('[]')
+
     def save_expenses(self, expenses: List[Expense]) -> None:
         """Save expenses to a JSON file."""
-        data = [expense.to_dict() for expense in expenses]
-        with open(self.filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2)
+        with STORAGE_SAVE_SECONDS.time(("json",)):
+            data = [expense.to_dict() for expense in expenses]
+            payload = json.dumps(data, indent=2).encode('utf-8')
+            with open(self.filepath, 'wb') as f:
+                f.write(payload)
+        STORAGE_BYTES_WRITTEN.inc(len(payload), ("json",))
 
     def load_expenses(self) -> List[Expense]:
         """Load expenses from a JSON file."""
         if not os.path.exists(self.filepath):
             return []
-        
-        with open(self.filepath, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            return [Expense.from_dict(item) for item in data]
+
+        with STORAGE_LOAD_SECONDS.time(("json",)):
+            with open(self.filepath, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+                return [Expense.from_dict(item) for item in data]
+
+    def append_expenses(self, expenses: List[Expense]) -> bool:
+        """Append expenses to the JSON array without reading the file.
+
+        The closing bracket is located by scanning backwards from the end of
+        the file and the new records are written in its place, producing the
+        same layout as save_expenses().
+
+        Returns:
+            True if the records were appended, False if the file is missing
+            or does not end in a JSON array (the caller should do a full save).
+        """
+        if not expenses:
+            return True
+        records = ',\n'.join(
+            textwrap.indent(json.dumps(expense.to_dict(), indent=2), "  ")
+            for expense in expenses
+        )
+        with STORAGE_SAVE_SECONDS.time(("json",)):
+            try:
+                f = open(self.filepath, 'r+b')
+            except FileNotFoundError:
+                return False
+            with f:
+                tail = _read_tail(f)
+                stripped = tail.rstrip()
+                if not stripped.endswith(b']'):
+                    return False
+                before = stripped[:-1].rstrip()
+                if not before:
+                    return False  # tail too short to tell; let caller save
+                separator = b'\n' if before.endswith(b'[') else b',\n'
+                payload = separator + records.encode('utf-8') + b'\n]'
+                f.seek(len(before) - len(tail), os.SEEK_END)
+                f.write(payload)
+                f.truncate()
+        STORAGE_BYTES_WRITTEN.inc(len(payload), ("json",))
+        return True
+
+
+def _read_tail(f, size: int = 4096) -> bytes:
+    """Return up to the last ``size`` bytes of an open binary file."""
+    f.seek(0, os.SEEK_END)
+    length = f.tell()
+    f.seek(max(0, length - size))
+    return f.read()
+
+
+@register_engine("jsonl")
+class JSONLinesStorage(StorageEngine):
+    """Append-only log of JSON lines.
+
+    Each line is either an expense record or ``{"deleted": id}``. A record
+    whose id was seen before replaces the earlier one in place, so adds,
+    updates and deletes are all single-line appends. save_expenses()
+    compacts the log to one line per expense.
+    """
+
+    capabilities = Capabilities(append=True, point_ops=True)
+
+    def __init__(self, filepath: str = "expenses.jsonl"):
+        self.filepath = filepath
+        self._lock = threading.Lock()
+        # Stored version of every id, as of the first _indexed[1] bytes of
+        # the log file with inode _indexed[0]
+        self._versions: Dict[str, int] = {}
+        self._indexed = (0, 0)
+
+    def create(self) -> None:
+        """Create an empty log if the file does not exist."""
+        if not os.path.exists(self.filepath):
+            open(self.filepath, 'a', encoding='utf-8').close()
+
+    def save_expenses(self, expenses: List[Expense]) -> None:
+        """Rewrite the log with one line per expense."""
+        with self._lock, STORAGE_SAVE_SECONDS.time((self.scheme,)):
+            payload = ''.join(
+                json.dumps(expense.to_dict()) + '\n' for expense in expenses
+            ).encode('utf-8')
+            temporary = f"{self.filepath}.tmp"
+            with open(temporary, 'wb') as f:
+                f.write(payload)
+            os.replace(temporary, self.filepath)
+        STORAGE_BYTES_WRITTEN.inc(len(payload), (self.scheme,))
+
+    def _lines(self):
+        """Yield the raw lines of the log."""
+        with open(self.filepath, 'rb') as f:
+            yield from f
+
+    def load_expenses(self) -> List[Expense]:
+        """Replay the log into the current list of expenses."""
+        if not os.path.exists(self.filepath):
+            return []
+        with STORAGE_LOAD_SECONDS.time((self.scheme,)):
+            records: Dict[object, dict] = {}
+            anonymous = 0
+            for line in self._lines():
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if 'deleted' in record:
+                    records.pop(record['deleted'], None)
+                elif record.get('id') is None:
+                    records[('anonymous', anonymous)] = record
+                    anonymous += 1
+                else:
+                    records[record['id']] = record
+            return [Expense.from_dict(record) for record in records.values()]
+
+    def _open_locked(self):
+        """Open the log for appending, locked against other processes.
+
+        The lock is released when the file is closed. Loops in case another
+        process replaced the log while this one waited for the lock.
+        """
+        while True:
+            f = open(self.filepath, 'a+b')
+            if fcntl is None:
+                return f
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                if os.stat(self.filepath).st_ino == os.fstat(f.fileno()).st_ino:
+                    return f
+            except FileNotFoundError:
+                pass
+            f.close()
+
+    def _catch_up(self, f) -> None:
+        """Bring the version map up to date with the open log."""
+        inode = os.fstat(f.fileno()).st_ino
+        indexed_inode, offset = self._indexed
+        f.seek(0, os.SEEK_END)
+        if inode != indexed_inode or f.tell() < offset:
+            self._versions = {}
+            offset = 0
+        f.seek(offset)
+        data = f.read()
+        for line in data.splitlines():
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if 'deleted' in record:
+                self._versions.pop(record['deleted'], None)
+            elif record.get('id') is not None:
+                self._versions[record['id']] = record.get('version', 1)
+        self._indexed = (inode, offset + len(data))
+
+    def write_batch(self, writes: List[Write]) -> bool:
+        """Append every change as the lines of one write, then fsync.
+
+        Conditional updates and deletes are checked against the versions in
+        the log first, with the log locked so no other writer can slip in
+        between the check and the append. Batches of plain appends skip
+        reading the log.
+        """
+        checked = any(
+            write.updated is not None or write.deleted is not None
+            for write in writes
+        )
+        with self._lock, self._open_locked() as f:
+            if checked:
+                self._catch_up(f)
+            # Versions changed by earlier writes in the batch; None if deleted
+            pending: Dict[str, Optional[int]] = {}
+            records: List[dict] = []
+            for write in writes:
+                if write.updated is not None:
+                    expense_id = write.updated.id
+                elif write.deleted is not None:
+                    expense_id = write.deleted
+                else:
+                    for expense in write.appended:
+                        records.append(expense.to_dict())
+                        if expense.id is not None:
+                            pending[expense.id] = expense.version
+                    continue
+                if expense_id in pending:
+                    actual = pending[expense_id]
+                else:
+                    actual = self._versions.get(expense_id)
+                if write.expected_version is not None:
+                    _check_version(expense_id, write.expected_version, actual)
+                elif actual is None:
+                    return False
+                if write.updated is not None:
+                    records.append(write.updated.to_dict())
+                    pending[expense_id] = write.updated.version
+                else:
+                    records.append({'deleted': expense_id})
+                    pending[expense_id] = None
+            payload = ''.join(json.dumps(record) + '\n' for record in records)
+            payload = payload.encode('utf-8')
+            with STORAGE_SAVE_SECONDS.time((self.scheme,)):
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            if checked:
+                for expense_id, version in pending.items():
+                    if version is None:
+                        self._versions.pop(expense_id, None)
+                    else:
+                        self._versions[expense_id] = version
+                inode, offset = self._indexed
+                self._indexed = (inode, offset + len(payload))
+        STORAGE_BYTES_WRITTEN.inc(len(payload), (self.scheme,))
+        return True
+
+    def append_expenses(self, expenses: List[Expense]) -> bool:
+        """Append one line per expense."""
+        return self.write_batch([Write(appended=expenses)])
+
+    def update_expense(
+        self, expense: Expense, expected_version: Optional[int] = None
+    ) -> bool:
+        """Append the new version of an expense."""
+        return self.write_batch(
+            [Write(updated=expense, expected_version=expected_version)]
+        )
+
+    def delete_expense(
+        self, expense_id: str, expected_version: Optional[int] = None
+    ) -> bool:
+        """Append a deletion marker."""
+        return self.write_batch(
+            [Write(deleted=expense_id, expected_version=expected_version)]
+        )
+
+
+@register_engine("mmap")
+class MmapStorage(JSONLinesStorage):
+    """JSON lines log read through a memory map.
+
+    Uses the same file format as ``jsonl://``. Loading maps the file and
+    splits lines in place instead of copying it through Python's buffered
+    reader, which helps large, read-mostly ledgers.
+    """
+
+    def _lines(self):
+        """Yield the lines of the log from a memory map."""
+        with open(self.filepath, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                start = 0
+                while True:
+                    end = mapped.find(b'\n', start)
+                    if end == -1:
+                        if start < len(mapped):
+                            yield mapped[start:]
+                        return
+                    yield mapped[start:end]
+                    start = end + 1
+
+
+@register_engine("sqlite")
+class SQLiteStorage(StorageEngine):
+    """SQLite database with a date index.
+
+    Amounts are stored as text so they round-trip exactly; dates as ISO
+    strings, which sort chronologically.
+    """
+
+    capabilities = Capabilities(append=True, point_ops=True, range_scans=True)
+
+    def __init__(self, filepath: str = "expenses.db"):
+        self.filepath = filepath
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self._connection = sqlite3.connect(self.filepath, check_same_thread=False)
+            self._connection.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS expenses (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    id TEXT,
+                    date TEXT NOT NULL,
+                    amount TEXT NOT NULL,
+                    category TEXT NOT NULL,
+                    description TEXT NOT NULL,
+                    version INTEGER NOT NULL DEFAULT 1
+                );
+                CREATE INDEX IF NOT EXISTS expenses_id ON expenses (id);
+                CREATE INDEX IF NOT EXISTS expenses_date ON expenses (date);
+                """
+            )
+            columns = {
+                row[1]
+                for row in self._connection.execute("PRAGMA table_info(expenses)")
+            }
+            if "version" not in columns:  # databases created before versions
+                self._connection.execute(
+                    "ALTER TABLE expenses "
+                    "ADD COLUMN version INTEGER NOT NULL DEFAULT 1"
+                )
+        return self._connection
+
+    @staticmethod
+    def _row(expense: Expense) -> tuple:
+        return (
+            expense.id,
+            expense.date.isoformat(),
+            str(expense.amount),
+            expense.category,
+            expense.description,
+            expense.version,
+        )
+
+    @staticmethod
+    def _expenses(rows) -> List[Expense]:
+        return [
+            Expense.from_dict(
+                {
+                    'id': expense_id,
+                    'date': date,
+                    'amount': amount,
+                    'category': category,
+                    'description': description,
+                    'version': version,
+                }
+            )
+            for expense_id, date, amount, category, description, version in rows
+        ]
+
+    _COLUMNS = "id, date, amount, category, description, version"
+
+    def create(self) -> None:
+        """Create the database and table if needed."""
+        with self._lock:
+            self._connect()
+
+    def save_expenses(self, expenses: List[Expense]) -> None:
+        """Replace every row in one transaction."""
+        with self._lock, STORAGE_SAVE_SECONDS.time(("sqlite",)):
+            connection = self._connect()
+            with connection:
+                connection.execute("DELETE FROM expenses")
+                connection.executemany(
+                    f"INSERT INTO expenses ({self._COLUMNS}) VALUES (?, ?, ?, ?, ?, ?)",
+                    [self._row(expense) for expense in expenses],
+                )
+
+    def load_expenses(self) -> List[Expense]:
+        """Load every row in insertion order."""
+        with self._lock, STORAGE_LOAD_SECONDS.time(("sqlite",)):
+            rows = self._connect().execute(
+                f"SELECT {self._COLUMNS} FROM expenses ORDER BY seq"
+            ).fetchall()
+        return self._expenses(rows)
+
+    def append_expenses(self, expenses: List[Expense]) -> bool:
+        """Insert new rows."""
+        with self._lock, STORAGE_SAVE_SECONDS.time(("sqlite",)):
+            connection = self._connect()
+            with connection:
+                connection.executemany(
+                    f"INSERT INTO expenses ({self._COLUMNS}) VALUES (?, ?, ?, ?, ?, ?)",
+                    [self._row(expense) for expense in expenses],
+                )
+        return True
+
+    def _explain_miss(
+        self,
+        connection: sqlite3.Connection,
+        expense_id: str,
+        expected_version: Optional[int],
+    ) -> None:
+        """Explain a conditional write that matched no row.
+
+        Raises:
+            VersionMismatch: If the row is at another version or was deleted.
+        """
+        if expected_version is None:
+            return
+        row = connection.execute(
+            "SELECT version FROM expenses WHERE id = ?", (expense_id,)
+        ).fetchone()
+        _check_version(
+            expense_id, expected_version, row[0] if row is not None else None
+        )
+
+    def _apply(self, connection: sqlite3.Connection, write: Write) -> bool:
+        """Run one write inside the caller's transaction.
+
+        Returns:
+            False if an unconditional update or delete matched no row.
+
+        Raises:
+            VersionMismatch: If the row is at another version or was deleted.
+        """
+        if write.updated is not None:
+            expense_id = write.updated.id
+            query = (
+                "UPDATE expenses SET date = ?, amount = ?, category = ?, "
+                "description = ?, version = ? WHERE id = ?"
+            )
+            params = self._row(write.updated)[1:] + (expense_id,)
+        elif write.deleted is not None:
+            expense_id = write.deleted
+            query = "DELETE FROM expenses WHERE id = ?"
+            params = (expense_id,)
+        else:
+            connection.executemany(
+                f"INSERT INTO expenses ({self._COLUMNS}) VALUES (?, ?, ?, ?, ?, ?)",
+                [self._row(expense) for expense in write.appended],
+            )
+            return True
+        if write.expected_version is not None:
+            query += " AND version = ?"
+            params += (write.expected_version,)
+        if connection.execute(query, params).rowcount:
+            return True
+        self._explain_miss(connection, expense_id, write.expected_version)
+        return False
+
+    def write_batch(self, writes: List[Write]) -> bool:
+        """Run every write in one transaction, rolling back if any fails."""
+        with self._lock, STORAGE_SAVE_SECONDS.time(("sqlite",)):
+            connection = self._connect()
+            try:
+                stored = all(self._apply(connection, write) for write in writes)
+            except BaseException:
+                connection.rollback()
+                raise
+            if stored:
+                connection.commit()
+            else:
+                connection.rollback()
+        return stored
+
+    def update_expense(
+        self, expense: Expense, expected_version: Optional[int] = None
+    ) -> bool:
+        """Update the row with the expense's id, optionally only at a version."""
+        return self.write_batch(
+            [Write(updated=expense, expected_version=expected_version)]
+        )
+
+    def delete_expense(
+        self, expense_id: str, expected_version: Optional[int] = None
+    ) -> bool:
+        """Delete the row with this id, optionally only at a version."""
+        return self.write_batch(
+            [Write(deleted=expense_id, expected_version=expected_version)]
+        )
+
+    def load_range(
+        self, start: Optional[datetime] = None, end: Optional[datetime] = None
+    ) -> List[Expense]:
+        """Load expenses with start <= date < end using the date index."""
+        query = f"SELECT {self._COLUMNS} FROM expenses WHERE 1 = 1"
+        params: list = []
+        if start is not None:
+            query += " AND date >= ?"
+            params.append(start.isoformat())
+        if end is not None:
+            query += " AND date < ?"
+            params.append(end.isoformat())
+        query += " ORDER BY date, seq"
+        with self._lock, STORAGE_LOAD_SECONDS.time(("sqlite",)):
+            rows = self._connect().execute(query, params).fetchall()
+        return self._expenses(rows)
+
+    def month_counts(self) -> Dict[Tuple[int, int], int]:
+        """Count rows per month from the date index."""
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT substr(date, 1, 7), COUNT(*) FROM expenses GROUP BY 1"
+            ).fetchall()
+        return {(int(month[:4]), int(month[5:])): count for month, count in rows}
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+# Named in-process stores shared by every memory:// engine with that name
+_MEMORY_STORES: Dict[str, List[dict]] = {}
+_MEMORY_LOCK = threading.Lock()
+
+
+@register_engine("memory")
+class MemoryStorage(StorageEngine):
+    """In-process storage, shared by name for the lifetime of the process.
+
+    Records are stored as dicts, so callers never share Expense objects with
+    the store.
+    """
+
+    capabilities = Capabilities(append=True, point_ops=True, range_scans=True)
+
+    def __init__(self, name: str = ""):
+        self.name = name
+        with _MEMORY_LOCK:
+            self._records = _MEMORY_STORES.setdefault(name, [])
+
+    def save_expenses(self, expenses: List[Expense]) -> None:
+        """Replace the stored records."""
+        with _MEMORY_LOCK:
+            self._records[:] = [expense.to_dict() for expense in expenses]
+
+    def load_expenses(self) -> List[Expense]:
+        """Return copies of the stored records."""
+        with _MEMORY_LOCK:
+            return [Expense.from_dict(record) for record in self._records]
+
+    def append_expenses(self, expenses: List[Expense]) -> bool:
+        """Store new records."""
+        with _MEMORY_LOCK:
+            self._records.extend(expense.to_dict() for expense in expenses)
+        return True
+
+    @staticmethod
+    def _find(
+        records: List[dict], expense_id: str, expected_version: Optional[int]
+    ) -> int:
+        """Return the position of a record, or -1.
+
+        Raises:
+            VersionMismatch: If the record is not at expected_version, or is
+                missing when a version is expected.
+        """
+        for i, record in enumerate(records):
+            if record['id'] == expense_id:
+                _check_version(
+                    expense_id, expected_version, record.get('version', 1)
+                )
+                return i
+        _check_version(expense_id, expected_version, None)
+        return -1
+
+    def write_batch(self, writes: List[Write]) -> bool:
+        """Apply every write to a copy of the records, then swap it in."""
+        with _MEMORY_LOCK:
+            records = list(self._records)
+            for write in writes:
+                if write.updated is not None:
+                    i = self._find(
+                        records, write.updated.id, write.expected_version
+                    )
+                    if i < 0:
+                        return False
+                    records[i] = write.updated.to_dict()
+                elif write.deleted is not None:
+                    i = self._find(records, write.deleted, write.expected_version)
+                    if i < 0:
+                        return False
+                    del records[i]
+                else:
+                    records.extend(expense.to_dict() for expense in write.appended)
+            self._records[:] = records
+        return True
+
+    def update_expense(
+        self, expense: Expense, expected_version: Optional[int] = None
+    ) -> bool:
+        """Replace the record with the expense's id."""
+        return self.write_batch(
+            [Write(updated=expense, expected_version=expected_version)]
+        )
+
+    def delete_expense(
+        self, expense_id: str, expected_version: Optional[int] = None
+    ) -> bool:
+        """Remove the record with this id."""
+        return self.write_batch(
+            [Write(deleted=expense_id, expected_version=expected_version)]
+        )
@@ -1,6 +1,28 @@
-"""UI package for the expense tracker application."""
+"""UI package for the expense tracker application.
 
-from expense_tracker.ui.expense_view import ExpenseView
-from expense_tracker.ui.widgets import ExpenseChart, ExpenseForm, ExpenseList
+The widgets pull in Tk and matplotlib, so they are only imported when one of
+the exported names is first accessed.
+"""
+from importlib import import_module
 
-__all__ = ["ExpenseView", "ExpenseForm", "ExpenseList", "ExpenseChart"]
+__all__ = [
+    "ExpenseView",
+    "ExpenseForm",
+    "ExpenseList",
+    "ExpenseChart",
+    "BackgroundWorker",
+]
+
+_EXPORTS = {
+    "ExpenseView": "expense_tracker.ui.expense_view",
+    "ExpenseForm": "expense_tracker.ui.widgets",
+    "ExpenseList": "expense_tracker.ui.widgets",
+    "ExpenseChart": "expense_tracker.ui.widgets",
+    "BackgroundWorker": "expense_tracker.ui.worker",
+}
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(import_module(_EXPORTS[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,8 +1,9 @@
 """Main view class for the expense tracker UI, coordinating all components."""
 import tkinter as tk
 from decimal import Decimal
-from typing import Callable, List
+from typing import Callable, Dict, Iterable, List, Mapping, Optional
 
+from expense_tracker.models.changes import ChangeEvent, ChangeType
 from expense_tracker.models.expense import Expense
 from expense_tracker.ui.widgets import ExpenseChart, ExpenseForm, ExpenseList
 
@@ -26,6 +27,8 @@ class ExpenseView:
         self.root = root
         self.root.title("Expense Tracker")
         self.root.geometry("800x600")
+        self._expenses: Dict[str, Expense] = {}
+        self._totals: Dict[str, Decimal] = {}
 
         # Create main container with padding
         self.main_frame = tk.Frame(root, padx=10, pady=10)
@@ -53,8 +56,8 @@ class ExpenseView:
         self.expense_form = ExpenseForm(left_panel, on_add_expense)
         self.expense_form.pack(fill="x", padx=5, pady=5)
 
-        # Expense list
-        self.expense_list = ExpenseList(left_panel, on_delete_expense)
+        # Expense list, materializing only the rows around the visible window
+        self.expense_list = ExpenseList(left_panel, on_delete_expense, virtual=True)
         self.expense_list.pack(fill="both", expand=True, padx=5, pady=5)
 
         # Right panel: Chart
@@ -65,11 +68,80 @@ class ExpenseView:
         self.expense_chart = ExpenseChart(right_panel)
         self.expense_chart.pack(fill="both", expand=True, padx=5, pady=5)
 
-    def update_expenses(self, expenses: List[Expense]):
+        # Status line showing whether background work is in progress
+        self.status_var = tk.StringVar(value="Ready")
+        self.status_label = tk.Label(
+            self.root, textvariable=self.status_var, anchor="w", padx=10
+        )
+        self.status_label.pack(side="bottom", fill="x", before=self.main_frame)
+
+    def update_expenses(
+        self,
+        expenses: List[Expense],
+        category_totals: Optional[Mapping[str, Decimal]] = None,
+    ):
         """Update all UI components with new expense data.
 
         Args:
             expenses: List of expenses to display
+            category_totals: Totals by category maintained by the manager;
+                when omitted the chart sums the expenses itself
         """
+        self._expenses = {expense.id: expense for expense in expenses}
         self.expense_list.update_expenses(expenses)
-        self.expense_chart.update_chart(expenses)
+        if category_totals is None:
+            self._totals = {}
+            for expense in self._expenses.values():
+                self._add_to_totals(expense, 1)
+            self.expense_chart.update_chart(expenses)
+        else:
+            self._totals = dict(category_totals)
+            self.expense_chart.update_totals(category_totals)
+
+    def apply_changes(self, events: Iterable[ChangeEvent]) -> bool:
+        """Update the UI from change-feed events instead of a full snapshot.
+
+        Args:
+            events: Events from the manager's change feed, in order
+
+        Returns:
+            False if an event requires a full update_expenses() instead
+            (the ledger was reloaded); nothing is changed in that case.
+        """
+        events = list(events)
+        if any(event.type is ChangeType.RELOADED for event in events):
+            return False
+        for event in events:
+            if event.type is ChangeType.DELETED:
+                self._expenses.pop(event.expense.id, None)
+                self._add_to_totals(event.expense, -1)
+            else:
+                if event.previous is not None:
+                    self._add_to_totals(event.previous, -1)
+                self._expenses[event.expense.id] = event.expense
+                self._add_to_totals(event.expense, 1)
+        if events:
+            self.expense_list.update_expenses(list(self._expenses.values()))
+            self.expense_chart.update_totals(self._totals)
+        return True
+
+    def _add_to_totals(self, expense: Expense, sign: int):
+        """Add or subtract an expense from the chart's category totals."""
+        total = self._totals.get(expense.category, Decimal("0")) + sign * expense.amount
+        if total:
+            self._totals[expense.category] = total
+        else:
+            self._totals.pop(expense.category, None)
+
+    def set_pending(self, count: int):
+        """Show how many background operations are still running.
+
+        Args:
+            count: Number of unfinished operations
+        """
+        if count:
+            self.status_var.set(f"Saving... ({count} pending)")
+            self.root.configure(cursor="watch")
+        else:
+            self.status_var.set("Ready")
+            self.root.configure(cursor="")
@@ -1,13 +1,12 @@
 """Module containing reusable GUI widgets for the expense tracker application."""
+import math
 import tkinter as tk
 from decimal import Decimal, InvalidOperation
 from tkinter import messagebox, ttk
-from typing import Callable, Dict, List
-
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from typing import Callable, Dict, Hashable, List, Mapping, Optional, Tuple
 
 from expense_tracker.models.expense import Expense
+from expense_tracker.models.search import SearchIndex
 
 
 class ExpenseForm(ttk.Frame):
@@ -87,25 +86,59 @@ class ExpenseForm(ttk.Frame):
 
 
 class ExpenseList(ttk.Frame):
-    """Widget for displaying and managing the list of expenses."""
+    """Widget for displaying and managing the list of expenses.
+
+    Updates are applied as a diff against the rows already shown: Treeview
+    items are keyed by expense id, so only added, removed, changed or moved
+    rows cost any Tk calls. In virtual mode only the visible rows plus
+    ``buffer`` rows either side exist as items, and scrolling pages rows in
+    and out.
+    """
 
     def __init__(
         self,
         parent: tk.Widget,
         on_delete_expense: Callable[[str], None],
+        virtual: bool = False,
+        buffer: int = 50,
     ):
         """Initialize the expense list widget.
 
         Args:
             parent: Parent widget
             on_delete_expense: Callback for deleting an expense
+            virtual: Materialize only the rows around the visible window
+            buffer: Rows kept materialized above and below the window in
+                virtual mode
         """
         super().__init__(parent)
         self._on_delete_expense = on_delete_expense
+        self.virtual = virtual
+        self.buffer = buffer
+        self._expenses: List[Expense] = []
+        # Descriptions currently in the search index, by expense id
+        self._indexed: Dict[Hashable, str] = {}
+        self._search_index = SearchIndex()
+        # Rows matching the search box, and the items currently in the tree
+        self._filtered: List[Expense] = []
+        self._order: List[str] = []
+        self._values: Dict[str, Tuple[str, ...]] = {}
+        # Virtual mode: first visible row and first materialized row
+        self._top = 0
+        self._window_start = 0
         self._setup_ui()
 
     def _setup_ui(self):
         """Set up the list UI components."""
+        # Search box, filtering as the user types
+        search_frame = ttk.Frame(self)
+        search_frame.pack(side="top", fill="x", pady=(0, 5))
+        ttk.Label(search_frame, text="Search:").pack(side="left", padx=(0, 5))
+        self.search_var = tk.StringVar()
+        self.search_entry = ttk.Entry(search_frame, textvariable=self.search_var)
+        self.search_entry.pack(side="left", fill="x", expand=True)
+        self.search_var.trace_add("write", lambda *args: self._on_search())
+
         columns = ("amount", "category", "description", "date")
         self.tree = ttk.Treeview(self, columns=columns, show="headings")
 
@@ -120,13 +153,23 @@ class ExpenseList(ttk.Frame):
         self.tree.column("description", width=200)
         self.tree.column("date", width=150)
 
-        # Add scrollbar
-        scrollbar = ttk.Scrollbar(self, orient="vertical", command=self.tree.yview)
-        self.tree.configure(yscrollcommand=scrollbar.set)
+        # Add scrollbar; in virtual mode it tracks rows, not tree items
+        if self.virtual:
+            self.scrollbar = ttk.Scrollbar(
+                self, orient="vertical", command=self._on_scrollbar
+            )
+            for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+                self.tree.bind(sequence, self._on_mousewheel)
+            self.tree.bind("<Configure>", lambda event: self.scroll_to(self._top))
+        else:
+            self.scrollbar = ttk.Scrollbar(
+                self, orient="vertical", command=self.tree.yview
+            )
+            self.tree.configure(yscrollcommand=self.scrollbar.set)
 
         # Pack components
         self.tree.pack(side="left", fill="both", expand=True)
-        scrollbar.pack(side="right", fill="y")
+        self.scrollbar.pack(side="right", fill="y")
 
         # Bind delete key
         self.tree.bind("<Delete>", self._delete_selected)
@@ -137,21 +180,155 @@ class ExpenseList(ttk.Frame):
         Args:
             expenses: List of expenses to display
         """
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+        self._expenses = list(expenses)
+        self._sync_search_index()
+        self._render()
+
+    def _sync_search_index(self):
+        """Bring the search index in line with the current expenses.
 
+        Only added, removed or re-described expenses are re-tokenized.
+        """
+        current = {expense.id: expense.description for expense in self._expenses}
+        for expense_id in self._indexed.keys() - current.keys():
+            self._search_index.remove(expense_id)
+        for expense_id, description in current.items():
+            if self._indexed.get(expense_id) != description:
+                self._search_index.add(expense_id, description)
+        self._indexed = current
+
+    def visible_expenses(self) -> List[Expense]:
+        """Return the expenses matching the search box, in display order."""
+        text = self.search_var.get().strip()
+        if not text:
+            return self._expenses
+        found = self._search_index.search(text)
+        return [expense for expense in self._expenses if expense.id in found]
+
+    def _on_search(self):
+        """Show the matches for new search text from the top."""
+        self._top = 0
+        self._render()
+
+    def _render(self):
+        """Show the expenses matching the search box."""
+        self._filtered = self.visible_expenses()
+        if self.virtual:
+            self.scroll_to(self._top, force=True)
+        else:
+            self._apply_rows(self._filtered)
+
+    @staticmethod
+    def _row_values(expense: Expense) -> Tuple[str, ...]:
+        """Return the column values shown for an expense."""
+        return (
+            f"${expense.amount:.2f}",
+            expense.category,
+            expense.description,
+            expense.date.strftime("%Y-%m-%d %H:%M"),
+        )
+
+    def _apply_rows(self, expenses: List[Expense]):
+        """Make the tree show exactly these expenses, in this order.
+
+        Items are keyed by expense id. Rows that disappeared are deleted,
+        rows whose values changed are edited in place, and new rows are
+        inserted at their positions; existing items are only moved when their
+        relative order changed.
+        """
+        rows: Dict[str, Tuple[Expense, Tuple[str, ...]]] = {}
         for expense in expenses:
-            self.tree.insert(
-                "",
-                "end",
-                values=(
-                    f"${expense.amount:.2f}",
-                    expense.category,
-                    expense.description,
-                    expense.date.strftime("%Y-%m-%d %H:%M"),
-                ),
-                tags=(expense.id,),
-            )
+            iid = str(expense.id)
+            while iid in rows:  # tolerate duplicate ids
+                iid += "#"
+            rows[iid] = (expense, self._row_values(expense))
+
+        stale = [iid for iid in self._order if iid not in rows]
+        if stale:
+            self.tree.delete(*stale)
+            for iid in stale:
+                del self._values[iid]
+        kept = [iid for iid in self._order if iid in rows]
+
+        for iid in kept:
+            values = rows[iid][1]
+            if self._values[iid] != values:
+                self.tree.item(iid, values=values, tags=(rows[iid][0].id,))
+                self._values[iid] = values
+
+        wanted = [iid for iid in rows if iid in self._values]
+        if wanted != kept:
+            for position, iid in enumerate(wanted):
+                self.tree.move(iid, "", position)
+
+        for position, (iid, (expense, values)) in enumerate(rows.items()):
+            if iid not in self._values:
+                self.tree.insert(
+                    "", position, iid=iid, values=values, tags=(expense.id,)
+                )
+                self._values[iid] = values
+        self._order = list(rows)
+
+    def _visible_rows(self) -> int:
+        """Return how many rows fit in the tree."""
+        height = int(self.tree.cget("height"))
+        rowheight = ttk.Style(self).lookup("Treeview", "rowheight")
+        try:
+            pixels = self.tree.winfo_height() // int(rowheight or 20)
+        except (TypeError, ValueError):
+            pixels = 0
+        return max(height, pixels, 1)
+
+    def scroll_to(self, top: int, force: bool = False):
+        """Show rows starting at ``top`` in virtual mode.
+
+        The materialized window is only moved when ``top`` gets within half a
+        buffer of its edge, so most scrolling just moves the tree's view.
+
+        Args:
+            top: Index of the first visible row among the filtered expenses
+            force: Rebuild the materialized window even if it still covers
+                the visible rows
+        """
+        total = len(self._filtered)
+        visible = self._visible_rows()
+        top = max(0, min(top, total - visible))
+        self._top = top
+
+        start, stop = self._window_start, self._window_start + len(self._order)
+        margin = self.buffer // 2
+        if (
+            force
+            or (top - margin < start and start > 0)
+            or (top + visible + margin > stop and stop < total)
+        ):
+            start = max(0, top - self.buffer)
+            stop = min(total, top + visible + self.buffer)
+            self._window_start = start
+            self._apply_rows(self._filtered[start:stop])
+
+        if self._order:
+            self.tree.yview_moveto((top - self._window_start) / len(self._order))
+        if total:
+            self.scrollbar.set(top / total, min(1.0, (top + visible) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def _on_scrollbar(self, action: str, amount: str, unit: Optional[str] = None):
+        """Scroll the virtual list from the scrollbar."""
+        if action == "moveto":
+            self.scroll_to(int(float(amount) * len(self._filtered)))
+        elif action == "scroll":
+            step = self._visible_rows() if unit == "pages" else 1
+            self.scroll_to(self._top + int(amount) * step)
+
+    def _on_mousewheel(self, event):
+        """Scroll the virtual list with the mouse wheel."""
+        if event.num == 4 or getattr(event, "delta", 0) > 0:
+            self.scroll_to(self._top - 3)
+        else:
+            self.scroll_to(self._top + 3)
+        return "break"
 
     def _delete_selected(self, event=None):
         """Handle deleting the selected expense."""
@@ -163,7 +340,15 @@ class ExpenseList(ttk.Frame):
 
 
 class ExpenseChart(ttk.Frame):
-    """Widget for displaying expense statistics charts."""
+    """Widget for displaying expense statistics charts.
+
+    The pie is rebuilt only when the set of categories changes; otherwise the
+    existing wedges and labels are adjusted in place. Redraws go through
+    ``draw_idle`` at most once per ``DRAW_DELAY_MS``, so a burst of edits
+    costs a single repaint, and unchanged totals cost nothing.
+    """
+
+    DRAW_DELAY_MS = 100
 
     def __init__(self, parent: tk.Widget):
         """Initialize the chart widget.
@@ -172,19 +357,63 @@ class ExpenseChart(ttk.Frame):
             parent: Parent widget
         """
         super().__init__(parent)
+        # matplotlib is slow to import, so defer it until a chart is built
+        import matplotlib.pyplot as plt
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
         self.figure, self.ax = plt.subplots(figsize=(6, 4))
         self.canvas = FigureCanvasTkAgg(self.figure, master=self)
         self.canvas.get_tk_widget().pack(fill="both", expand=True)
 
+        self._totals: Optional[Dict[str, Decimal]] = None
+        self._wedges: list = []
+        self._labels: list = []
+        self._autotexts: list = []
+        self._draw_pending: Optional[str] = None
+
     def update_chart(self, expenses: List[Expense]):
         """Update the pie chart with current expense data.
 
+        Prefer update_totals() with totals the manager already maintains;
+        this sums the given expenses first.
+
         Args:
             expenses: List of expenses to visualize
         """
+        totals: Dict[str, Decimal] = {}
+        for expense in expenses:
+            totals[expense.category] = (
+                totals.get(expense.category, Decimal("0")) + expense.amount
+            )
+        self.update_totals(totals)
+
+    def update_totals(self, category_totals: Mapping[str, Decimal]):
+        """Update the pie chart from per-category totals.
+
+        Args:
+            category_totals: Total amount by category
+        """
+        totals = {
+            category: Decimal(total)
+            for category, total in sorted(category_totals.items())
+            if total
+        }
+        if totals == self._totals:
+            return
+
+        if self._totals is not None and totals and list(totals) == list(self._totals):
+            self._move_wedges(totals)
+        else:
+            self._build_pie(totals)
+        self._totals = totals
+        self._schedule_draw()
+
+    def _build_pie(self, totals: Dict[str, Decimal]):
+        """Draw a new pie for a changed set of categories."""
         self.ax.clear()
+        self._wedges, self._labels, self._autotexts = [], [], []
 
-        if not expenses:
+        if not totals:
             self.ax.text(
                 0.5,
                 0.5,
@@ -192,23 +421,41 @@ class ExpenseChart(ttk.Frame):
                 horizontalalignment="center",
                 verticalalignment="center",
             )
-        else:
-            # Calculate totals by category
-            category_totals: Dict[str, float] = {}
-            for expense in expenses:
-                category_totals[expense.category] = category_totals.get(
-                    expense.category, 0
-                ) + float(expense.amount)
-
-            # Create pie chart
-            labels = list(category_totals.keys())
-            sizes = list(category_totals.values())
-            self.ax.pie(
-                sizes,
-                labels=labels,
-                autopct="%1.1f%%",
-                startangle=90,
-            )
-            self.ax.axis("equal")
+            return
 
-        self.canvas.draw()
+        self._wedges, self._labels, self._autotexts = self.ax.pie(
+            [float(total) for total in totals.values()],
+            labels=list(totals),
+            autopct="%1.1f%%",
+            startangle=90,
+        )
+        self.ax.axis("equal")
+
+    def _move_wedges(self, totals: Dict[str, Decimal]):
+        """Resize the existing wedges and move their labels in place."""
+        grand_total = sum(totals.values())
+        theta = 90.0
+        artists = zip(self._wedges, self._labels, self._autotexts, totals.values())
+        for wedge, label, autotext, total in artists:
+            fraction = float(total / grand_total)
+            end = theta + 360 * fraction
+            wedge.set_theta1(theta)
+            wedge.set_theta2(end)
+
+            middle = math.radians((theta + end) / 2)
+            x, y = math.cos(middle), math.sin(middle)
+            label.set_position((1.1 * x, 1.1 * y))
+            label.set_horizontalalignment("left" if x > 0 else "right")
+            autotext.set_position((0.6 * x, 0.6 * y))
+            autotext.set_text(f"{fraction * 100:.1f}%")
+            theta = end
+
+    def _schedule_draw(self):
+        """Request a repaint, coalescing requests made in quick succession."""
+        if self._draw_pending is None:
+            self._draw_pending = self.after(self.DRAW_DELAY_MS, self._draw)
+
+    def _draw(self):
+        """Repaint the canvas when Tk is next idle."""
+        self._draw_pending = None
+        self.canvas.draw_idle()
@@ -0,0 +1,105 @@
+"""Module running slow work off the Tk event loop."""
+import queue
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+
+class BackgroundWorker:
+    """Runs jobs on a single background thread and reports back on the Tk thread.
+
+    Jobs run one at a time in submission order, so a manager that is only
+    touched from jobs needs no locking. Tk must only be used from the thread
+    running the main loop, so finished jobs are queued and picked up by a
+    ``root.after`` poll that only runs while jobs are pending.
+    """
+
+    def __init__(
+        self,
+        root,
+        on_pending_change: Optional[Callable[[int], None]] = None,
+        poll_interval_ms: int = 20,
+    ):
+        """Initialize the worker.
+
+        Args:
+            root: Tk root (or any widget) used to schedule callbacks
+            on_pending_change: Called on the Tk thread with the number of
+                unfinished jobs whenever it changes
+            poll_interval_ms: How often to check for finished jobs
+        """
+        self.root = root
+        self.on_pending_change = on_pending_change
+        self.poll_interval_ms = poll_interval_ms
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="ui-worker"
+        )
+        self._done: "queue.Queue[tuple]" = queue.Queue()
+        self._pending = 0
+        self._polling = False
+
+    @property
+    def pending(self) -> int:
+        """Number of submitted jobs whose callbacks have not run yet."""
+        return self._pending
+
+    def submit(
+        self,
+        job: Callable[..., Any],
+        *args: Any,
+        on_success: Optional[Callable[[Any], None]] = None,
+        on_error: Optional[Callable[[BaseException], None]] = None,
+    ) -> Future:
+        """Run a job in the background.
+
+        Must be called from the Tk thread.
+
+        Args:
+            job: Function to run on the worker thread
+            *args: Arguments for the job
+            on_success: Called on the Tk thread with the job's result
+            on_error: Called on the Tk thread with the exception if the job
+                raised
+
+        Returns:
+            The future for the job.
+        """
+        future = self._executor.submit(job, *args)
+        future.add_done_callback(
+            lambda done: self._done.put((done, on_success, on_error))
+        )
+        self._set_pending(self._pending + 1)
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.poll_interval_ms, self._poll)
+        return future
+
+    def _poll(self) -> None:
+        """Deliver the results of finished jobs on the Tk thread."""
+        try:
+            while True:
+                try:
+                    future, on_success, on_error = self._done.get_nowait()
+                except queue.Empty:
+                    break
+                self._set_pending(self._pending - 1)
+                error = future.exception()
+                if error is None:
+                    if on_success is not None:
+                        on_success(future.result())
+                elif on_error is not None:
+                    on_error(error)
+        finally:
+            # Keep polling even if a callback raised
+            if self._pending:
+                self.root.after(self.poll_interval_ms, self._poll)
+            else:
+                self._polling = False
+
+    def _set_pending(self, count: int) -> None:
+        self._pending = count
+        if self.on_pending_change is not None:
+            self.on_pending_change(count)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop accepting jobs, by default waiting for queued ones to finish."""
+        self._executor.shutdown(wait=wait)
@@ -1,11 +1,22 @@
 """Flask application for the Expense Tracker web interface."""
-from datetime import datetime, timedelta
+import atexit
+import os
+import threading
+import time
+import uuid
+import weakref
+from datetime import date, datetime, timedelta
 from decimal import Decimal
-from typing import Dict
+from itertools import islice
+from typing import Any, List, Mapping, Optional
 
 from flask import (
+    Blueprint,
     Flask,
+    Response,
+    current_app,
     flash,
+    g,
     jsonify,
     redirect,
     render_template,
@@ -14,23 +25,169 @@ from flask import (
     url_for,
 )
 
-from expense_tracker.models.expense_manager import ExpenseManager
+from expense_tracker.models.changes import ChangeFeedGap
+from expense_tracker.models.expense import Expense
+from expense_tracker.models.expense_manager import ConflictError, ExpenseManager
+from expense_tracker.models.query import QuerySyntaxError
+from expense_tracker.models.rollups import from_cents
+from expense_tracker.services.metrics import EXPENSE_ROWS, REGISTRY, REQUEST_LATENCY
 from expense_tracker.web.config import (
     CURRENCIES,
     DATE_FORMATS,
     DEFAULT_BUDGET,
     DEFAULT_CURRENCY,
     DEFAULT_DATE_FORMAT,
+    LEDGER_AUTOSAVE,
+    LEDGER_CACHE_MAX_BYTES,
+    LEDGER_CACHE_MAX_LEDGERS,
+    LEDGER_STORAGE_ENGINE,
+    PROFILING_DIR,
+    PROFILING_ENABLED,
 )
+from expense_tracker.web.ledgers import LedgerPool
+from expense_tracker.web.profiling import init_profiling
 
-app = Flask(__name__)
-app.secret_key = "your-secret-key-here"  # Change this in production
+bp = Blueprint("web", __name__)
 
-# Initialize expense manager
-manager = ExpenseManager()
+_ledgers_lock = threading.Lock()
 
+# Ledger pools of every live app; apps own their pools, so a pool leaves
+# this set when its app is garbage collected
+_pools: "weakref.WeakSet[LedgerPool]" = weakref.WeakSet()
 
-@app.template_filter("format_date")
+
+def _resident_rows() -> int:
+    """Return the number of expenses loaded across every live app."""
+    return sum(pool.resident_rows() for pool in list(_pools))
+
+
+def _flush_pools() -> None:
+    """Flush the ledgers of every live app; run at interpreter exit."""
+    for pool in list(_pools):
+        pool.flush_all()
+
+
+EXPENSE_ROWS.set_function(_resident_rows)
+atexit.register(_flush_pools)
+
+
+def default_config() -> dict:
+    """Return the default app configuration, honouring environment overrides."""
+    return {
+        "SECRET_KEY": os.environ.get("SECRET_KEY", "your-secret-key-here"),
+        "DATA_DIR": os.environ.get(
+            "EXPENSE_TRACKER_DATA_DIR",
+            os.path.join(os.path.expanduser("~"), ".expense_tracker"),
+        ),
+        "LEDGER_CACHE_MAX_BYTES": LEDGER_CACHE_MAX_BYTES,
+        "LEDGER_CACHE_MAX_LEDGERS": LEDGER_CACHE_MAX_LEDGERS,
+        "LEDGER_AUTOSAVE": LEDGER_AUTOSAVE,
+        "LEDGER_STORAGE_ENGINE": os.environ.get(
+            "EXPENSE_TRACKER_STORAGE_ENGINE", LEDGER_STORAGE_ENGINE
+        ),
+        "PROFILING_ENABLED": os.environ.get("EXPENSE_TRACKER_PROFILING", "")
+        in ("1", "true")
+        or PROFILING_ENABLED,
+        "PROFILING_DIR": os.environ.get("EXPENSE_TRACKER_PROFILE_DIR", PROFILING_DIR),
+        "PROFILING_TOKEN": os.environ.get("EXPENSE_TRACKER_PROFILE_TOKEN"),
+    }
+
+
+def create_app(config: Optional[Mapping[str, Any]] = None) -> Flask:
+    """Create and configure the Flask application.
+
+    No ledger is touched here: storage is opened on the first request that
+    needs it, so creating the app (and booting a worker) stays cheap.
+
+    Args:
+        config: Optional settings overriding default_config()
+
+    Returns:
+        The configured Flask application.
+    """
+    app = Flask(__name__)
+    app.config.from_mapping(default_config())
+    if config:
+        app.config.from_mapping(config)
+
+    app.register_blueprint(bp)
+    app.jinja_env.globals.update(
+        format_amount=format_amount,
+        format_date=format_date,
+        get_current_settings=get_current_settings,
+    )
+    init_profiling(app)
+
+    app.extensions["ledgers"] = None
+    return app
+
+
+def get_ledgers() -> LedgerPool:
+    """Return the app's ledger pool, creating it on first use."""
+    app = current_app
+    pool = app.extensions.get("ledgers")
+    if pool is None:
+        with _ledgers_lock:
+            pool = app.extensions.get("ledgers")
+            if pool is None:
+                pool = LedgerPool(
+                    app.config["DATA_DIR"],
+                    max_bytes=app.config["LEDGER_CACHE_MAX_BYTES"],
+                    max_ledgers=app.config["LEDGER_CACHE_MAX_LEDGERS"],
+                    autosave=app.config["LEDGER_AUTOSAVE"],
+                    engine=app.config["LEDGER_STORAGE_ENGINE"],
+                )
+                _pools.add(pool)
+                app.extensions["ledgers"] = pool
+    return pool
+
+
+def current_user_id() -> str:
+    """Return the id of the current visitor, assigning one on first visit."""
+    user_id = session.get("user_id")
+    if not user_id:
+        user_id = session["user_id"] = uuid.uuid4().hex
+    return user_id
+
+
+def get_manager() -> ExpenseManager:
+    """Return the current user's expense manager for this request."""
+    if "manager" not in g:
+        user_id = current_user_id()
+        g.manager = get_ledgers().acquire(user_id)
+        g.manager_user_id = user_id
+    return g.manager
+
+
+@bp.teardown_app_request
+def release_manager(exc):
+    """Unpin the user's ledger so it becomes eligible for eviction."""
+    user_id = g.pop("manager_user_id", None)
+    if user_id is not None:
+        g.pop("manager", None)
+        get_ledgers().release(user_id)
+
+
+@bp.before_app_request
+def start_request_timer():
+    """Remember when the request started for latency metrics."""
+    g.request_started = time.perf_counter()
+
+
+@bp.after_app_request
+def record_request_latency(response):
+    """Record the request latency under its route template."""
+    started = g.pop("request_started", None)
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule else "<unmatched>"
+        REQUEST_LATENCY.observe(
+            time.perf_counter() - started,
+            (request.method, route, str(response.status_code)),
+        )
+    return response
+
+
+@bp.app_template_filter("format_date")
 def format_date_filter(date):
     """Format date according to current regional settings."""
     date_format = DATE_FORMATS[session.get("date_format", DEFAULT_DATE_FORMAT)]
@@ -85,15 +242,7 @@ def format_date(date: datetime) -> str:
     return date.strftime(date_format)
 
 
-# Make functions available to templates
-app.jinja_env.globals.update(
-    format_amount=format_amount,
-    format_date=format_date,
-    get_current_settings=get_current_settings,
-)
-
-
-@app.route("/")
+@bp.route("/")
 def index():
     """Render the dashboard page."""
     current_date = datetime.now()
@@ -104,20 +253,17 @@ def index():
     settings = get_current_settings()
     monthly_budget = Decimal(str(settings["monthly_budget"]))
 
-    # Get expenses for the current month
-    expenses = manager.get_expenses()
-    monthly_expenses = [e for e in expenses if start_date <= e.date <= end_date]
-
-    # Calculate statistics
-    monthly_total = sum(e.amount for e in monthly_expenses)
-    daily_average = monthly_total / end_date.day if monthly_expenses else Decimal("0")
+    # Totals come from per-day sums, independent of the number of expenses
+    manager = get_manager()
+    monthly_total = manager.get_total_between(start_date.date(), end_date.date())
+    daily_average = monthly_total / end_date.day
     budget_percentage = (
         min(int((monthly_total / monthly_budget) * 100), 100) if monthly_budget else 0
     )
 
     # Format recent expenses
     recent_expenses = []
-    for expense in sorted(expenses, key=lambda x: x.date, reverse=True)[:5]:
+    for expense in islice(manager.iter_expenses(newest_first=True), 5):
         recent_expenses.append(
             {
                 "date": expense.date,
@@ -129,16 +275,9 @@ def index():
         )
 
     # Prepare data for the chart
-    dates = []
-    daily_expenses = []
-    current = start_date
-    while current <= end_date:
-        dates.append(current.strftime("%Y-%m-%d"))
-        day_expenses = sum(
-            e.amount for e in monthly_expenses if e.date.date() == current.date()
-        )
-        daily_expenses.append(float(day_expenses))
-        current += timedelta(days=1)
+    series = manager.get_daily_totals(start_date.date(), end_date.date())
+    dates = [day.strftime("%Y-%m-%d") for day, _ in series]
+    daily_expenses = [float(total) for _, total in series]
 
     return render_template(
         "index.html",
@@ -150,18 +289,37 @@ def index():
         monthly_budget=format_amount(monthly_budget),
         dates=dates,
         daily_expenses=daily_expenses,
+        category_colors=CATEGORY_COLORS,
         CURRENCIES=CURRENCIES,
     )
 
 
-@app.route("/expenses")
+@bp.route("/expenses")
 def expenses():
-    """Render the expenses page."""
+    """Render the expenses page.
+
+    The ``q`` parameter takes a filter expression such as
+    ``amount > 50 and category in (Food, Bills)``, answered from the ledger's
+    indexes where possible.
+    """
+    query = request.args.get("q", "").strip()
+    search = request.args.get("search", "").strip()
     category = request.args.get("category")
     start_date = request.args.get("start_date")
     end_date = request.args.get("end_date")
 
-    expenses = manager.get_expenses()
+    if query:
+        try:
+            expenses = get_manager().query(query)
+        except QuerySyntaxError as e:
+            flash(f"Invalid query: {str(e)}", "danger")
+            expenses = []
+    else:
+        expenses = get_manager().get_expenses()
+
+    if search:
+        found = {id(e) for e in get_manager().search(search)}
+        expenses = [e for e in expenses if id(e) in found]
 
     if category:
         expenses = [e for e in expenses if e.category == category]
@@ -178,46 +336,195 @@ def expenses():
         categories=list(CATEGORY_COLORS.keys()),
         category_colors=CATEGORY_COLORS,
         selected_category=category,
+        query=query,
+        search=search,
         start_date=start_date,
         end_date=end_date,
         CURRENCIES=CURRENCIES,
     )
 
 
-@app.route("/stats")
+def _split_param(value: str) -> List[str]:
+    """Split a comma-separated query parameter into its non-empty parts."""
+    return [part.strip() for part in value.split(",") if part.strip()]
+
+
+def _parse_stats_query(args) -> dict:
+    """Parse start, end, group_by and category query parameters.
+
+    Raises:
+        ValueError: If a date is invalid.
+    """
+    start = args.get("start")
+    end = args.get("end")
+    category = args.get("category")
+    return {
+        "start": date.fromisoformat(start) if start else None,
+        "end": date.fromisoformat(end) if end else None,
+        "group_by": _split_param(args.get("group_by", "category")),
+        "categories": _split_param(category) if category else None,
+    }
+
+
+@bp.route("/stats")
 def stats():
     """Render the statistics page."""
-    expenses = manager.get_expenses()
-
-    # Calculate category totals
-    category_totals: Dict[str, Decimal] = {}
-    for expense in expenses:
-        if expense.category not in category_totals:
-            category_totals[expense.category] = Decimal("0")
-        category_totals[expense.category] += expense.amount
-
-    # Calculate percentages
-    total = sum(category_totals.values())
-    category_stats = []
-    for category, amount in sorted(category_totals.items()):
-        percentage = (amount / total * 100) if total else Decimal("0")
-        category_stats.append(
-            {
-                "category": category,
-                "amount": format_amount(amount),
-                "percentage": percentage,
-                "color": CATEGORY_COLORS.get(category, "secondary"),
-            }
-        )
+    result = get_manager().query_stats(group_by=["category"])
+    category_stats = [
+        {
+            "category": group.key["category"],
+            "amount": format_amount(group.total),
+            "value": float(group.total),
+            "percentage": group.percentage,
+            "color": CATEGORY_COLORS.get(group.key["category"], "secondary"),
+        }
+        for group in result.groups
+    ]
 
     return render_template(
         "stats.html",
         category_stats=category_stats,
-        total=format_amount(total),
+        total=format_amount(result.total),
+    )
+
+
+@bp.route("/api/stats")
+def stats_data():
+    """Get totals for a date range grouped by category, week, month, etc."""
+    try:
+        result = get_manager().query_stats(**_parse_stats_query(request.args))
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+
+    data = result.to_dict()
+    data["total_formatted"] = format_amount(result.total)
+    for group, formatted in zip(data["groups"], result.groups):
+        group["total_formatted"] = format_amount(formatted.total)
+        if "category" in group["key"]:
+            group["color"] = CATEGORY_COLORS.get(group["key"]["category"], "secondary")
+    return jsonify(data)
+
+
+def _parse_sketch_query(args) -> dict:
+    """Parse start, end, category and exact query parameters.
+
+    Raises:
+        ValueError: If a date is invalid.
+    """
+    query = _parse_stats_query(args)
+    del query["group_by"]
+    query["exact"] = args.get("exact", "").lower() in ("1", "true")
+    return query
+
+
+@bp.route("/api/stats/quantiles")
+def stats_quantiles():
+    """Get amount quantiles per category, such as the median and p90.
+
+    Quantiles are estimated from sketches unless ``exact=1`` is given. ``q``
+    takes comma-separated fractions and defaults to 0.5,0.9.
+    """
+    try:
+        query = _parse_sketch_query(request.args)
+        quantiles = [float(q) for q in _split_param(request.args.get("q", "0.5,0.9"))]
+        if not quantiles or not all(0 <= q <= 1 for q in quantiles):
+            raise ValueError("q must be fractions between 0 and 1")
+        result = get_manager().amount_quantiles(quantiles=quantiles, **query)
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+
+    return jsonify(
+        {
+            "exact": query["exact"],
+            "categories": {
+                category: {
+                    str(q): {"amount": str(amount), "formatted": format_amount(amount)}
+                    for q, amount in values.items()
+                }
+                for category, values in result.items()
+            },
+        }
     )
 
 
-@app.route("/add_expense", methods=["POST"])
+@bp.route("/api/stats/distinct")
+def stats_distinct():
+    """Get the number of distinct descriptions (merchants) per month.
+
+    Counts are estimated from sketches unless ``exact=1`` is given.
+    """
+    try:
+        query = _parse_sketch_query(request.args)
+        months = get_manager().distinct_descriptions(**query)
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    return jsonify({"exact": query["exact"], "months": months})
+
+
+@bp.route("/api/stats/histogram")
+def stats_histogram():
+    """Get logarithmically bucketed amount histograms.
+
+    ``group_by`` takes any of category (the default), month and year;
+    ``group_by=`` with no value returns a single histogram. Empty buckets
+    between occupied ones are included and the top bucket's ``high`` may be
+    null.
+    """
+    try:
+        query = _parse_stats_query(request.args)
+        histograms = get_manager().amount_histograms(**query)
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+
+    groups = []
+    for key, histogram in histograms.items():
+        buckets = []
+        for low, high, count in histogram.buckets():
+            buckets.append(
+                {
+                    "low": str(from_cents(low)),
+                    "high": str(from_cents(high)) if high is not None else None,
+                    "low_formatted": format_amount(from_cents(low)),
+                    "count": count,
+                }
+            )
+        groups.append(
+            {
+                "key": dict(zip(query["group_by"], key)),
+                "count": len(histogram),
+                "buckets": buckets,
+            }
+        )
+    return jsonify({"groups": groups})
+
+
+@bp.route("/api/changes")
+def changes():
+    """Get the changes to the current user's ledger after a sequence number.
+
+    Clients poll with ``since`` set to the ``sequence`` of the previous
+    response. A 410 means changes were missed, for example because the
+    ledger was evicted and reopened, and the client should fetch the
+    expenses again.
+    """
+    feed = get_manager().changes
+    try:
+        since = int(request.args.get("since", feed.sequence))
+    except ValueError:
+        return jsonify({"error": "since must be an integer"}), 400
+    try:
+        events = feed.events_since(since)
+    except ChangeFeedGap as e:
+        return jsonify({"error": str(e), "sequence": feed.sequence}), 410
+    return jsonify(
+        {
+            "sequence": events[-1].sequence if events else since,
+            "events": [event.to_dict() for event in events],
+        }
+    )
+
+
+@bp.route("/add_expense", methods=["POST"])
 def add_expense():
     """Add a new expense."""
     try:
@@ -228,7 +535,7 @@ def add_expense():
         if amount <= 0:
             raise ValueError("Amount must be positive")
 
-        expense = manager.add_expense(
+        expense = get_manager().add_expense(
             amount=amount,
             category=category,
             description=description,
@@ -243,22 +550,208 @@ def add_expense():
         return jsonify({"success": False, "message": str(e)}), 400
 
 
-@app.route("/api/expenses/<expense_id>", methods=["DELETE"])
-def delete_expense(expense_id: str):
-    """Delete an expense."""
+@bp.route("/api/expenses/search")
+def search_expenses():
+    """Search expense descriptions, for type-ahead.
+
+    Query parameters are ``q`` (the search text), ``limit`` (default 20) and
+    ``exact`` (match whole words only).
+    """
+    try:
+        limit = int(request.args.get("limit", 20))
+        if limit < 0:
+            raise ValueError(limit)
+    except ValueError:
+        return jsonify({"error": "limit must be a non-negative integer"}), 400
+    manager = get_manager()
+    text = request.args.get("q", "")
+    prefix = not request.args.get("exact")
+    found = manager.search(text, prefix=prefix, limit=limit)
+    count = len(found) if len(found) < limit else manager.search_count(text, prefix)
+    return jsonify(
+        {
+            "count": count,
+            "expenses": [
+                dict(e.to_dict(), amount_formatted=format_amount(e.amount))
+                for e in found
+            ],
+        }
+    )
+
+
+def _expected_version() -> Optional[int]:
+    """Return the expense version named by the If-Match header.
+
+    ETags are expense versions. A missing header or ``*`` means the client
+    does not care which version it overwrites.
+
+    Raises:
+        ValueError: If the header is not a single version number.
+    """
+    if_match = request.if_match
+    if not if_match or if_match.star_tag:
+        return None
+    tags = if_match.as_set(include_weak=True)
+    if len(tags) != 1:
+        raise ValueError("If-Match must name exactly one version")
+    return int(tags.pop())
+
+
+def _expense_response(expense: Expense, status: int = 200):
+    """Return an expense as JSON, with its version as the ETag."""
+    response = jsonify({"success": True, "expense": expense.to_dict()})
+    response.status_code = status
+    response.set_etag(str(expense.version))
+    return response
+
+
+def _not_found(expense_id: str):
+    """Return a 404 for an unknown expense id."""
+    message = f"No expense found with ID {expense_id}"
+    return jsonify({"success": False, "message": message}), 404
+
+
+def _conflict(error: ConflictError):
+    """Return a 409 telling the client which version is current."""
+    response = jsonify(
+        {"success": False, "message": str(error), "version": error.actual}
+    )
+    response.status_code = 409
+    if error.actual is not None:
+        response.set_etag(str(error.actual))
+    return response
+
+
+@bp.route("/api/expenses/<expense_id>", methods=["GET"])
+def get_expense(expense_id: str):
+    """Get one expense; its ETag can be sent back in If-Match."""
+    expense = get_manager().get_expense(expense_id)
+    if expense is None:
+        return _not_found(expense_id)
+    return _expense_response(expense)
+
+
+@bp.route("/api/expenses/<expense_id>", methods=["PUT"])
+def update_expense(expense_id: str):
+    """Replace an expense.
+
+    With an ``If-Match`` header the update only succeeds if nobody changed
+    the expense since the client read it; otherwise it fails with 409.
+    Fields missing from the JSON body keep their current values.
+    """
+    manager = get_manager()
+    expense = manager.get_expense(expense_id)
+    if expense is None:
+        return _not_found(expense_id)
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"success": False, "message": "Expected a JSON object"}), 400
     try:
-        manager.delete_expense(expense_id)
-        return jsonify({"success": True})
-    except KeyError:
-        return (
-            jsonify(
-                {"success": False, "message": f"No expense found with ID {expense_id}"}
-            ),
-            404,
+        expected_version = _expected_version()
+        updated = _expense_from_json(
+            {
+                "amount": str(expense.amount),
+                "category": expense.category,
+                "description": expense.description,
+                "date": expense.date.isoformat(),
+                **data,
+            }
         )
+        if not manager.update_expense(expense_id, updated, expected_version):
+            return _not_found(expense_id)  # deleted since it was read
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    except ConflictError as e:
+        return _conflict(e)
+    return _expense_response(updated)
+
+
+@bp.route("/api/expenses/<expense_id>", methods=["DELETE"])
+def delete_expense(expense_id: str):
+    """Delete an expense, honouring an optional If-Match version."""
+    try:
+        deleted = get_manager().delete_expense(expense_id, _expected_version())
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    except ConflictError as e:
+        return _conflict(e)
+    if not deleted:
+        return _not_found(expense_id)
+    return jsonify({"success": True})
 
 
-@app.route("/api/dashboard")
+def _expense_from_json(data: Any) -> Expense:
+    """Build a new expense from a JSON object sent by the client."""
+    try:
+        amount = Decimal(str(data["amount"]))
+        category = str(data["category"])
+        description = str(data["description"])
+        date = datetime.fromisoformat(data["date"]) if data.get("date") else None
+    except (KeyError, TypeError, ArithmeticError) as e:
+        raise ValueError(f"Invalid expense: {data!r}") from e
+    if amount <= 0:
+        raise ValueError("Amount must be positive")
+    return Expense(amount, category, description, date or datetime.now())
+
+
+@bp.route("/api/expenses/batch", methods=["POST"])
+def batch_expenses():
+    """Apply several changes at once, all or nothing.
+
+    The JSON body may hold ``delete`` (a list of expense ids) and ``add`` (a
+    list of objects with amount, category, description and an optional ISO
+    date). The changes are persisted with a single write; if any of them is
+    invalid, none are applied.
+
+    ``duplicates`` may be "skip" or "flag" to check added expenses against
+    the ledger; the response then lists each duplicate with the id of the
+    expense it matched.
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"success": False, "message": "Expected a JSON object"}), 400
+    deletes = data.get("delete", [])
+    additions = data.get("add", [])
+    if not isinstance(deletes, list) or not all(
+        isinstance(expense_id, str) for expense_id in deletes
+    ):
+        message = "delete must be a list of expense ids"
+        return jsonify({"success": False, "message": message}), 400
+    if not isinstance(additions, list) or not all(
+        isinstance(item, dict) for item in additions
+    ):
+        message = "add must be a list of expense objects"
+        return jsonify({"success": False, "message": message}), 400
+    manager = get_manager()
+    try:
+        with manager.transaction():
+            for expense_id in deletes:
+                if not manager.delete_expense(expense_id):
+                    raise LookupError(expense_id)
+            added = [_expense_from_json(item) for item in additions]
+            found = manager.add_expenses(added, data.get("duplicates", "keep"))
+    except LookupError as e:
+        return _not_found(e.args[0])
+    except ConflictError as e:
+        return _conflict(e)
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    if data.get("duplicates") == "skip":
+        skipped = {id(expense) for expense, _ in found}
+        added = [expense for expense in added if id(expense) not in skipped]
+    return jsonify(
+        {
+            "success": True,
+            "added": [e.to_dict() for e in added],
+            "duplicates": [
+                {"expense": expense.to_dict(), "matches": match.id}
+                for expense, match in found
+            ],
+        }
+    )
+
+
+@bp.route("/api/dashboard")
 def dashboard_data():
     """Get dashboard data for a specific date."""
     try:
@@ -269,26 +762,17 @@ def dashboard_data():
     start_date = datetime(date.year, date.month, 1)
     end_date = (start_date + timedelta(days=32)).replace(day=1) - timedelta(days=1)
 
-    expenses = manager.get_expenses()
-    monthly_expenses = [e for e in expenses if start_date <= e.date <= end_date]
-
-    monthly_total = sum(e.amount for e in monthly_expenses)
-    daily_average = monthly_total / end_date.day if monthly_expenses else Decimal("0")
+    manager = get_manager()
+    monthly_total = manager.get_total_between(start_date.date(), end_date.date())
+    daily_average = monthly_total / end_date.day
     budget_percentage = min(int((monthly_total / Decimal("1000")) * 100), 100)
 
-    dates = []
-    daily_expenses = []
-    current = start_date
-    while current <= end_date:
-        dates.append(current.strftime("%Y-%m-%d"))
-        day_expenses = sum(
-            e.amount for e in monthly_expenses if e.date.date() == current.date()
-        )
-        daily_expenses.append(float(day_expenses))
-        current += timedelta(days=1)
+    series = manager.get_daily_totals(start_date.date(), end_date.date())
+    dates = [day.strftime("%Y-%m-%d") for day, _ in series]
+    daily_expenses = [float(total) for _, total in series]
 
     recent_expenses = []
-    for e in sorted(expenses, key=lambda x: x.date, reverse=True)[:5]:
+    for e in islice(manager.iter_expenses(newest_first=True), 5):
         recent_expenses.append(
             {
                 "date": e.date.isoformat(),
@@ -311,7 +795,7 @@ def dashboard_data():
     )
 
 
-@app.route("/settings", methods=["GET"])
+@bp.route("/settings", methods=["GET"])
 def settings():
     """Render the settings page."""
     current = get_current_settings()
@@ -343,7 +827,7 @@ def settings():
     )
 
 
-@app.route("/settings", methods=["POST"])
+@bp.route("/settings", methods=["POST"])
 def save_settings():
     """Save user settings."""
     currency = request.form.get("currency")
@@ -361,8 +845,14 @@ def save_settings():
             flash("Invalid budget amount", "error")
 
     flash("Settings saved successfully!", "success")
-    return redirect(url_for("settings"))
+    return redirect(url_for("web.settings"))
+
+
+@bp.route("/metrics")
+def metrics():
+    """Expose collected metrics in Prometheus text format."""
+    return Response(REGISTRY.render(), mimetype="text/plain; version=0.0.4")
 
 
 if __name__ == "__main__":
-    app.run(debug=True)
+    create_app().run(debug=True)
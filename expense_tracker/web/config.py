@@ -42,3 +42,16 @@ DATE_FORMATS: Dict[str, str] = {
 DEFAULT_CURRENCY = "USD"
 DEFAULT_DATE_FORMAT = "US"
 DEFAULT_BUDGET = 1000  # Default monthly budget
+
+# Request profiling (see expense_tracker.web.profiling)
+PROFILING_ENABLED = False  # Hooks are only registered when enabled
+PROFILING_HEADER = "X-Profile"  # Requests carrying this header are profiled
+PROFILING_DIR = "profiles"  # Where .prof / .collapsed files are written
+PROFILING_MODE = "cprofile"  # 'cprofile' or 'sampling'
+PROFILING_SAMPLE_INTERVAL = 0.005  # Seconds between stack samples
+
+# Per-user ledgers (see expense_tracker.web.ledgers)
+LEDGER_CACHE_MAX_BYTES = 256 * 1024 * 1024  # Memory budget for loaded ledgers
+LEDGER_CACHE_MAX_LEDGERS = 5000  # Upper bound on resident ledgers
+LEDGER_AUTOSAVE = True  # Persist after every change instead of on eviction
+LEDGER_STORAGE_ENGINE = "json"  # Storage URL scheme for each user's ledger
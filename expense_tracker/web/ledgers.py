@@ -0,0 +1,193 @@
+"""Per-user ledger management for the Expense Tracker web interface.
+
+Each user gets their own ledger directory, loaded lazily on first use. Loaded
+ledgers are kept in a bounded LRU cache; when the cache goes over its memory or
+ledger budget, the least recently used ledgers that are not serving a request
+are flushed, closed and dropped.
+
+Ledger sizes are measured when a ledger is acquired or released, the only
+times a request can have changed it, and kept as a running total. Evicted
+ledgers are flushed without holding the pool lock and closed and dropped
+only once the flush has succeeded, so a failed write never loses unsaved
+changes.
+"""
+import logging
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from expense_tracker.models.expense_manager import ExpenseManager
+from expense_tracker.services.storage import storage_url
+
+logger = logging.getLogger(__name__)
+
+USER_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+class LedgerPool:
+    """Bounded LRU cache of per-user expense managers."""
+
+    def __init__(
+        self,
+        base_path: str,
+        max_bytes: int,
+        max_ledgers: Optional[int] = None,
+        autosave: bool = True,
+        factory: Callable[..., ExpenseManager] = ExpenseManager,
+        engine: str = "json",
+    ):
+        """Initialize the pool.
+
+        Args:
+            base_path: Directory under which each user's ledger is stored
+            max_bytes: Approximate memory budget for resident ledgers
+            max_ledgers: Optional cap on the number of resident ledgers
+            autosave: Whether managers persist after every mutation
+            factory: Callable creating a manager from a storage path
+            engine: Storage URL scheme used for every ledger, such as
+                "json" or "sqlite"
+        """
+        self.base_path = Path(base_path)
+        self.max_bytes = max_bytes
+        self.max_ledgers = max_ledgers
+        self.autosave = autosave
+        self._factory = factory
+        self.engine = engine
+        self._ledgers: "OrderedDict[str, ExpenseManager]" = OrderedDict()
+        self._pins: Dict[str, int] = {}
+        self._sizes: Dict[str, int] = {}
+        self._resident_bytes = 0
+        self._evicting: Set[str] = set()
+        self._lock = threading.RLock()
+
+    def ledger_path(self, user_id: str) -> Path:
+        """Return the storage directory for a user's ledger."""
+        if not USER_ID_PATTERN.match(user_id):
+            raise ValueError(f"Invalid user id: {user_id!r}")
+        return self.base_path / "users" / user_id
+
+    def acquire(self, user_id: str) -> ExpenseManager:
+        """Return the user's manager, loading it if needed, and pin it.
+
+        A pinned ledger is never evicted; call release() when done with it.
+        """
+        with self._lock:
+            manager = self._ledgers.get(user_id)
+            if manager is None:
+                path = str(self.ledger_path(user_id))
+                manager = self._factory(
+                    path,
+                    autosave=self.autosave,
+                    storage=storage_url(self.engine, path),
+                )
+                self._ledgers[user_id] = manager
+            else:
+                self._ledgers.move_to_end(user_id)
+            self._pins[user_id] = self._pins.get(user_id, 0) + 1
+            self._measure(user_id)
+        self._evict()
+        return manager
+
+    def release(self, user_id: str) -> None:
+        """Unpin a ledger previously returned by acquire()."""
+        with self._lock:
+            remaining = self._pins.get(user_id, 0) - 1
+            if remaining > 0:
+                self._pins[user_id] = remaining
+            else:
+                self._pins.pop(user_id, None)
+            if user_id in self._ledgers:
+                self._measure(user_id)
+        self._evict()
+
+    def resident_bytes(self) -> int:
+        """Return the estimated memory used by resident ledgers."""
+        with self._lock:
+            return self._resident_bytes
+
+    def resident_rows(self) -> int:
+        """Return the number of expenses across resident ledgers."""
+        with self._lock:
+            return sum(len(m.expenses) for m in self._ledgers.values() if m.loaded)
+
+    def __len__(self) -> int:
+        """Return the number of resident ledgers."""
+        return len(self._ledgers)
+
+    def __contains__(self, user_id: str) -> bool:
+        """Return whether a user's ledger is currently resident."""
+        return user_id in self._ledgers
+
+    def flush_all(self) -> None:
+        """Flush every resident ledger with pending changes."""
+        with self._lock:
+            for manager in self._ledgers.values():
+                manager.flush()
+
+    def _measure(self, user_id: str) -> None:
+        """Update the running total with a ledger's current size."""
+        size = self._ledgers[user_id].estimated_size()
+        self._resident_bytes += size - self._sizes.get(user_id, 0)
+        self._sizes[user_id] = size
+
+    def _over_budget(self, ledgers: int, resident_bytes: int) -> bool:
+        """Return whether the pool exceeds either of its limits."""
+        if self.max_ledgers is not None and ledgers > self.max_ledgers:
+            return True
+        return resident_bytes > self.max_bytes
+
+    def _victims(self) -> List[Tuple[str, ExpenseManager]]:
+        """Pick least recently used unpinned ledgers to bring the pool in budget."""
+        ledgers = len(self._ledgers) - len(self._evicting)
+        resident_bytes = self._resident_bytes - sum(
+            self._sizes[user_id] for user_id in self._evicting
+        )
+        victims = []
+        for user_id, manager in self._ledgers.items():
+            if not self._over_budget(ledgers, resident_bytes):
+                break
+            if user_id in self._pins or user_id in self._evicting:
+                continue
+            victims.append((user_id, manager))
+            ledgers -= 1
+            resident_bytes -= self._sizes[user_id]
+        self._evicting.update(user_id for user_id, _ in victims)
+        return victims
+
+    def _evict(self) -> None:
+        """Flush, close and drop least recently used unpinned ledgers.
+
+        Runs while the pool is over budget. Must be called without holding
+        the pool lock. A ledger acquired again while it is being flushed
+        stays resident, as does one whose flush or close fails.
+        """
+        with self._lock:
+            victims = self._victims()
+        for user_id, manager in victims:
+            try:
+                manager.flush()
+            except Exception:
+                logger.exception("Could not flush ledger of %s; keeping it", user_id)
+                flushed = False
+            else:
+                flushed = True
+            with self._lock:
+                self._evicting.discard(user_id)
+                if not (
+                    flushed
+                    and user_id not in self._pins
+                    and not manager.dirty
+                    and self._ledgers.get(user_id) is manager
+                ):
+                    continue
+                try:
+                    manager.close()  # release the engine's files or connection
+                except Exception:
+                    logger.exception(
+                        "Could not close ledger of %s; keeping it", user_id
+                    )
+                    continue
+                del self._ledgers[user_id]
+                self._resident_bytes -= self._sizes.pop(user_id)
@@ -0,0 +1,147 @@
+"""Opt-in request profiling for the Expense Tracker web interface.
+
+Profiling is enabled with the ``PROFILING_ENABLED`` config flag and then
+triggered per request by sending the ``PROFILING_HEADER`` header. When the flag
+is off no hooks are registered at all, so normal requests pay nothing.
+
+Two modes are supported:
+
+* ``cprofile`` wraps the request in :mod:`cProfile` and writes a ``.prof``
+  file that can be opened with :mod:`pstats` or snakeviz.
+* ``sampling`` samples the request thread's stack at a fixed interval and
+  writes a ``.collapsed`` file that flamegraph tools consume directly.
+"""
+import cProfile
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Optional
+
+from flask import Flask, g, request
+
+from expense_tracker.web.config import (
+    PROFILING_DIR,
+    PROFILING_HEADER,
+    PROFILING_MODE,
+    PROFILING_SAMPLE_INTERVAL,
+)
+
+
+class StackSampler:
+    """Sample one thread's call stack into collapsed-stack counts."""
+
+    def __init__(self, thread_id: int, interval: float = PROFILING_SAMPLE_INTERVAL):
+        """Initialize the sampler.
+
+        Args:
+            thread_id: Identifier of the thread to sample
+            interval: Seconds between samples
+        """
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self) -> None:
+        """Start sampling in a background thread."""
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop sampling and wait for the sampler thread to exit."""
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        """Collect samples until stopped."""
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(
+                    f"{code.co_name} ({os.path.basename(code.co_filename)}"
+                    f":{code.co_firstlineno})"
+                )
+                frame = frame.f_back
+            self.stacks[";".join(reversed(names))] += 1
+
+    def dump(self, path: str) -> None:
+        """Write the samples in collapsed-stack format."""
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+def _profile_path(app: Flask, extension: str) -> str:
+    """Build a unique output path for the current request."""
+    directory = app.config.get("PROFILING_DIR", PROFILING_DIR)
+    os.makedirs(directory, exist_ok=True)
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", request.path).strip("_") or "root"
+    name = f"{time.strftime('%Y%m%d-%H%M%S')}-{time.perf_counter_ns()}"
+    return os.path.join(directory, f"{name}-{request.method}-{slug}.{extension}")
+
+
+def _stop_profiler(app: Flask) -> Optional[str]:
+    """Stop the active profiler, if any, and write its output file."""
+    profiler = g.pop("profiler", None)
+    if profiler is None:
+        return None
+    if isinstance(profiler, StackSampler):
+        profiler.stop()
+        path = _profile_path(app, "collapsed")
+        profiler.dump(path)
+    else:
+        profiler.disable()
+        path = _profile_path(app, "prof")
+        profiler.dump_stats(path)
+    app.logger.info("Wrote request profile to %s", path)
+    return path
+
+
+def init_profiling(app: Flask) -> None:
+    """Register profiling hooks on the app when profiling is enabled.
+
+    Args:
+        app: Flask application to instrument
+    """
+    if not app.config.get("PROFILING_ENABLED"):
+        return
+
+    header = app.config.get("PROFILING_HEADER", PROFILING_HEADER)
+    token = app.config.get("PROFILING_TOKEN")
+
+    @app.before_request
+    def start_profiler():
+        """Start profiling if the request asked for it."""
+        value = request.headers.get(header)
+        if not value or (token and value != token):
+            return
+        if app.config.get("PROFILING_MODE", PROFILING_MODE) == "sampling":
+            profiler = StackSampler(
+                threading.get_ident(),
+                app.config.get("PROFILING_SAMPLE_INTERVAL", PROFILING_SAMPLE_INTERVAL),
+            )
+            profiler.start()
+        else:
+            profiler = cProfile.Profile()
+            profiler.enable()
+        g.profiler = profiler
+
+    @app.after_request
+    def stop_profiler(response):
+        """Stop profiling and report where the profile was written."""
+        path = _stop_profiler(app)
+        if path is not None:
+            response.headers["X-Profile-File"] = os.path.basename(path)
+        return response
+
+    @app.teardown_request
+    def discard_profiler(exc):
+        """Make sure a profiler never outlives a failed request."""
+        _stop_profiler(app)
@@ -14,6 +14,11 @@ setup(
         "matplotlib>=3.7.1",
         "python-dotenv>=1.0.0",
     ],
+    entry_points={
+        "console_scripts": [
+            "expense-tracker=expense_tracker.cli:main",
+        ],
+    },
     extras_require={
         "dev": [
             "pre-commit>=3.5.0",
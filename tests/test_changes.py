@@ -0,0 +1,104 @@
+"""Unit tests for the ledger change feed."""
+import tempfile
+from decimal import Decimal
+from unittest import TestCase, main
+
+from expense_tracker.models.changes import ChangeFeed, ChangeFeedGap, ChangeType
+from expense_tracker.models.expense import Expense
+from expense_tracker.models.expense_manager import ExpenseManager
+
+
+class TestChangeFeed(TestCase):
+    """Test cases for the ChangeFeed class."""
+
+    def test_sequences_and_resume(self):
+        """Test that subscribers can resume after a sequence number."""
+        feed = ChangeFeed(history=3)
+        for _ in range(4):
+            feed.publish(ChangeType.RELOADED)
+        self.assertEqual(feed.sequence, 4)
+        self.assertEqual([e.sequence for e in feed.events_since(2)], [3, 4])
+
+        seen = []
+        feed.subscribe(lambda event: seen.append(event.sequence), since=1)
+        feed.publish(ChangeType.RELOADED)
+        self.assertEqual(seen, [2, 3, 4, 5])
+
+        with self.assertRaises(ChangeFeedGap):
+            feed.events_since(0)  # event 1 left the history
+        with self.assertRaises(ChangeFeedGap):
+            feed.events_since(9)  # never issued by this feed
+
+    def test_queue_subscription_and_unsubscribe(self):
+        """Test queued delivery and that unsubscribing stops it."""
+        feed = ChangeFeed()
+        subscription = feed.subscribe_queue()
+        feed.publish(ChangeType.RELOADED)
+        feed.publish(ChangeType.RELOADED)
+        self.assertEqual([e.sequence for e in subscription.drain()], [1, 2])
+        subscription.unsubscribe()
+        feed.publish(ChangeType.RELOADED)
+        self.assertEqual(subscription.drain(), [])
+
+    def test_failing_subscriber_does_not_block_others(self):
+        """Test that one raising callback does not stop delivery."""
+        feed = ChangeFeed()
+        seen = []
+        feed.subscribe(lambda event: 1 / 0)
+        feed.subscribe(seen.append)
+        with self.assertLogs("expense_tracker.models.changes", "ERROR"):
+            feed.publish(ChangeType.RELOADED)
+        self.assertEqual(len(seen), 1)
+
+
+class TestManagerChanges(TestCase):
+    """Test cases for the events published by ExpenseManager."""
+
+    def setUp(self):
+        """Create a manager backed by a temporary directory."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.manager = ExpenseManager(self.tmpdir.name)
+        self.events = self.manager.changes.subscribe_queue()
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        self.tmpdir.cleanup()
+
+    def test_mutations_publish_typed_events(self):
+        """Test the events for an add, update, delete and reload."""
+        expense = self.manager.add_expense(Expense(Decimal("1"), "Food", "One"))
+        replacement = Expense(Decimal("2"), "Food", "Two")
+        self.manager.update_expense(expense.id, replacement)
+        self.manager.delete_expense(expense.id)
+        self.manager.reload()
+
+        events = self.events.drain()
+        self.assertEqual(
+            [e.type for e in events],
+            [
+                ChangeType.ADDED,
+                ChangeType.UPDATED,
+                ChangeType.DELETED,
+                ChangeType.RELOADED,
+            ],
+        )
+        self.assertEqual([e.sequence for e in events], [1, 2, 3, 4])
+        self.assertEqual(events[1].previous.description, "One")
+        self.assertIs(events[1].expense, replacement)
+
+    def test_transaction_publishes_on_commit_only(self):
+        """Test that events wait for commit and vanish on rollback."""
+        with self.manager.transaction():
+            self.manager.add_expense(Expense(Decimal("1"), "Food", "One"))
+            self.assertEqual(self.events.drain(), [])
+        self.assertEqual(len(self.events.drain()), 1)
+
+        with self.assertRaises(RuntimeError):
+            with self.manager.transaction():
+                self.manager.add_expense(Expense(Decimal("2"), "Food", "Two"))
+                raise RuntimeError("abort")
+        self.assertEqual(self.events.drain(), [])
+
+
+if __name__ == "__main__":
+    main()
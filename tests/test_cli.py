@@ -1,18 +1,45 @@
 """Unit tests for the CLI module."""
 import io
+import json
+from datetime import datetime
 from decimal import Decimal
 from unittest import TestCase, main
 from unittest.mock import MagicMock, patch
 
+from expense_tracker import cli
 from expense_tracker.cli import (
     create_parser,
     format_expense,
     handle_add,
+    handle_dedupe,
     handle_delete,
+    handle_histogram,
     handle_list,
+    handle_query,
+    handle_search,
     handle_stats,
+    period_keys,
 )
 from expense_tracker.models.expense import Expense
+from expense_tracker.models.histograms import AmountHistogram
+from expense_tracker.models.query import QuerySyntaxError
+from expense_tracker.models.rollups import DailyRollup
+
+
+def _fake_iter_expenses(expenses):
+    """Mimic ExpenseManager.iter_expenses over a fixed list."""
+
+    def iter_expenses(start=None, end=None, category=None, newest_first=False):
+        ordered = sorted(expenses, key=lambda e: e.date, reverse=newest_first)
+        return iter(
+            e
+            for e in ordered
+            if (category is None or e.category == category)
+            and (start is None or e.date >= start)
+            and (end is None or e.date < end)
+        )
+
+    return iter_expenses
 
 
 class TestCLI(TestCase):
@@ -89,7 +116,7 @@ class TestCLI(TestCase):
                 description="Bus fare",
             ),
         ]
-        self.manager.get_expenses.return_value = expenses
+        self.manager.iter_expenses.side_effect = _fake_iter_expenses(expenses)
 
         with patch("sys.stdout", new=io.StringIO()) as mock_stdout:
             handle_list(args, self.manager)
@@ -116,7 +143,7 @@ class TestCLI(TestCase):
                 description="Bus fare",
             ),
         ]
-        self.manager.get_expenses.return_value = expenses
+        self.manager.iter_expenses.side_effect = _fake_iter_expenses(expenses)
 
         with patch("sys.stdout", new=io.StringIO()) as mock_stdout:
             handle_list(args, self.manager)
@@ -126,16 +153,137 @@ class TestCLI(TestCase):
         self.assertNotIn("$30.00", output)
         self.assertIn("Total: $50.25", output)
 
+    def _dated_expenses(self):
+        return [
+            Expense(
+                id=i,
+                amount=Decimal(amount),
+                category=category,
+                description=f"Item {i}",
+                date=datetime(2024, 1, i),
+            )
+            for i, (amount, category) in enumerate(
+                [("5", "Food"), ("40", "Bills"), ("15", "Food"), ("25", "Transport")],
+                start=1,
+            )
+        ]
+
+    def _run_list(self, argv):
+        args = self.parser.parse_args(["list"] + argv)
+        self.manager.iter_expenses.side_effect = _fake_iter_expenses(
+            self._dated_expenses()
+        )
+        with patch("sys.stdout", new=io.StringIO()) as mock_stdout:
+            handle_list(args, self.manager)
+        return mock_stdout.getvalue()
+
+    def test_list_limit_offset_newest_first(self):
+        """Test paging through the newest expenses."""
+        output = self._run_list(["--reverse", "--limit", "2", "--offset", "1"])
+        lines = output.splitlines()
+        self.assertIn("Item 3", lines[0])
+        self.assertIn("Item 2", lines[1])
+        self.assertIn("Total: $55.00", output)
+        self.assertNotIn("Item 4", output)
+
+    def test_list_rejects_negative_counts(self):
+        """Test that negative --limit and --offset are usage errors."""
+        for argv in (["--limit", "-1"], ["--offset", "-2"], ["--limit", "x"]):
+            with patch("sys.stderr", new=io.StringIO()):
+                with self.assertRaises(SystemExit):
+                    self.parser.parse_args(["list"] + argv)
+        args = self.parser.parse_args(["list", "--limit", "0"])
+        self.assertEqual(args.limit, 0)
+
+    def test_list_top_amounts(self):
+        """Test selecting the largest amounts with a limit."""
+        output = self._run_list(["--sort", "amount", "--reverse", "--limit", "2"])
+        lines = output.splitlines()
+        self.assertIn("$40.00", lines[0])
+        self.assertIn("$25.00", lines[1])
+        self.assertIn("Total: $65.00", output)
+
+    def test_list_date_bounds(self):
+        """Test that --since and --until are inclusive days."""
+        output = self._run_list(["--since", "2024-01-02", "--until", "2024-01-03"])
+        self.assertIn("Item 2", output)
+        self.assertIn("Item 3", output)
+        self.assertNotIn("Item 1", output)
+        self.assertNotIn("Item 4", output)
+
+    def test_list_json_format(self):
+        """Test JSON output."""
+        data = json.loads(self._run_list(["--format", "json", "--limit", "2"]))
+        self.assertEqual([item["amount"] for item in data], ["5", "40"])
+
+    def test_list_csv_format(self):
+        """Test CSV output."""
+        lines = self._run_list(["--format", "csv", "--category", "Food"]).splitlines()
+        self.assertEqual(lines[0], "id,date,amount,category,description")
+        self.assertEqual(len(lines), 3)
+
+    def test_query_expenses(self):
+        """Test listing expenses that match a filter expression."""
+        args = self.parser.parse_args(
+            ["query", "amount > 10 and category = Food", "--format", "json"]
+        )
+        self.manager.iter_query.return_value = iter(
+            e for e in self._dated_expenses() if e.amount > 10 and e.category == "Food"
+        )
+        with patch("sys.stdout", new=io.StringIO()) as mock_stdout:
+            handle_query(args, self.manager)
+
+        self.manager.iter_query.assert_called_once_with(
+            "amount > 10 and category = Food", newest_first=False
+        )
+        self.assertTrue(json.loads(mock_stdout.getvalue()))
+
+    def test_query_limit_stops_the_scan(self):
+        """Test that --limit stops reading matches once it has enough."""
+        args = self.parser.parse_args(["query", "amount > 0", "--limit", "2"])
+        expenses = self._dated_expenses()
+
+        def matches():
+            yield from expenses[:2]
+            raise AssertionError("read past the limit")
+
+        self.manager.iter_query.return_value = matches()
+        with patch("sys.stdout", new=io.StringIO()) as mock_stdout:
+            handle_query(args, self.manager)
+        self.assertIn(f"[{expenses[1].id}]", mock_stdout.getvalue())
+
+    def test_query_syntax_error(self):
+        """Test that malformed queries exit with an error."""
+        args = self.parser.parse_args(["query", "amount >"])
+        self.manager.iter_query.side_effect = QuerySyntaxError(
+            "Unexpected end of query"
+        )
+        with patch("sys.stderr", new=io.StringIO()) as mock_stderr:
+            with self.assertRaises(SystemExit):
+                handle_query(args, self.manager)
+        self.assertIn("Error:", mock_stderr.getvalue())
+
+    def test_search_expenses(self):
+        """Test searching descriptions."""
+        args = self.parser.parse_args(["search", "ite", "--limit", "1"])
+        self.manager.search.return_value = self._dated_expenses()[:1]
+        with patch("sys.stdout", new=io.StringIO()) as mock_stdout:
+            handle_search(args, self.manager)
+
+        self.manager.search.assert_called_once_with("ite", prefix=True, limit=1)
+        self.assertEqual(mock_stdout.getvalue().count("Item"), 1)
+
     def test_delete_expense(self):
         """Test deleting an expense."""
-        args = self.parser.parse_args(["delete", "1"])
+        expense_id = "01890a5d-ac96-774b-bcce-b302099a8057"
+        args = self.parser.parse_args(["delete", expense_id])
 
         with patch("sys.stdout", new=io.StringIO()) as mock_stdout:
             handle_delete(args, self.manager)
             output = mock_stdout.getvalue()
 
-        self.manager.delete_expense.assert_called_once_with(1)
-        self.assertIn("Deleted expense with ID: 1", output)
+        self.manager.delete_expense.assert_called_once_with(expense_id)
+        self.assertIn(f"Deleted expense with ID: {expense_id}", output)
 
     def test_delete_nonexistent_expense(self):
         """Test deleting a nonexistent expense."""
@@ -166,7 +314,9 @@ class TestCLI(TestCase):
                 description="Bus fare",
             ),
         ]
-        self.manager.get_expenses.return_value = expenses
+        rollup = DailyRollup()
+        rollup.rebuild(expenses)
+        self.manager.query_stats.return_value = rollup.query()
 
         with patch("sys.stdout", new=io.StringIO()) as mock_stdout:
             handle_stats(args, self.manager)
@@ -178,6 +328,129 @@ class TestCLI(TestCase):
         self.assertIn("62.6%", output)  # Food percentage
         self.assertIn("37.4%", output)  # Transport percentage
 
+    def test_stats_by_month(self):
+        """Test the period-by-category table with month-over-month changes."""
+        args = self.parser.parse_args(["stats", "--by", "month"])
+        expenses = [
+            Expense(Decimal("10.00"), "Food", "Lunch", date=datetime(2024, 1, 5)),
+            Expense(Decimal("30.00"), "Bills", "Power", date=datetime(2024, 1, 9)),
+            Expense(Decimal("20.00"), "Food", "Dinner", date=datetime(2024, 3, 2)),
+        ]
+        rollup = DailyRollup()
+        rollup.rebuild(expenses)
+        self.manager.query_stats.return_value = rollup.query(
+            group_by=["month", "category"]
+        )
+
+        with patch("sys.stdout", new=io.StringIO()) as mock_stdout:
+            handle_stats(args, self.manager)
+            lines = mock_stdout.getvalue().splitlines()
+
+        self.manager.query_stats.assert_called_once_with(
+            start=None, end=None, group_by=["month", "category"], categories=None
+        )
+        self.assertEqual(
+            lines[0].split(), ["Period", "Bills", "Food", "Total", "Change"]
+        )
+        self.assertEqual(
+            lines[1].split(), ["2024-01", "$30.00", "$10.00", "$40.00", "-"]
+        )
+        self.assertEqual(
+            lines[2].split(), ["2024-02", "-", "-", "$0.00", "-40.00", "(-100.0%)"]
+        )
+        self.assertEqual(
+            lines[3].split(), ["2024-03", "-", "$20.00", "$20.00", "+20.00"]
+        )
+        self.assertIn("Total expenses: $60.00", lines[-1])
+
+    def test_period_keys_cross_year_ends(self):
+        """Test that empty periods are filled in across year boundaries."""
+        self.assertEqual(
+            period_keys("2020-W52", "2021-W02", "week"),
+            ["2020-W52", "2020-W53", "2021-W01", "2021-W02"],
+        )
+        self.assertEqual(
+            period_keys("2023-12-31", "2024-01-01", "day"),
+            ["2023-12-31", "2024-01-01"],
+        )
+        self.assertEqual(period_keys("2023", "2025", "year"), ["2023", "2024", "2025"])
+
+    def test_stats_quantiles_and_distinct(self):
+        """Test the sketch-backed quantile and distinct-description output."""
+        args = self.parser.parse_args(
+            ["stats", "--quantiles", "--distinct", "--exact", "--category", "Food"]
+        )
+        rollup = DailyRollup()
+        rollup.rebuild([Expense(Decimal("10.00"), "Food", "Lunch")])
+        self.manager.query_stats.return_value = rollup.query()
+        self.manager.amount_quantiles.return_value = {
+            "Food": {0.5: Decimal("10.00"), 0.9: Decimal("12.50")}
+        }
+        self.manager.distinct_descriptions.return_value = {"2024-01": 3}
+
+        with patch("sys.stdout", new=io.StringIO()) as mock_stdout:
+            handle_stats(args, self.manager)
+            lines = mock_stdout.getvalue().splitlines()
+
+        self.manager.amount_quantiles.assert_called_once_with(
+            start=None, end=None, categories=["Food"], exact=True
+        )
+        self.assertIn(["Category", "p50", "p90"], [line.split() for line in lines])
+        self.assertIn(["Food", "$10.00", "$12.50"], [line.split() for line in lines])
+        self.assertEqual(lines[-1], "2024-01: 3")
+
+    def test_histogram(self):
+        """Test the histogram command's bars and grouping."""
+        args = self.parser.parse_args(["histogram", "--by", "year"])
+        histogram = AmountHistogram()
+        for cents in (150, 120, 700):
+            histogram.add(cents)
+        self.manager.amount_histograms.return_value = {("2024", "Food"): histogram}
+
+        with patch("sys.stdout", new=io.StringIO()) as mock_stdout:
+            handle_histogram(args, self.manager)
+            lines = mock_stdout.getvalue().splitlines()
+
+        self.manager.amount_histograms.assert_called_once_with(
+            start=None, end=None, categories=None, group_by=["year", "category"]
+        )
+        self.assertEqual(lines[0], "2024 / Food (3 expenses)")
+        self.assertEqual(lines[1].split(), ["$1.00", "-", "$2.00", "#" * 40, "2"])
+        self.assertEqual(lines[2].split(), ["$2.00", "-", "$5.00", "0"])
+        self.assertEqual(lines[3].split(), ["$5.00", "-", "$10.00", "#" * 20, "1"])
+
+    def test_dedupe(self):
+        """Test the duplicate report."""
+        args = self.parser.parse_args(["dedupe", "--window", "1"])
+        group = [
+            Expense(Decimal("3.50"), "Food", "Cafe", datetime(2024, 1, 5), id="a"),
+            Expense(Decimal("3.50"), "Food", "CAFE", datetime(2024, 1, 6), id="b"),
+        ]
+        self.manager.duplicate_groups.return_value = [group]
+
+        with patch("sys.stdout", new=io.StringIO()) as mock_stdout:
+            handle_dedupe(args, self.manager)
+            lines = mock_stdout.getvalue().splitlines()
+
+        self.manager.duplicate_groups.assert_called_once_with(window_days=1)
+        self.assertEqual(lines[0], "2 x $3.50 Cafe:")
+        self.assertEqual(lines[1], f"  {format_expense(group[0])}")
+        self.assertEqual(lines[-1], "1 groups, 1 possible duplicates")
+
+        self.manager.duplicate_groups.return_value = []
+        with patch("sys.stdout", new=io.StringIO()) as mock_stdout:
+            handle_dedupe(args, self.manager)
+            self.assertEqual(mock_stdout.getvalue(), "No duplicates found.\n")
+
+    def test_workers_reach_the_manager(self):
+        """Test that --workers lets a migration load the ledger in parallel."""
+        argv = ["--workers", "4", "migrate", "legacy.json", "--data-dir", "ledger"]
+        with patch("expense_tracker.cli.ExpenseManager") as manager_class, patch(
+            "expense_tracker.cli.migrate.migrate_legacy"
+        ), patch("sys.stdout", new=io.StringIO()):
+            cli.main(argv)
+        manager_class.assert_called_once_with("ledger", rebuild_workers=4)
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,89 @@
+"""Unit tests for the CLI daemon."""
+import os
+import socket
+import tempfile
+import threading
+from decimal import Decimal
+from unittest import TestCase, main
+
+from expense_tracker.cli import run_argv
+from expense_tracker.daemon import CLIDaemon, forward, ledger_url
+from expense_tracker.models.expense import Expense
+from expense_tracker.models.expense_manager import ExpenseManager
+
+
+class TestDaemon(TestCase):
+    """Test cases for forwarding CLI commands to a daemon."""
+
+    def setUp(self):
+        """Start a daemon on a temporary socket."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.socket_path = os.path.join(self.tmpdir.name, "cli.sock")
+        self.manager = ExpenseManager(self.tmpdir.name)
+        self.manager.add_expense(Expense(Decimal("50.25"), "Food", "Lunch"))
+        self.server = CLIDaemon(self.socket_path, self.manager, run_argv)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+
+    def tearDown(self):
+        """Stop the daemon and remove temporary files."""
+        self.server.shutdown()
+        self.thread.join()
+        self.server.server_close()
+        self.tmpdir.cleanup()
+
+    def test_forward_runs_command_on_warm_manager(self):
+        """Test that forwarded commands return the command's output."""
+        response = forward(["stats"], self.socket_path)
+        self.assertEqual(response["code"], 0)
+        self.assertIn("Food: $50.25", response["stdout"])
+
+    def test_forward_reports_exit_code_and_stderr(self):
+        """Test that command errors are relayed to the client."""
+        response = forward(["add", "invalid", "Food", "Lunch"], self.socket_path)
+        self.assertEqual(response["code"], 1)
+        self.assertIn("Invalid amount format", response["stderr"])
+
+    def test_daemon_picks_up_external_changes(self):
+        """Test that the daemon reloads when the ledger changes on disk."""
+        other = ExpenseManager(self.tmpdir.name)
+        other.add_expense(Expense(Decimal("30.00"), "Transport", "Bus fare"))
+
+        response = forward(["stats"], self.socket_path)
+        self.assertIn("Transport: $30.00", response["stdout"])
+
+    def test_forward_without_daemon_returns_none(self):
+        """Test fallback when no daemon is listening."""
+        missing = os.path.join(self.tmpdir.name, "missing.sock")
+        self.assertIsNone(forward(["stats"], missing))
+
+    def test_forward_requires_the_same_ledger(self):
+        """Test that a daemon serving another ledger runs nothing."""
+        other = ExpenseManager(os.path.join(self.tmpdir.name, "other"))
+        self.assertIsNone(
+            forward(["add", "1", "Food", "Tea"], self.socket_path, ledger_url(other))
+        )
+        self.assertEqual(len(self.manager.get_expenses()), 1)
+
+        response = forward(["stats"], self.socket_path, ledger_url(self.manager))
+        self.assertEqual(response["ledger"], ledger_url(self.manager))
+        self.assertIn("Food: $50.25", response["stdout"])
+
+    def test_refuses_to_replace_a_running_daemon(self):
+        """Test that a second daemon does not take over a live socket."""
+        with self.assertRaises(OSError):
+            CLIDaemon(self.socket_path, self.manager, run_argv)
+        self.assertEqual(forward(["stats"], self.socket_path)["code"], 0)
+
+    def test_replaces_a_stale_socket(self):
+        """Test that a socket file left by a dead daemon is reused."""
+        path = os.path.join(self.tmpdir.name, "stale.sock")
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(path)
+        stale.close()
+        server = CLIDaemon(path, self.manager, run_argv)
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
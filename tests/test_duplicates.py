@@ -0,0 +1,142 @@
+"""Unit tests for duplicate detection."""
+import json
+import tempfile
+from datetime import datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+from unittest import TestCase, main
+
+from expense_tracker import migrate
+from expense_tracker.models.duplicates import match_description
+from expense_tracker.models.expense import Expense
+from expense_tracker.models.expense_manager import ExpenseManager
+
+
+def statement(start: datetime, days: int):
+    """Return one bank-statement row per day, as fresh Expense objects."""
+    return [
+        Expense(
+            Decimal("3.50") + day,
+            "Food",
+            f"CARD PAYMENT {1000 + day} Cafe #{day % 3}",
+            start + timedelta(days=day, hours=9),
+        )
+        for day in range(days)
+    ]
+
+
+class TestDuplicates(TestCase):
+    """Test cases for duplicate detection on ExpenseManager."""
+
+    def setUp(self):
+        """Create a manager in a temporary directory."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.manager = ExpenseManager(self.tmpdir.name)
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        self.tmpdir.cleanup()
+
+    def test_match_description(self):
+        """Test that case, punctuation and reference numbers are ignored."""
+        self.assertEqual(match_description("TESCO STORES 2041"), "tesco stores")
+        self.assertEqual(match_description("Tesco-Stores."), "tesco stores")
+        self.assertEqual(match_description("7-Eleven"), "7 eleven")
+
+    def test_find_duplicates_within_window(self):
+        """Test the date tolerance and the exact amount match."""
+        original = self.manager.add_expense(
+            Expense(Decimal("12.00"), "Food", "Tesco 1142", datetime(2024, 3, 10))
+        )
+        for days, amount, found in [
+            (2, "12.00", True),
+            (-2, "12.00", True),
+            (3, "12.00", False),
+            (0, "12.01", False),
+        ]:
+            candidate = Expense(
+                Decimal(amount),
+                "Food",
+                "TESCO 9921",
+                datetime(2024, 3, 10) + timedelta(days=days),
+            )
+            self.assertEqual(
+                self.manager.find_duplicates(candidate), [original] if found else []
+            )
+        self.assertEqual(self.manager.find_duplicates(original), [])
+
+    def test_overlapping_import_is_skipped(self):
+        """Test that only the overlap of a second statement is skipped."""
+        self.manager.add_expenses(statement(datetime(2024, 1, 1), 20))
+        second = statement(datetime(2024, 1, 1), 30)[10:]  # 10 rows overlap
+        second[0].date += timedelta(days=1)  # posted a day later
+        found = self.manager.add_expenses(second, duplicates="skip")
+        self.assertEqual([new for new, _ in found], second[:10])
+        self.assertEqual(len(self.manager.get_expenses()), 30)
+        self.assertEqual(len(ExpenseManager(self.tmpdir.name).get_expenses()), 30)
+
+    def test_each_existing_expense_matches_once(self):
+        """Test that a second identical row is flagged only if it has a pair."""
+        coffee = Expense(Decimal("3.00"), "Food", "Coffee", datetime(2024, 5, 1))
+        self.manager.add_expense(coffee)
+        rows = [
+            Expense(Decimal("3.00"), "Food", "coffee", datetime(2024, 5, 1)),
+            Expense(Decimal("3.00"), "Food", "coffee", datetime(2024, 5, 1)),
+        ]
+        found = self.manager.add_expenses(rows, duplicates="flag")
+        self.assertEqual(found, [(rows[0], coffee)])
+        self.assertEqual(len(self.manager.get_expenses()), 3)
+        with self.assertRaises(ValueError):
+            self.manager.add_expenses(rows, duplicates="merge")
+
+    def test_duplicate_groups(self):
+        """Test grouping, and that deleted expenses leave their group."""
+        first = statement(datetime(2024, 2, 1), 5)
+        second = statement(datetime(2024, 2, 1), 5)
+        self.manager.add_expenses(first + second)
+        groups = self.manager.duplicate_groups()
+        self.assertEqual(len(groups), 5)
+        self.assertEqual([len(group) for group in groups], [2] * 5)
+        self.assertEqual(groups[0][0].date, datetime(2024, 2, 1, 9))
+
+        for expense in second:
+            self.manager.delete_expense(expense.id)
+        self.assertEqual(self.manager.duplicate_groups(), [])
+
+    def test_migration_skips_duplicates(self):
+        """Test the migrate option for statements already in the ledger."""
+        self.manager.add_expense(
+            Expense(Decimal("8.25"), "Bills", "Phone", datetime(2024, 1, 2, 8))
+        )
+        source = Path(self.tmpdir.name) / "legacy.json"
+        source.write_text(
+            json.dumps(
+                [
+                    {
+                        "id": 1,
+                        "amount": "8.25",
+                        "category": "Bills",
+                        "description": "PHONE",
+                        "date": "2024-01-03 12:00:00",
+                    },
+                    {
+                        "id": 2,
+                        "amount": "4.00",
+                        "category": "Food",
+                        "description": "Lunch",
+                        "date": "2024-01-03 13:00:00",
+                    },
+                ]
+            )
+        )
+        report = migrate.migrate_legacy(str(source), self.manager, duplicates="skip")
+        self.assertEqual((report.records, report.duplicates), (1, 1))
+        self.assertIn("1 duplicates", report.summary())
+        descriptions = sorted(
+            e.description for e in ExpenseManager(self.tmpdir.name).get_expenses()
+        )
+        self.assertEqual(descriptions, ["Lunch", "Phone"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+"""Unit tests for the models ExpenseManager."""
+import json
+import tempfile
+import threading
+from datetime import datetime
+from decimal import Decimal
+from unittest import TestCase, main
+from unittest.mock import patch
+
+from expense_tracker.models.expense import Expense
+from expense_tracker.models.expense_manager import ConflictError, ExpenseManager
+from expense_tracker.services.storage import JSONStorage
+
+
+class TestExpenseManager(TestCase):
+    """Test cases for the ExpenseManager class."""
+
+    def setUp(self):
+        """Create a manager backed by a temporary directory."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.manager = ExpenseManager(self.tmpdir.name)
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        self.tmpdir.cleanup()
+
+    def test_add_without_loading_appends(self):
+        """Test that adding to an unloaded ledger never parses it."""
+        self.manager.add_expense(Expense(Decimal("1"), "Food", "Seed"))
+        writer = ExpenseManager(self.tmpdir.name)
+
+        with patch.object(JSONStorage, "load_expenses") as load:
+            expense = writer.add_expense(
+                amount=Decimal("50.25"), category="Food", description="Lunch"
+            )
+        load.assert_not_called()
+        self.assertFalse(writer.loaded)
+
+        reloaded = ExpenseManager(self.tmpdir.name).get_expenses()
+        self.assertEqual(len(reloaded), 2)
+        self.assertIn(expense.id, {e.id for e in reloaded})
+
+    def test_appended_file_matches_full_save(self):
+        """Test that appending yields the same layout as a full rewrite."""
+        for i in range(3):
+            self.manager.add_expense(Expense(Decimal(i), "Food", f"Item {i}"))
+        appended = self.manager.expenses_file.read_text()
+
+        self.manager.flush()
+        self.manager._save_expenses()
+        self.assertEqual(self.manager.expenses_file.read_text(), appended)
+        self.assertEqual(len(json.loads(appended)), 3)
+
+    def test_ids_stay_unique_after_delete(self):
+        """Test that ids do not depend on the number of rows."""
+        first = self.manager.add_expense(Expense(Decimal("1"), "Food", "One"))
+        self.manager.add_expense(Expense(Decimal("2"), "Food", "Two"))
+        self.manager.delete_expense(first.id)
+        third = self.manager.add_expense(Expense(Decimal("3"), "Food", "Three"))
+
+        ids = [e.id for e in self.manager.get_expenses()]
+        self.assertEqual(len(ids), len(set(ids)))
+        self.assertIn(third.id, ids)
+
+    def test_iter_expenses_date_range(self):
+        """Test half-open date ranges in both directions."""
+        for day in (3, 1, 2, 4):
+            self.manager.add_expense(
+                Expense(Decimal(day), "Food", f"Day {day}", date=datetime(2024, 1, day))
+            )
+        found = self.manager.iter_expenses(
+            start=datetime(2024, 1, 2), end=datetime(2024, 1, 4), newest_first=True
+        )
+        self.assertEqual([e.description for e in found], ["Day 3", "Day 2"])
+
+        self.manager.delete_expense(self.manager.get_expenses()[0].id)
+        self.assertEqual(
+            [e.description for e in self.manager.iter_expenses()],
+            ["Day 1", "Day 2", "Day 3"],
+        )
+
+    def test_add_requires_fields(self):
+        """Test that keyword adds need amount, category and description."""
+        with self.assertRaises(ValueError):
+            self.manager.add_expense(amount=Decimal("1"), category="Food")
+
+    def test_transaction_persists_once(self):
+        """Test that a transaction writes all of its changes together."""
+        old = self.manager.add_expense(Expense(Decimal("1"), "Food", "Old"))
+        real_save = JSONStorage.save_expenses
+        with patch.object(
+            JSONStorage, "save_expenses", autospec=True, side_effect=real_save
+        ) as save:
+            with self.manager.transaction():
+                self.manager.delete_expense(old.id)
+                self.manager.add_expense(Expense(Decimal("2"), "Food", "New"))
+                self.manager.add_expense(Expense(Decimal("3"), "Rent", "Newer"))
+                save.assert_not_called()
+        save.assert_called_once()
+
+        reloaded = ExpenseManager(self.tmpdir.name)
+        self.assertEqual(
+            [e.description for e in reloaded.iter_expenses()], ["New", "Newer"]
+        )
+
+    def test_transaction_rolls_back_on_error(self):
+        """Test that a failed transaction restores memory and indexes."""
+        kept = self.manager.add_expense(
+            Expense(Decimal("5"), "Food", "Coffee beans", date=datetime(2024, 1, 1))
+        )
+        before = self.manager.expenses_file.read_text()
+        stats = self.manager.query_stats().to_dict()
+
+        with self.assertRaises(RuntimeError):
+            with self.manager.transaction():
+                self.manager.delete_expense(kept.id)
+                self.manager.add_expense(Expense(Decimal("7"), "Rent", "Flat"))
+                self.assertEqual(self.manager.search("coffee"), [])
+                raise RuntimeError("abort")
+
+        self.assertEqual(self.manager.expenses_file.read_text(), before)
+        self.assertEqual(self.manager.get_expenses(), [kept])
+        self.assertEqual(self.manager.search("coffee"), [kept])
+        self.assertEqual(self.manager.query_stats().to_dict(), stats)
+        self.assertEqual(self.manager.query("category = rent"), [])
+
+    def test_transaction_on_unloaded_ledger_appends_once(self):
+        """Test that adds in a transaction still skip loading the ledger."""
+        self.manager.add_expense(Expense(Decimal("1"), "Food", "Seed"))
+        writer = ExpenseManager(self.tmpdir.name)
+        with patch.object(JSONStorage, "load_expenses") as load:
+            with writer.transaction():
+                writer.add_expenses([Expense(Decimal("2"), "Food", "A")])
+                writer.add_expenses([Expense(Decimal("3"), "Food", "B")])
+        load.assert_not_called()
+        self.assertEqual(len(ExpenseManager(self.tmpdir.name).get_expenses()), 3)
+
+    def test_versions_detect_conflicting_writes(self):
+        """Test that stale expected versions are rejected."""
+        expense = self.manager.add_expense(Expense(Decimal("1"), "Food", "One"))
+        self.assertEqual(expense.version, 1)
+
+        first = Expense(Decimal("2"), "Food", "Two")
+        self.assertTrue(self.manager.update_expense(expense.id, first, 1))
+        self.assertEqual(first.version, 2)
+
+        with self.assertRaises(ConflictError) as caught:
+            self.manager.update_expense(
+                expense.id, Expense(Decimal("3"), "Food", "Three"), 1
+            )
+        self.assertEqual(caught.exception.actual, 2)
+        with self.assertRaises(ConflictError):
+            self.manager.delete_expense(expense.id, expected_version=1)
+
+        reloaded = ExpenseManager(self.tmpdir.name)
+        self.assertEqual(reloaded.get_expense(expense.id).version, 2)
+        self.assertTrue(reloaded.delete_expense(expense.id, expected_version=2))
+
+    def test_writes_by_another_manager_are_seen(self):
+        """Test that a stale manager reloads instead of overwriting."""
+        expense = self.manager.add_expense(Expense(Decimal("1"), "Food", "One"))
+        self.manager.get_expenses()
+        other = ExpenseManager(self.tmpdir.name)
+        other.update_expense(expense.id, Expense(Decimal("2"), "Food", "Second"), 1)
+
+        with self.assertRaises(ConflictError):
+            self.manager.update_expense(
+                expense.id, Expense(Decimal("3"), "Food", "Three"), 1
+            )
+        self.manager.add_expense(Expense(Decimal("4"), "Food", "Four"))
+        amounts = sorted(
+            e.amount for e in ExpenseManager(self.tmpdir.name).get_expenses()
+        )
+        self.assertEqual(amounts, [Decimal("2"), Decimal("4")])
+
+    def test_concurrent_updates_one_wins(self):
+        """Test that two threads updating the same version cannot both pass."""
+        expense = self.manager.add_expense(Expense(Decimal("1"), "Food", "One"))
+        results = []
+
+        def update(amount):
+            try:
+                self.manager.update_expense(
+                    expense.id, Expense(Decimal(amount), "Food", "New"), 1
+                )
+                results.append(True)
+            except ConflictError:
+                results.append(False)
+
+        threads = [threading.Thread(target=update, args=(n,)) for n in "23"]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sorted(results), [False, True])
+        self.assertEqual(self.manager.get_expense(expense.id).version, 2)
+
+    def test_category_totals_follow_changes(self):
+        """Test that category totals are kept up to date by the rollup."""
+        food = self.manager.add_expense(Expense(Decimal("11.10"), "Food", "Lunch"))
+        self.manager.add_expense(Expense(Decimal("2"), "Bills", "Phone"))
+        self.manager.add_expense(Expense(Decimal("0.90"), "Food", "Tea"))
+        self.assertEqual(
+            self.manager.get_category_totals(),
+            {"Food": Decimal("12.00"), "Bills": Decimal("2")},
+        )
+        self.manager.delete_expense(food.id)
+        self.assertEqual(
+            self.manager.get_category_totals(),
+            {"Food": Decimal("0.90"), "Bills": Decimal("2")},
+        )
+
+    def test_transaction_excludes_other_threads(self):
+        """Test that another thread's change waits for an open transaction."""
+        started = threading.Event()
+
+        def add_from_thread():
+            started.set()
+            self.manager.add_expense(Expense(Decimal("2"), "Food", "Other"))
+
+        with self.manager.transaction():
+            self.manager.add_expense(Expense(Decimal("1"), "Food", "Mine"))
+            thread = threading.Thread(target=add_from_thread)
+            thread.start()
+            started.wait()
+            thread.join(0.2)
+            self.assertTrue(thread.is_alive())
+        thread.join()
+        self.assertEqual(
+            sorted(e.description for e in self.manager.get_expenses()),
+            ["Mine", "Other"],
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Unit tests for Fenwick-tree day totals."""
+import random
+import tempfile
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from unittest import TestCase, main
+
+from expense_tracker.models.expense import Expense
+from expense_tracker.models.expense_manager import ExpenseManager
+from expense_tracker.models.fenwick import DayTotals, FenwickTree
+
+
+class TestFenwickTree(TestCase):
+    """Test cases for the FenwickTree class."""
+
+    def test_prefix_sums(self):
+        """Test prefix sums against a plain list."""
+        values = [random.randint(-50, 50) for _ in range(100)]
+        tree = FenwickTree(len(values))
+        for index, value in enumerate(values):
+            tree.add(index, value)
+        for end in range(len(values) + 1):
+            self.assertEqual(tree.prefix_sum(end), sum(values[:end]))
+
+
+class TestDayTotals(TestCase):
+    """Test cases for the DayTotals class."""
+
+    def test_range_totals_match_brute_force(self):
+        """Test random ranges, including growth in both directions."""
+        totals = DayTotals()
+        amounts = {}
+        base = date(2024, 6, 1)
+        rng = random.Random(7)
+        for _ in range(500):
+            day = base + timedelta(days=rng.randint(-3000, 3000))
+            cents = rng.randint(-500, 5000)
+            totals.add(day, cents)
+            amounts[day] = amounts.get(day, 0) + cents
+
+        for _ in range(200):
+            start = base + timedelta(days=rng.randint(-3500, 3500))
+            end = start + timedelta(days=rng.randint(-5, 2000))
+            expected = sum(v for d, v in amounts.items() if start <= d <= end)
+            self.assertEqual(totals.total(start, end), expected)
+        self.assertEqual(totals.total(), sum(amounts.values()))
+        self.assertEqual(totals.total(end=base), sum(
+            v for d, v in amounts.items() if d <= base
+        ))
+
+    def test_series_includes_empty_days(self):
+        """Test the per-day series used by charts."""
+        totals = DayTotals()
+        totals.add(date(2024, 1, 2), 150)
+        self.assertEqual(
+            totals.series(date(2024, 1, 1), date(2024, 1, 3)),
+            [(date(2024, 1, 1), 0), (date(2024, 1, 2), 150), (date(2024, 1, 3), 0)],
+        )
+
+
+class TestManagerTotals(TestCase):
+    """Test cases for totals answered by ExpenseManager."""
+
+    def test_monthly_and_range_totals_follow_changes(self):
+        """Test that totals track adds, updates and deletes."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            manager = ExpenseManager(tmpdir)
+            jan = manager.add_expense(
+                Expense(Decimal("10.25"), "Food", "A", datetime(2024, 1, 31, 23, 59))
+            )
+            manager.add_expense(
+                Expense(Decimal("5"), "Food", "B", datetime(2024, 2, 1, 8))
+            )
+            self.assertEqual(manager.get_monthly_total(2024, 1), Decimal("10.25"))
+            self.assertEqual(manager.get_monthly_total(2024, 12), Decimal("0"))
+
+            manager.update_expense(
+                jan.id, Expense(Decimal("1"), "Food", "A", datetime(2024, 2, 2))
+            )
+            self.assertEqual(manager.get_monthly_total(2024, 1), Decimal("0"))
+            self.assertEqual(
+                manager.get_total_between(date(2024, 2, 1), date(2024, 2, 2)),
+                Decimal("6"),
+            )
+            self.assertEqual(manager.get_total_expenses(), Decimal("6"))
+            self.assertEqual(
+                manager.get_daily_totals(date(2024, 2, 1), date(2024, 2, 2)),
+                [(date(2024, 2, 1), Decimal("5")), (date(2024, 2, 2), Decimal("1"))],
+            )
+
+
+if __name__ == "__main__":
+    main()
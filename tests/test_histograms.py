@@ -0,0 +1,114 @@
+"""Unit tests for logarithmic amount histograms."""
+import random
+import tempfile
+from collections import Counter
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from unittest import TestCase, main
+
+from expense_tracker.models.expense import Expense
+from expense_tracker.models.expense_manager import ExpenseManager
+from expense_tracker.models.histograms import (
+    AmountHistogram,
+    bucket_bounds,
+    bucket_index,
+)
+from expense_tracker.models.rollups import to_cents
+
+
+class TestAmountHistogram(TestCase):
+    """Test cases for the AmountHistogram class."""
+
+    def test_bucket_edges(self):
+        """Test that edges follow the 1-2-5 series and bound their amounts."""
+        self.assertEqual(bucket_bounds(bucket_index(100)), (100, 200))
+        self.assertEqual(bucket_bounds(bucket_index(199)), (100, 200))
+        self.assertEqual(bucket_bounds(bucket_index(200)), (200, 500))
+        self.assertEqual(bucket_bounds(bucket_index(4999)), (2000, 5000))
+        self.assertEqual(bucket_index(0), 0)
+        for cents in random.Random(1).sample(range(1, 10**9), 200):
+            low, high = bucket_bounds(bucket_index(cents))
+            self.assertTrue(low <= cents < high)
+
+    def test_add_remove_and_merge(self):
+        """Test that counts decrement and merge bucket by bucket."""
+        histogram = AmountHistogram()
+        histogram.add(150)
+        histogram.add(700)
+        histogram.add(120)
+        self.assertEqual(
+            histogram.buckets(), [(100, 200, 2), (200, 500, 0), (500, 1000, 1)]
+        )
+        other = AmountHistogram()
+        other.add(300)
+        histogram.merge(other)
+        histogram.add(700, -1)
+        self.assertEqual(histogram.buckets(), [(100, 200, 2), (200, 500, 1)])
+        self.assertEqual(len(histogram), 3)
+
+
+class TestManagerHistograms(TestCase):
+    """Test cases for histograms answered by ExpenseManager."""
+
+    def test_matches_brute_force(self):
+        """Test random ranges and groupings, before and after deletes."""
+        rng = random.Random(4)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            manager = ExpenseManager(tmpdir, autosave=False)
+            expenses = [
+                Expense(
+                    Decimal(rng.randint(1, 500_000)) / 100,
+                    rng.choice(["Food", "Bills", "Travel"]),
+                    "Item",
+                    datetime(2023, 1, 1) + timedelta(hours=rng.randint(0, 17_000)),
+                )
+                for _ in range(2_000)
+            ]
+            manager.add_expenses(expenses)
+            manager.amount_histograms()  # build, so deletes are applied live
+            for expense in expenses[:300]:
+                manager.delete_expense(expense.id)
+            remaining = expenses[300:]
+
+            def brute_force(start, end, group_by):
+                counts = {}
+                for expense in remaining:
+                    day = expense.date.date()
+                    if (start and day < start) or (end and day > end):
+                        continue
+                    values = {
+                        "category": expense.category,
+                        "month": expense.date.strftime("%Y-%m"),
+                        "year": str(expense.date.year),
+                    }
+                    key = tuple(values[dimension] for dimension in group_by)
+                    bucket = bucket_index(to_cents(expense.amount))
+                    counts.setdefault(key, Counter())[bucket] += 1
+                return counts
+
+            for _ in range(20):
+                start = date(2023, 1, 1) + timedelta(days=rng.randint(-10, 700))
+                end = start + timedelta(days=rng.randint(0, 400))
+                group_by = rng.choice([[], ["category"], ["year", "category"]])
+                result = manager.amount_histograms(start, end, group_by=group_by)
+                expected = brute_force(start, end, group_by)
+                self.assertEqual(list(result), sorted(expected))
+                for key, histogram in result.items():
+                    self.assertEqual(
+                        {
+                            bucket_index(low): count
+                            for low, _, count in histogram.buckets()
+                            if count
+                        },
+                        dict(expected[key]),
+                    )
+
+    def test_rejects_unknown_groups(self):
+        """Test that an unsupported dimension raises ValueError."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with self.assertRaises(ValueError):
+                ExpenseManager(tmpdir).amount_histograms(group_by=["weekday"])
+
+
+if __name__ == "__main__":
+    main()
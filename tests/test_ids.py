@@ -0,0 +1,56 @@
+"""Unit tests for time-ordered expense ids."""
+import tempfile
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from unittest import TestCase, main
+from unittest.mock import patch
+
+from expense_tracker.models.expense import Expense
+from expense_tracker.models.expense_manager import ExpenseManager
+from expense_tracker.models.ids import id_time, new_id
+
+
+class TestIds(TestCase):
+    """Test cases for new_id and its helpers."""
+
+    def test_ids_are_unique_and_sorted(self):
+        """Test that ids made in a burst keep their creation order."""
+        ids = [new_id() for _ in range(10000)]
+        self.assertEqual(ids, sorted(ids))
+        self.assertEqual(len(set(ids)), len(ids))
+        self.assertEqual(uuid.UUID(ids[0]).version, 7)
+
+    def test_clock_going_back_keeps_order(self):
+        """Test that ids stay increasing when the clock steps back."""
+        first = new_id()
+        with patch("expense_tracker.models.ids.time.time_ns", return_value=0):
+            second = new_id()
+        self.assertLess(first, second)
+
+    def test_id_time(self):
+        """Test that ids carry their creation time."""
+        before = datetime.now(timezone.utc) - timedelta(seconds=1)
+        expense_id = new_id()
+        after = datetime.now(timezone.utc) + timedelta(seconds=1)
+
+        self.assertTrue(before <= id_time(expense_id) <= after)
+        self.assertIsNone(id_time(str(uuid.uuid4())))
+        self.assertIsNone(id_time("17"))
+
+    def test_manager_keeps_existing_ids(self):
+        """Test that old ids still resolve next to new ones."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            manager = ExpenseManager(tmpdir)
+            legacy = Expense(Decimal("1"), "Food", "Old", id=str(uuid.uuid4()))
+            manager.add_expenses([legacy])
+            created = manager.add_expense(Expense(Decimal("2"), "Food", "New"))
+
+            reloaded = ExpenseManager(tmpdir)
+            self.assertEqual(reloaded.get_expense(legacy.id).description, "Old")
+            self.assertIsNotNone(id_time(created.id))
+            self.assertTrue(reloaded.delete_expense(created.id))
+
+
+if __name__ == "__main__":
+    main()
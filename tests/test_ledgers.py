@@ -0,0 +1,140 @@
+"""Unit tests for the per-user ledger pool."""
+import tempfile
+from decimal import Decimal
+from unittest import TestCase, main
+from unittest.mock import patch
+
+from expense_tracker.models.expense import Expense
+from expense_tracker.models.expense_manager import (
+    EXPENSE_MEMORY_ESTIMATE,
+    ExpenseManager,
+)
+from expense_tracker.web.ledgers import LedgerPool
+
+
+class TestLedgerPool(TestCase):
+    """Test cases for the LedgerPool class."""
+
+    def setUp(self):
+        """Create a temporary data directory."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        """Remove the temporary data directory."""
+        self.tmpdir.cleanup()
+
+    def _pool(self, **kwargs) -> LedgerPool:
+        kwargs.setdefault("max_bytes", 10 * EXPENSE_MEMORY_ESTIMATE)
+        return LedgerPool(self.tmpdir.name, **kwargs)
+
+    def _add(self, manager: ExpenseManager, description: str) -> None:
+        manager.add_expense(Expense(Decimal("10"), "Food", description))
+
+    def test_ledgers_are_isolated_per_user(self):
+        """Test that each user sees only their own expenses."""
+        pool = self._pool()
+        alice = pool.acquire("alice")
+        self._add(alice, "Lunch")
+        pool.release("alice")
+
+        bob = pool.acquire("bob")
+        self.assertEqual(bob.get_expenses(), [])
+        pool.release("bob")
+        self.assertEqual(len(pool.acquire("alice").get_expenses()), 1)
+
+    def test_lru_eviction_flushes_dirty_ledger(self):
+        """Test that evicted ledgers are flushed and reload from disk."""
+        pool = self._pool(max_ledgers=1, autosave=False)
+        alice = pool.acquire("alice")
+        self._add(alice, "Lunch")
+        self.assertTrue(alice.dirty)
+        pool.release("alice")
+
+        pool.acquire("bob")
+        self.assertNotIn("alice", pool)
+        self.assertFalse(alice.dirty)
+
+        reloaded = ExpenseManager(str(pool.ledger_path("alice")))
+        self.assertEqual(reloaded.get_expenses()[0].description, "Lunch")
+
+    def test_eviction_closes_storage(self):
+        """Test that an evicted ledger releases its storage engine."""
+        pool = self._pool(max_ledgers=1, engine="sqlite")
+        alice = pool.acquire("alice")
+        self._add(alice, "Lunch")
+        pool.release("alice")
+
+        with patch.object(alice.storage, "close", wraps=alice.storage.close) as close:
+            pool.acquire("bob")
+        close.assert_called_once_with()
+        self.assertNotIn("alice", pool)
+        self.assertIsNone(alice.storage._connection)
+
+    def test_memory_budget_evicts_least_recently_used(self):
+        """Test eviction by estimated memory rather than ledger count."""
+        pool = self._pool(max_bytes=3 * EXPENSE_MEMORY_ESTIMATE)
+        for user in ("alice", "bob"):
+            manager = pool.acquire(user)
+            self._add(manager, "one")
+            self._add(manager, "two")
+            manager.get_expenses()  # only loaded ledgers take up memory
+            pool.release(user)
+
+        self.assertNotIn("alice", pool)
+        self.assertIn("bob", pool)
+
+    def test_pinned_ledgers_are_not_evicted(self):
+        """Test that a ledger in use by a request survives eviction."""
+        pool = self._pool(max_ledgers=1)
+        pool.acquire("alice")
+        pool.acquire("bob")
+        self.assertIn("alice", pool)
+
+        pool.release("alice")
+        self.assertNotIn("alice", pool)
+        self.assertIn("bob", pool)
+
+    def test_rejects_unsafe_user_ids(self):
+        """Test that user ids cannot escape the data directory."""
+        with self.assertRaises(ValueError):
+            self._pool().acquire("../etc")
+
+    def test_failed_flush_keeps_ledger(self):
+        """Test that a ledger whose flush fails is not dropped."""
+        pool = self._pool(max_ledgers=1, autosave=False)
+        alice = pool.acquire("alice")
+        self._add(alice, "Lunch")
+        pool.release("alice")
+
+        with patch.object(alice, "flush", side_effect=OSError("disk full")):
+            with self.assertLogs("expense_tracker.web.ledgers", "ERROR"):
+                pool.acquire("bob")
+        self.assertIn("alice", pool)
+        self.assertTrue(alice.dirty)
+
+        pool.release("bob")
+        self.assertNotIn("alice", pool)
+        self.assertFalse(alice.dirty)
+
+    def test_resident_bytes_tracks_ledger_sizes(self):
+        """Test the running total, including lazily built indexes."""
+        pool = self._pool(max_bytes=10**9)
+        for user in ("alice", "bob"):
+            manager = pool.acquire(user)
+            self._add(manager, "one")
+            manager.get_expenses()
+            pool.release(user)
+        self.assertEqual(pool.resident_bytes(), 2 * EXPENSE_MEMORY_ESTIMATE)
+
+        manager = pool.acquire("alice")
+        manager.duplicate_groups()
+        pool.release("alice")
+        self.assertGreater(pool.resident_bytes(), 2 * EXPENSE_MEMORY_ESTIMATE)
+        self.assertEqual(
+            pool.resident_bytes(),
+            sum(pool.acquire(user).estimated_size() for user in ("alice", "bob")),
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Unit tests for the metrics module."""
+import threading
+from unittest import TestCase, main
+
+from expense_tracker.services.metrics import MetricsRegistry
+
+
+class TestMetrics(TestCase):
+    """Test cases for counters, histograms and Prometheus rendering."""
+
+    def setUp(self):
+        """Set up a fresh registry before each test."""
+        self.registry = MetricsRegistry()
+
+    def test_counter_sums_thread_shards(self):
+        """Test that increments from several threads are merged on scrape."""
+        counter = self.registry.counter("writes_total", "Writes.", ("backend",))
+
+        def work():
+            for _ in range(1000):
+                counter.inc(labels=("json",))
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(counter.value(("json",)), 4000)
+        self.assertIn('writes_total{backend="json"} 4000', self.registry.render())
+
+    def test_exited_threads_fold_into_one_shard(self):
+        """Test that shards of finished threads are merged, not kept."""
+        counter = self.registry.counter("requests_total", "Requests.")
+        histogram = self.registry.histogram("latency_seconds", "Latency.")
+
+        def work():
+            counter.inc()
+            histogram.observe(0.2)
+
+        for _ in range(50):
+            thread = threading.Thread(target=work)
+            thread.start()
+            thread.join()
+
+        self.assertEqual(len(counter._shards), 1)
+        self.assertEqual(len(histogram._shards), 1)
+        self.assertEqual(counter.value(), 50)
+        self.assertEqual(histogram.totals()[()][2], 50)
+
+    def test_histogram_renders_cumulative_buckets(self):
+        """Test histogram bucket, sum and count lines."""
+        histogram = self.registry.histogram(
+            "latency_seconds", "Latency.", ("route",), buckets=(0.1, 1.0)
+        )
+        histogram.observe(0.05, ("/",))
+        histogram.observe(0.5, ("/",))
+        histogram.observe(5, ("/",))
+
+        output = self.registry.render()
+        self.assertIn("# TYPE latency_seconds histogram", output)
+        self.assertIn('latency_seconds_bucket{route="/",le="0.1"} 1', output)
+        self.assertIn('latency_seconds_bucket{route="/",le="1"} 2', output)
+        self.assertIn('latency_seconds_bucket{route="/",le="+Inf"} 3', output)
+        self.assertIn('latency_seconds_count{route="/"} 3', output)
+        self.assertIn('latency_seconds_sum{route="/"} 5.55', output)
+
+    def test_gauge_reads_callback(self):
+        """Test that gauges are evaluated at render time."""
+        rows = [1, 2, 3]
+        self.registry.gauge("rows", "Rows.", lambda: len(rows))
+        rows.append(4)
+        self.assertIn("rows 4", self.registry.render())
+
+    def test_register_returns_existing_metric(self):
+        """Test that registering the same name twice reuses the metric."""
+        first = self.registry.counter("hits_total", "Hits.")
+        second = self.registry.counter("hits_total", "Hits.")
+        self.assertIs(first, second)
+
+
+if __name__ == "__main__":
+    main()
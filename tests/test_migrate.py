@@ -0,0 +1,128 @@
+"""Unit tests for migrating legacy expense files."""
+import io
+import json
+import tempfile
+from decimal import Decimal
+from pathlib import Path
+from unittest import TestCase, main
+from unittest.mock import patch
+
+from expense_tracker.migrate import (
+    MigrationError,
+    iter_json_array,
+    migrate_legacy,
+)
+from expense_tracker.models.expense_manager import ExpenseManager
+from expense_tracker.services.storage import storage_url
+
+
+def legacy_record(i):
+    return {
+        "date": f"2024-01-{i % 28 + 1:02d} 12:00:00",
+        "amount": 10.1 + i,
+        "category": "Food",
+        "description": f"Café {i}",
+    }
+
+
+class TestIterJsonArray(TestCase):
+    """Test cases for the incremental array parser."""
+
+    def test_small_chunks_and_offsets(self):
+        """Test parsing across chunk boundaries and resuming at an offset."""
+        data = json.dumps([legacy_record(i) for i in range(20)], indent=2).encode()
+        items = list(iter_json_array(io.BytesIO(data), chunk_size=7))
+        self.assertEqual(len(items), 20)
+        self.assertEqual(items[0][0]["amount"], Decimal("10.1"))
+        self.assertEqual(items[3][0]["description"], "Café 3")
+
+        resumed = iter_json_array(io.BytesIO(data), offset=items[9][1], chunk_size=5)
+        self.assertEqual(
+            [item for item, _ in resumed], [item for item, _ in items[10:]]
+        )
+
+    def test_empty_and_malformed(self):
+        """Test empty arrays and malformed input."""
+        self.assertEqual(list(iter_json_array(io.BytesIO(b" [ ] "))), [])
+        for data in (b'{"a": 1}', b'[{"a": 1}', b'[{"a": 1} {"b": 2}]'):
+            with self.assertRaises(MigrationError, msg=data):
+                list(iter_json_array(io.BytesIO(data), chunk_size=4))
+
+
+class TestMigrateLegacy(TestCase):
+    """Test cases for migrate_legacy."""
+
+    def setUp(self):
+        """Write a legacy file and create an empty target ledger."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.source = Path(self.tmpdir.name) / "legacy.json"
+        self.source.write_text(json.dumps([legacy_record(i) for i in range(25)]))
+        self.target = str(Path(self.tmpdir.name) / "ledger")
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        self.tmpdir.cleanup()
+
+    def test_migrates_exact_amounts_with_stable_ids(self):
+        """Test conversion, batching and that re-running is a no-op."""
+        batches = []
+        report = migrate_legacy(
+            str(self.source),
+            ExpenseManager(self.target),
+            batch_size=10,
+            progress=lambda r: batches.append(r.records),
+        )
+        self.assertEqual(report.records, 25)
+        self.assertEqual(batches, [10, 20, 25])
+
+        expenses = ExpenseManager(self.target).get_expenses()
+        self.assertEqual(len(expenses), 25)
+        self.assertIn(Decimal("11.1"), {e.amount for e in expenses})
+        self.assertEqual(len({e.id for e in expenses}), 25)
+
+        again = migrate_legacy(str(self.source), ExpenseManager(self.target))
+        self.assertTrue(again.already_done)
+        self.assertEqual(len(ExpenseManager(self.target).get_expenses()), 25)
+
+        ids = {e.id for e in expenses}
+        restarted_dir = str(Path(self.tmpdir.name) / "other")
+        migrate_legacy(str(self.source), ExpenseManager(restarted_dir))
+        migrated = ExpenseManager(restarted_dir).get_expenses()
+        self.assertEqual({e.id for e in migrated}, ids)
+
+    def test_resumes_after_interruption(self):
+        """Test that an interrupted run resumes without duplicates."""
+        for scheme in ("json", "sqlite"):
+            with self.subTest(scheme=scheme):
+                url = storage_url(scheme, str(Path(self.target) / scheme))
+                manager = ExpenseManager(storage=url)
+                original = manager.flush
+                calls = []
+
+                def failing_flush(calls=calls, original=original):
+                    calls.append(1)
+                    original()
+                    if len(calls) == 2:
+                        raise OSError("disk full")  # written, not checkpointed
+
+                with patch.object(manager, "flush", side_effect=failing_flush):
+                    with self.assertRaises(OSError):
+                        migrate_legacy(str(self.source), manager, batch_size=10)
+                manager.storage.close()
+
+                resumed = ExpenseManager(storage=url)
+                report = migrate_legacy(str(self.source), resumed, batch_size=10)
+                resumed.storage.close()
+                self.assertTrue(report.resumed)
+                self.assertEqual(report.skipped, 10)
+                self.assertEqual(report.records, 5)
+
+                reader = ExpenseManager(storage=url)
+                self.assertEqual(len(reader.get_expenses()), 25)
+                reader.storage.close()
+                if scheme != "json":
+                    self.assertFalse((reader.storage_path / "expenses.json").exists())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Unit tests for the request profiling hooks."""
+import os
+import pstats
+import tempfile
+from unittest import TestCase, main
+
+from flask import Flask
+
+from expense_tracker.web.profiling import init_profiling
+
+
+def _make_app(**config) -> Flask:
+    app = Flask(__name__)
+    app.config.update(config)
+    init_profiling(app)
+
+    @app.route("/slow")
+    def slow():
+        return str(sum(i * i for i in range(20000)))
+
+    return app
+
+
+class TestProfiling(TestCase):
+    """Test cases for init_profiling."""
+
+    def setUp(self):
+        """Create a temporary profile directory."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.profile_dir = os.path.join(self.tmpdir.name, "profiles")
+
+    def tearDown(self):
+        """Remove the temporary profile directory."""
+        self.tmpdir.cleanup()
+
+    def test_disabled_registers_no_hooks(self):
+        """Test that profiling is a strict no-op when disabled."""
+        app = _make_app(PROFILING_DIR=self.profile_dir)
+        self.assertFalse(any(app.before_request_funcs.values()))
+
+        response = app.test_client().get("/slow", headers={"X-Profile": "1"})
+        self.assertNotIn("X-Profile-File", response.headers)
+        self.assertFalse(os.path.exists(self.profile_dir))
+
+    def test_request_without_header_is_not_profiled(self):
+        """Test that only requests carrying the header are profiled."""
+        app = _make_app(PROFILING_ENABLED=True, PROFILING_DIR=self.profile_dir)
+        response = app.test_client().get("/slow")
+        self.assertNotIn("X-Profile-File", response.headers)
+
+    def test_cprofile_mode_writes_pstats(self):
+        """Test that cProfile output can be loaded with pstats."""
+        app = _make_app(PROFILING_ENABLED=True, PROFILING_DIR=self.profile_dir)
+        response = app.test_client().get("/slow", headers={"X-Profile": "1"})
+
+        path = os.path.join(self.profile_dir, response.headers["X-Profile-File"])
+        self.assertTrue(path.endswith(".prof"))
+        self.assertGreater(pstats.Stats(path).total_calls, 0)
+
+    def test_sampling_mode_writes_collapsed_stacks(self):
+        """Test that the sampling profiler writes collapsed stacks."""
+        app = _make_app(
+            PROFILING_ENABLED=True,
+            PROFILING_DIR=self.profile_dir,
+            PROFILING_MODE="sampling",
+            PROFILING_SAMPLE_INTERVAL=0.0005,
+        )
+        response = app.test_client().get("/slow", headers={"X-Profile": "1"})
+
+        path = os.path.join(self.profile_dir, response.headers["X-Profile-File"])
+        self.assertTrue(path.endswith(".collapsed"))
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                stack, count = line.rsplit(" ", 1)
+                self.assertIn(";", stack)
+                self.assertGreater(int(count), 0)
+
+    def test_token_must_match(self):
+        """Test that a configured token restricts who can profile."""
+        app = _make_app(
+            PROFILING_ENABLED=True,
+            PROFILING_DIR=self.profile_dir,
+            PROFILING_TOKEN="secret",
+        )
+        client = app.test_client()
+        self.assertNotIn(
+            "X-Profile-File", client.get("/slow", headers={"X-Profile": "1"}).headers
+        )
+        self.assertIn(
+            "X-Profile-File",
+            client.get("/slow", headers={"X-Profile": "secret"}).headers,
+        )
+
+
+if __name__ == "__main__":
+    main()
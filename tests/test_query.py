@@ -0,0 +1,144 @@
+"""Unit tests for the expense filter language."""
+import tempfile
+from datetime import datetime
+from decimal import Decimal
+from unittest import TestCase, main
+
+from expense_tracker.models.expense import Expense
+from expense_tracker.models.expense_manager import ExpenseManager
+from expense_tracker.models.query import QuerySyntaxError, parse_query
+
+
+class TestParseQuery(TestCase):
+    """Test cases for parsing and compiling queries."""
+
+    def setUp(self):
+        """Create a sample expense."""
+        self.expense = Expense(
+            Decimal("75.50"),
+            "Transportation",
+            "Uber to airport",
+            date=datetime(2024, 3, 15, 18, 30),
+            id="abc",
+        )
+
+    def assertMatches(self, text, expected=True):
+        self.assertEqual(parse_query(text)(self.expense), expected, text)
+
+    def test_comparisons(self):
+        """Test each field and operator."""
+        self.assertMatches("amount > 50")
+        self.assertMatches("amount <= 75.5")
+        self.assertMatches("amount = 75.49", False)
+        self.assertMatches("category = transportation")
+        self.assertMatches('description ~ "UBER"')
+        self.assertMatches("description ~ taxi", False)
+        self.assertMatches("id = abc")
+        self.assertMatches("date = 2024-03-15")
+        self.assertMatches("date <= 2024-03-15")
+        self.assertMatches("date > 2024-03-15", False)
+
+    def test_boolean_operators(self):
+        """Test and/or/not, precedence and parentheses."""
+        self.assertMatches(
+            "amount > 50 and category in (Food, Transportation)"
+            ' and description ~ "uber"'
+        )
+        self.assertMatches("category = Food or amount > 70 and date >= 2024-03-01")
+        self.assertMatches("(category = Food or amount > 80) and amount > 0", False)
+        self.assertMatches("not category in (Food, Bills)")
+
+    def test_constraints(self):
+        """Test index constraints taken from the top-level conjunction."""
+        query = parse_query(
+            "date >= 2024-01-01 and date <= 2024-01-31 and category in (Food, Bills)"
+        )
+        self.assertEqual(query.constraints.start, datetime(2024, 1, 1))
+        self.assertEqual(query.constraints.end, datetime(2024, 2, 1))
+        self.assertEqual(query.constraints.categories, ["Food", "Bills"])
+        either = parse_query("category = Food or amount > 1")
+        self.assertIsNone(either.constraints.categories)
+
+    def test_syntax_errors(self):
+        """Test malformed queries."""
+        for text in (
+            "amount >",
+            "price = 3",
+            "amount > abc",
+            "(amount > 1",
+            "date ~ 2024",
+        ):
+            with self.assertRaises(QuerySyntaxError, msg=text):
+                parse_query(text)
+
+
+class TestManagerQuery(TestCase):
+    """Test cases for running queries against a manager."""
+
+    def setUp(self):
+        """Create a ledger with expenses across categories and days."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.manager = ExpenseManager(self.tmpdir.name)
+        for day in range(1, 11):
+            self.manager.add_expense(
+                Expense(
+                    Decimal(day * 10),
+                    "Food" if day % 2 else "Bills",
+                    f"Item {day}",
+                    date=datetime(2024, 1, day),
+                )
+            )
+        self.manager.add_expense(
+            Expense(Decimal("5"), "Rare", "Once", date=datetime(2024, 1, 5))
+        )
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        self.tmpdir.cleanup()
+
+    def test_planner_picks_cheapest_index(self):
+        """Test that the planner prefers the most selective index."""
+        def plan(text):
+            return self.manager.plan_query(parse_query(text))[0]
+
+        target = self.manager.get_expenses()[0].id
+        self.assertEqual(plan(f"id = {target} and amount > 0"), "id")
+        self.assertEqual(plan("category = rare and date >= 2024-01-01"), "category")
+        self.assertEqual(plan("category = Food and date = 2024-01-03"), "date")
+        self.assertEqual(plan("amount > 10"), "scan")
+
+    def test_query_results_match_full_scan(self):
+        """Test that indexed plans return the same rows as a scan."""
+        texts = [
+            "category in (food, rare) and amount >= 30",
+            "date >= 2024-01-03 and date < 2024-01-06",
+            "category = Bills and date <= 2024-01-04",
+            'description ~ "item 1"',
+        ]
+        everything = list(self.manager.iter_expenses())
+        for text in texts:
+            query = parse_query(text)
+            expected = [e for e in everything if query(e)]
+            self.assertEqual(
+                [e.id for e in self.manager.query(text)],
+                [e.id for e in expected],
+                text,
+            )
+            self.assertEqual(
+                [e.id for e in self.manager.iter_query(text, newest_first=True)],
+                [e.id for e in reversed(expected)],
+                text,
+            )
+
+    def test_category_index_follows_updates(self):
+        """Test that edits move expenses between category postings."""
+        expense = self.manager.query("category = rare")[0]
+        self.manager.update_expense(
+            expense.id, Expense(Decimal("5"), "Food", "Once", date=expense.date)
+        )
+        self.assertEqual(self.manager.query("category = rare"), [])
+        self.assertEqual(len(self.manager.query("category = food")), 6)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""Unit tests for the statistics rollups."""
+import random
+import tempfile
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from unittest import TestCase, main
+from unittest.mock import patch
+
+from expense_tracker.models import expense_manager
+from expense_tracker.models.expense import Expense
+from expense_tracker.models.expense_manager import ExpenseManager
+from expense_tracker.models.rollups import DailyRollup, RollupCube, month_bounds
+from expense_tracker.services.storage import SQLiteStorage, storage_url
+
+
+def _expense(amount: str, category: str, day: date) -> Expense:
+    return Expense(
+        amount=Decimal(amount),
+        category=category,
+        description=f"{category} on {day}",
+        date=datetime(day.year, day.month, day.day, 12),
+    )
+
+
+class TestDailyRollup(TestCase):
+    """Test cases for the DailyRollup class."""
+
+    def setUp(self):
+        """Build a rollup spanning two months."""
+        self.rollup = DailyRollup()
+        self.expenses = [
+            _expense("10.00", "Food", date(2024, 1, 1)),  # Monday
+            _expense("5.50", "Food", date(2024, 1, 2)),
+            _expense("20.00", "Bills", date(2024, 1, 31)),
+            _expense("4.50", "Food", date(2024, 2, 1)),
+        ]
+        for expense in self.expenses:
+            self.rollup.add(expense)
+
+    def test_group_by_category(self):
+        """Test totals, counts and percentages per category."""
+        result = self.rollup.query(group_by=["category"])
+        self.assertEqual(result.total, Decimal("40"))
+        self.assertEqual(result.count, 4)
+        groups = {g.key["category"]: g for g in result.groups}
+        self.assertEqual(groups["Food"].total, Decimal("20"))
+        self.assertEqual(groups["Food"].count, 3)
+        self.assertEqual(groups["Bills"].percentage, Decimal("50"))
+
+    def test_date_range_is_inclusive(self):
+        """Test that start and end days are both included."""
+        result = self.rollup.query(date(2024, 1, 2), date(2024, 1, 31), [])
+        self.assertEqual(result.total, Decimal("25.50"))
+        self.assertEqual(result.count, 2)
+
+    def test_multi_dimensional_group_by(self):
+        """Test grouping by month and category together."""
+        result = self.rollup.query(group_by=["month", "category"])
+        keys = [(g.key["month"], g.key["category"]) for g in result.groups]
+        self.assertEqual(
+            keys, [("2024-01", "Bills"), ("2024-01", "Food"), ("2024-02", "Food")]
+        )
+
+    def test_weekday_names(self):
+        """Test weekday grouping uses day names in week order."""
+        result = self.rollup.query(group_by=["weekday"])
+        self.assertEqual(result.groups[0].key, {"weekday": "Monday"})
+
+    def test_remove_drops_empty_days(self):
+        """Test removing expenses restores the previous totals."""
+        self.rollup.remove(self.expenses[3])
+        result = self.rollup.query(start=date(2024, 2, 1), group_by=[])
+        self.assertEqual(result.count, 0)
+        self.assertEqual(list(self.rollup.cells(start=date(2024, 2, 1))), [])
+
+    def test_unknown_dimension(self):
+        """Test that unknown dimensions are rejected."""
+        with self.assertRaises(ValueError):
+            self.rollup.query(group_by=["colour"])
+
+
+class TestRollupCube(TestCase):
+    """Test cases for the RollupCube class."""
+
+    def setUp(self):
+        """Build a cube and a plain rollup over three years of expenses."""
+        rng = random.Random(3)
+        self.expenses = [
+            _expense(
+                f"{rng.randint(1, 9999) / 100:.2f}",
+                rng.choice(["Food", "Bills", "Travel"]),
+                date(2021, 11, 15) + timedelta(days=rng.randint(0, 1100)),
+            )
+            for _ in range(800)
+        ]
+        self.cube = RollupCube()
+        self.cube.rebuild(self.expenses)
+        self.daily = DailyRollup()
+        self.daily.rebuild(self.expenses)
+
+    def test_queries_match_daily_rollup(self):
+        """Test every grouping over ragged ranges against the day cells."""
+        ranges = [
+            (None, None),
+            (date(2022, 1, 1), date(2023, 12, 31)),
+            (date(2021, 12, 14), date(2024, 2, 3)),
+            (date(2022, 3, 9), date(2022, 3, 20)),
+            (date(2023, 5, 1), None),
+        ]
+        groupings = [
+            [],
+            ["category"],
+            ["year", "category"],
+            ["month"],
+            ["week", "category"],
+            ["week", "year"],
+            ["weekday"],
+        ]
+        for start, end in ranges:
+            for group_by in groupings:
+                with self.subTest(start=start, end=end, group_by=group_by):
+                    self.assertEqual(
+                        self.cube.query(start, end, group_by),
+                        self.daily.query(start, end, group_by),
+                    )
+
+    def test_removals_update_every_level(self):
+        """Test that removing expenses keeps the levels consistent."""
+        for expense in self.expenses[::2]:
+            self.cube.remove(expense)
+            self.daily.remove(expense)
+        self.assertEqual(
+            self.cube.query(group_by=["year", "category"]),
+            self.daily.query(group_by=["year", "category"]),
+        )
+
+    def test_parallel_load_matches_serial(self):
+        """Test that workers reading month partitions give the serial totals."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            url = storage_url("sqlite", tmpdir)
+            writer = ExpenseManager(storage=url)
+            writer.add_expenses(self.expenses)
+            writer.storage.close()
+
+            with patch.object(expense_manager, "PARALLEL_REBUILD_MIN_ROWS", 1):
+                with patch.object(RollupCube, "load_parallel") as load:
+                    serial = ExpenseManager(storage=url)
+                    serial.get_expenses()
+                    serial.storage.close()
+                load.assert_not_called()  # parallel loads are opt-in
+
+                with patch.object(
+                    SQLiteStorage, "load_expenses", side_effect=AssertionError
+                ), patch.object(RollupCube, "rebuild", side_effect=AssertionError):
+                    parallel = ExpenseManager(storage=url, rebuild_workers=2)
+                    loaded = parallel.get_expenses()
+                    parallel.storage.close()
+
+        self.assertEqual(
+            sorted(e.id for e in loaded), sorted(e.id for e in serial.get_expenses())
+        )
+        for group_by in (["day", "category"], ["year", "category"], ["week"]):
+            self.assertEqual(
+                parallel.query_stats(group_by=group_by),
+                self.cube.query(group_by=group_by),
+            )
+
+    def test_month_bounds_balance_partitions(self):
+        """Test that bounds cover every month in slices of similar size."""
+        counts = {(2023, 11): 10, (2023, 12): 10, (2024, 1): 30, (2024, 3): 10}
+        self.assertEqual(
+            month_bounds(counts, 3),
+            [
+                datetime(2023, 11, 1),
+                datetime(2024, 1, 1),
+                datetime(2024, 3, 1),
+                datetime(2024, 4, 1),
+            ],
+        )
+        self.assertEqual(month_bounds({}, 3), [])
+
+
+class TestManagerStats(TestCase):
+    """Test cases for ExpenseManager.query_stats."""
+
+    def setUp(self):
+        """Create a manager backed by a temporary directory."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.manager = ExpenseManager(self.tmpdir.name)
+        self.manager.add_expense(_expense("10.00", "Food", date(2024, 1, 1)))
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        self.tmpdir.cleanup()
+
+    def test_results_are_cached_per_version(self):
+        """Test cache hits between changes and fresh results after one."""
+        first = self.manager.query_stats()
+        self.assertIs(self.manager.query_stats(), first)
+
+        self.manager.add_expense(_expense("5.00", "Bills", date(2024, 1, 2)))
+        second = self.manager.query_stats()
+        self.assertIsNot(second, first)
+        self.assertEqual(second.total, Decimal("15"))
+
+    def test_rollup_rebuilt_on_load(self):
+        """Test that a reloaded manager answers from persisted data."""
+        reloaded = ExpenseManager(self.tmpdir.name)
+        self.assertEqual(reloaded.query_stats().total, Decimal("10"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Unit tests for the description search index."""
+import tempfile
+from datetime import datetime
+from decimal import Decimal
+from unittest import TestCase, main
+from unittest.mock import patch
+
+from expense_tracker.models.expense import Expense
+from expense_tracker.models.expense_manager import ExpenseManager
+from expense_tracker.models.search import SearchIndex, tokenize
+
+
+class TestSearchIndex(TestCase):
+    """Test cases for the SearchIndex class."""
+
+    def setUp(self):
+        """Create an index with a few documents."""
+        self.index = SearchIndex()
+        self.index.add("a", "Uber to the airport")
+        self.index.add("b", "Uber Eats dinner")
+        self.index.add("c", "Airport parking")
+
+    def test_tokenize(self):
+        """Test that tokens are case-folded words."""
+        self.assertEqual(tokenize("Uber-Eats, DINNER!"), ["uber", "eats", "dinner"])
+
+    def test_prefix_and_exact_search(self):
+        """Test prefix matching and that all terms must match."""
+        self.assertEqual(self.index.search("air"), {"a", "c"})
+        self.assertEqual(self.index.search("ub air"), {"a"})
+        self.assertEqual(self.index.search("air", prefix=False), set())
+        self.assertEqual(self.index.search("airport", prefix=False), {"a", "c"})
+        self.assertEqual(self.index.search("  "), set())
+
+    def test_remove_and_replace(self):
+        """Test that removed and re-described documents stop matching."""
+        self.index.remove("a")
+        self.index.add("c", "Train ticket")
+        self.assertEqual(self.index.search("air"), set())
+        self.assertEqual(self.index.search("uber"), {"b"})
+        self.assertNotIn("airport", self.index._tokens)
+
+    def test_round_trip(self):
+        """Test saving and restoring the postings."""
+        restored = SearchIndex.from_dict(self.index.to_dict())
+        self.assertEqual(restored.search("uber"), {"a", "b"})
+        restored.remove("b")
+        self.assertEqual(restored.search("din"), set())
+
+
+class TestManagerSearch(TestCase):
+    """Test cases for searching through the ExpenseManager."""
+
+    def setUp(self):
+        """Create a manager backed by a temporary directory."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.manager = ExpenseManager(self.tmpdir.name)
+        self.manager.get_expenses()
+        for description in ("Coffee beans", "Coffee with Sam", "Groceries"):
+            self.manager.add_expense(Expense(Decimal("3"), "Food", description))
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        self.tmpdir.cleanup()
+
+    def test_search_follows_mutations(self):
+        """Test that adds, updates and deletes keep the index current."""
+        found = self.manager.search("cof")
+        self.assertEqual(len(found), 2)
+        self.manager.delete_expense(found[0].id)
+        self.manager.update_expense(
+            found[1].id, Expense(Decimal("3"), "Food", "Tea", date=found[1].date)
+        )
+        self.assertEqual(self.manager.search("cof"), [])
+        self.assertEqual(len(self.manager.search("tea")), 1)
+
+    def test_saved_index_is_reused(self):
+        """Test that a fresh manager restores the index saved by flush()."""
+        self.manager.flush()
+        reader = ExpenseManager(self.tmpdir.name)
+        with patch.object(SearchIndex, "rebuild") as rebuild:
+            self.assertEqual(len(reader.search("coffee")), 2)
+        rebuild.assert_not_called()
+
+    def test_stale_index_is_rebuilt(self):
+        """Test that an index saved for older data is ignored."""
+        self.manager.flush()
+        ExpenseManager(self.tmpdir.name).add_expense(
+            amount=Decimal("1"), category="Food", description="Coffee filter"
+        )
+        self.assertEqual(len(ExpenseManager(self.tmpdir.name).search("coffee")), 3)
+
+    def test_index_is_saved_only_on_flush(self):
+        """Test that writes to the ledger do not rewrite the saved index."""
+        with patch.object(ExpenseManager, "_save_search_index") as save:
+            self.manager.add_expense(Expense(Decimal("4"), "Food", "Coffee cake"))
+            self.manager._save_expenses()
+        save.assert_not_called()
+        self.assertFalse(self.manager.search_file.exists())
+        self.manager.close()
+        self.assertTrue(self.manager.search_file.exists())
+
+    def test_limited_search_is_newest_first(self):
+        """Test that a limit returns the newest matches and counts them all."""
+        for day in (3, 1, 2):
+            self.manager.add_expense(
+                Expense(Decimal("1"), "Food", "Espresso", date=datetime(2024, 1, day))
+            )
+        found = self.manager.search("espresso", limit=2)
+        self.assertEqual([e.date.day for e in found], [3, 2])
+        self.assertEqual(self.manager.search("espresso")[:2], found)
+        self.assertEqual(self.manager.search_count("espresso"), 3)
+
+
+if __name__ == "__main__":
+    main()
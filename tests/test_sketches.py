@@ -0,0 +1,183 @@
+"""Unit tests for quantile and distinct-count sketches."""
+import random
+import tempfile
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from unittest import TestCase, main
+
+from expense_tracker.models.expense import Expense
+from expense_tracker.models.expense_manager import ExpenseManager
+from expense_tracker.models.sketches import HyperLogLog, KLLSketch, exact_quantile
+
+
+class TestKLLSketch(TestCase):
+    """Test cases for the KLLSketch class."""
+
+    def assertRankClose(self, values, estimate, q, tolerance=0.02):
+        """Assert that an estimate's rank is within tolerance of q."""
+        rank = sum(1 for value in values if value <= estimate) / len(values)
+        self.assertAlmostEqual(rank, q, delta=tolerance)
+
+    def test_quantiles_within_rank_error(self):
+        """Test estimates against exact ranks on a skewed distribution."""
+        rng = random.Random(3)
+        values = [int(rng.lognormvariate(7, 1)) for _ in range(50_000)]
+        sketch = KLLSketch(seed=1)
+        for value in values:
+            sketch.update(value)
+        self.assertEqual(sketch.count, len(values))
+        self.assertLess(sum(len(c) for c in sketch._compactors), 1000)
+        for q in (0.1, 0.5, 0.9, 0.99):
+            self.assertRankClose(values, sketch.quantile(q), q)
+
+    def test_small_sketches_are_exact(self):
+        """Test that a sketch that never compacted matches exact quantiles."""
+        values = [5, 1, 4, 2, 3]
+        sketch = KLLSketch()
+        for value in values:
+            sketch.update(value)
+        for q in (0, 0.2, 0.5, 0.9, 1):
+            self.assertEqual(sketch.quantile(q), exact_quantile(sorted(values), q))
+        self.assertIsNone(KLLSketch().quantile(0.5))
+
+    def test_merge(self):
+        """Test that merged sketches summarise the union of their values."""
+        rng = random.Random(5)
+        parts = [[rng.randint(0, 10_000) for _ in range(5_000)] for _ in range(12)]
+        merged = KLLSketch(seed=2)
+        for part in parts:
+            sketch = KLLSketch(seed=len(part))
+            for value in part:
+                sketch.update(value)
+            merged.merge(sketch)
+        values = [value for part in parts for value in part]
+        self.assertEqual(merged.count, len(values))
+        for q in (0.25, 0.5, 0.9):
+            self.assertRankClose(values, merged.quantile(q), q)
+
+
+class TestHyperLogLog(TestCase):
+    """Test cases for the HyperLogLog class."""
+
+    def test_counts(self):
+        """Test small and large cardinalities, with repeats."""
+        for distinct in (0, 1, 50, 1_000, 30_000):
+            sketch = HyperLogLog()
+            for i in range(distinct * 2):
+                sketch.add(f"merchant {i % distinct}" if distinct else "")
+            expected = distinct if distinct else 1
+            self.assertAlmostEqual(
+                sketch.count(), expected, delta=max(1, expected * 0.05)
+            )
+
+    def test_merge(self):
+        """Test that merging counts overlapping sets once."""
+        first, second = HyperLogLog(), HyperLogLog()
+        for i in range(3_000):
+            first.add(str(i))
+            second.add(str(i + 1_500))
+        first.merge(second)
+        self.assertAlmostEqual(first.count(), 4_500, delta=225)
+        with self.assertRaises(ValueError):
+            first.merge(HyperLogLog(precision=10))
+
+
+class TestManagerSketches(TestCase):
+    """Test cases for sketch-backed statistics on ExpenseManager."""
+
+    def setUp(self):
+        """Fill a ledger with a year of random expenses."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.manager = ExpenseManager(self.tmpdir.name, autosave=False)
+        rng = random.Random(11)
+        self.manager.add_expenses(
+            [
+                Expense(
+                    Decimal(rng.randint(100, 20_000)) / 100,
+                    rng.choice(["Food", "Travel"]),
+                    f"Shop {rng.randint(1, 400)}",
+                    datetime(2024, 1, 1) + timedelta(minutes=rng.randint(0, 525_000)),
+                )
+                for _ in range(20_000)
+            ]
+        )
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_quantiles_match_exact_mode(self):
+        """Test approximate quantiles, including ragged month edges."""
+        for start, end in [
+            (None, None),
+            (date(2024, 2, 10), date(2024, 11, 20)),
+            (date(2024, 3, 5), date(2024, 3, 25)),
+        ]:
+            approximate = self.manager.amount_quantiles(start, end)
+            exact = self.manager.amount_quantiles(start, end, exact=True)
+            self.assertEqual(set(approximate), {"Food", "Travel"})
+            for category, values in exact.items():
+                for q, amount in values.items():
+                    self.assertAlmostEqual(
+                        approximate[category][q], amount, delta=Decimal("5")
+                    )
+
+    def test_exact_quantiles_respect_bounds(self):
+        """Test exact mode on a hand-checked range."""
+        self.manager.add_expense(
+            Expense(Decimal("1.00"), "Gifts", "Card", datetime(2023, 12, 31, 23))
+        )
+        self.manager.add_expense(
+            Expense(Decimal("3.00"), "Gifts", "Cake", datetime(2023, 12, 1))
+        )
+        self.manager.add_expense(
+            Expense(Decimal("9.00"), "Gifts", "Vase", datetime(2023, 11, 30))
+        )
+        result = self.manager.amount_quantiles(
+            date(2023, 12, 1), date(2023, 12, 31), categories=["Gifts"], exact=True
+        )
+        self.assertEqual(
+            result, {"Gifts": {0.5: Decimal("1.00"), 0.9: Decimal("3.00")}}
+        )
+        self.assertEqual(
+            self.manager.amount_quantiles(
+                date(2023, 12, 1), date(2023, 12, 31), categories=["Gifts"]
+            ),
+            result,
+        )
+
+    def test_distinct_descriptions(self):
+        """Test per-month distinct counts against exact mode."""
+        approximate = self.manager.distinct_descriptions()
+        exact = self.manager.distinct_descriptions(exact=True)
+        self.assertEqual(list(approximate), list(exact))
+        self.assertEqual(len(exact), 12)
+        for month, count in exact.items():
+            self.assertAlmostEqual(approximate[month], count, delta=count * 0.05)
+
+    def test_sketches_follow_changes(self):
+        """Test that deletes and updates rebuild the affected month."""
+        self.manager.distinct_descriptions()
+        expense = self.manager.add_expense(
+            Expense(Decimal("99999.00"), "Rare", "One off", datetime(2024, 6, 1))
+        )
+        self.assertEqual(
+            self.manager.amount_quantiles(categories=["Rare"]),
+            {"Rare": {0.5: Decimal("99999.00"), 0.9: Decimal("99999.00")}},
+        )
+        updated = Expense(
+            Decimal("5.00"), "Rare", "One off", datetime(2024, 6, 1), id=expense.id
+        )
+        self.manager.update_expense(expense.id, updated)
+        self.assertEqual(
+            self.manager.amount_quantiles(categories=["Rare"], quantiles=[0.5]),
+            {"Rare": {0.5: Decimal("5.00")}},
+        )
+        self.manager.delete_expense(expense.id)
+        self.assertEqual(self.manager.amount_quantiles(categories=["Rare"]), {})
+        self.assertEqual(
+            self.manager.distinct_descriptions(categories=["Rare"]), {}
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Start-up time budget tests.
+
+Imports are measured in a fresh interpreter so that modules already loaded by
+other tests do not hide slow imports.
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from unittest import TestCase, main
+
+from expense_tracker.web.app import create_app
+
+# Generous budgets: they catch accidental heavy imports or eager ledger
+# loading, not small regressions.
+IMPORT_BUDGET_SECONDS = 2.0
+FIRST_REQUEST_BUDGET_SECONDS = 1.0
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    "elapsed": elapsed,
+    "heavy": sorted(m for m in ("pandas", "matplotlib") if m in sys.modules),
+}}))
+"""
+
+
+def _probe_import(module: str, data_dir: str) -> dict:
+    env = dict(os.environ, HOME=data_dir, EXPENSE_TRACKER_DATA_DIR=data_dir)
+    output = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(module=module)],
+        capture_output=True,
+        check=True,
+        env=env,
+        text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+class TestStartup(TestCase):
+    """Test cases for import time and first-request latency."""
+
+    def setUp(self):
+        """Create an empty data directory."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        """Remove the data directory."""
+        self.tmpdir.cleanup()
+
+    def test_web_app_import_is_fast_and_touches_no_storage(self):
+        """Test importing the web app loads no ledger and no heavy modules."""
+        result = _probe_import("expense_tracker.web.app", self.tmpdir.name)
+        self.assertLess(result["elapsed"], IMPORT_BUDGET_SECONDS)
+        self.assertEqual(result["heavy"], [])
+        self.assertEqual(os.listdir(self.tmpdir.name), [])
+
+    def test_cli_and_ui_imports_skip_heavy_modules(self):
+        """Test that the CLI and UI packages do not import pandas/matplotlib."""
+        for module in ("expense_tracker.cli", "expense_tracker.ui"):
+            with self.subTest(module=module):
+                result = _probe_import(module, self.tmpdir.name)
+                self.assertLess(result["elapsed"], IMPORT_BUDGET_SECONDS)
+                self.assertEqual(result["heavy"], [])
+
+    def test_first_request_latency(self):
+        """Test that the first dashboard request stays within budget."""
+        app = create_app({"TESTING": True, "DATA_DIR": self.tmpdir.name})
+        client = app.test_client()
+
+        start = time.perf_counter()
+        response = client.get("/")
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(response.status_code, 200)
+        self.assertLess(elapsed, FIRST_REQUEST_BUDGET_SECONDS)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+"""Unit tests for the storage engine registry."""
+import pickle
+import sqlite3
+import tempfile
+import uuid
+from datetime import datetime
+from decimal import Decimal
+from pathlib import Path
+from unittest import TestCase, main
+from unittest.mock import patch
+
+from expense_tracker.models.expense import Expense
+from expense_tracker.models.expense_manager import ConflictError, ExpenseManager
+from expense_tracker.services.storage import (
+    ENGINES,
+    JSONLinesStorage,
+    MemoryStorage,
+    SQLiteStorage,
+    VersionMismatch,
+    Write,
+    open_storage,
+    storage_url,
+)
+
+
+def make_expense(day: int, amount: str = "1.10", category: str = "Food") -> Expense:
+    """Return an expense on the given day of January 2024."""
+    return Expense(
+        Decimal(amount),
+        category,
+        f"Item {day}",
+        datetime(2024, 1, day, 12),
+        id=str(uuid.uuid4()),
+    )
+
+
+class TestStorageEngines(TestCase):
+    """Round trips every registered engine through the same operations."""
+
+    def setUp(self):
+        """Create a temporary directory for file-backed engines."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        self.tmpdir.cleanup()
+
+    def open(self, scheme: str):
+        """Open a fresh engine of the given kind."""
+        directory = self.tmpdir.name if scheme != "memory" else uuid.uuid4().hex
+        engine = open_storage(storage_url(scheme, directory))
+        engine.create()
+        self.addCleanup(engine.close)
+        return engine
+
+    def test_round_trip(self):
+        """Test that every engine stores and returns the same expenses."""
+        for scheme in ENGINES:
+            with self.subTest(scheme=scheme):
+                engine = self.open(scheme)
+                expenses = [make_expense(day) for day in (3, 1, 2)]
+                engine.save_expenses(expenses)
+                loaded = engine.load_expenses()
+                self.assertEqual([e.id for e in loaded], [e.id for e in expenses])
+                self.assertEqual(loaded[0].amount, Decimal("1.10"))
+                self.assertEqual(loaded[0].date, expenses[0].date)
+
+    def test_declared_capabilities_work(self):
+        """Test appends, point operations and range scans where declared."""
+        for scheme, engine_class in ENGINES.items():
+            with self.subTest(scheme=scheme):
+                engine = self.open(scheme)
+                capabilities = engine_class.capabilities
+                first, second, third = (make_expense(day) for day in (1, 2, 3))
+                engine.save_expenses([first])
+                expected = [first.id]
+
+                if capabilities.append:
+                    self.assertTrue(engine.append_expenses([second, third]))
+                    expected += [second.id, third.id]
+                else:
+                    engine.save_expenses([first, second, third])
+                    expected = [first.id, second.id, third.id]
+
+                if capabilities.point_ops:
+                    first.amount = Decimal("9.99")
+                    self.assertTrue(engine.update_expense(first))
+                    self.assertTrue(engine.delete_expense(second.id))
+                    expected.remove(second.id)
+                    loaded = engine.load_expenses()
+                    self.assertEqual([e.id for e in loaded], expected)
+                    self.assertEqual(loaded[0].amount, Decimal("9.99"))
+
+                in_range = engine.load_range(
+                    datetime(2024, 1, 2), datetime(2024, 1, 4)
+                )
+                self.assertEqual(
+                    [e.id for e in in_range],
+                    [i for i in expected if i != first.id],
+                )
+
+    def test_jsonl_save_compacts_log(self):
+        """Test that a full save rewrites the log without tombstones."""
+        engine = self.open("jsonl")
+        expense = make_expense(1)
+        engine.append_expenses([expense, make_expense(2)])
+        engine.delete_expense(expense.id)
+        engine.save_expenses(engine.load_expenses())
+        lines = Path(engine.filepath).read_text().splitlines()
+        self.assertEqual(len(lines), 1)
+
+    def test_point_ops_check_versions(self):
+        """Test that engines with point operations reject stale writes."""
+        for scheme in ("jsonl", "mmap", "sqlite", "memory"):
+            with self.subTest(scheme=scheme):
+                engine = self.open(scheme)
+                expense = make_expense(3)
+                engine.append_expenses([expense])
+                expense.version = 2
+                engine.update_expense(expense, expected_version=1)
+                with self.assertRaises(VersionMismatch):
+                    engine.update_expense(expense, expected_version=1)
+                with self.assertRaises(VersionMismatch):
+                    engine.delete_expense(expense.id, expected_version=1)
+                engine.delete_expense(expense.id, expected_version=2)
+                self.assertEqual(engine.load_expenses(), [])
+                with self.assertRaises(VersionMismatch):
+                    engine.update_expense(expense, expected_version=2)
+                self.assertEqual(engine.load_expenses(), [])
+
+    def test_jsonl_checks_versions_written_elsewhere(self):
+        """Test that a log engine sees versions appended by another writer."""
+        engine = self.open("jsonl")
+        other = open_storage(storage_url("jsonl", self.tmpdir.name))
+        expense = make_expense(1)
+        engine.append_expenses([expense])
+        expense.version = 2
+        self.assertTrue(other.update_expense(expense, expected_version=1))
+        with self.assertRaises(VersionMismatch):
+            engine.update_expense(expense, expected_version=1)
+        other.save_expenses(other.load_expenses())
+        self.assertTrue(engine.delete_expense(expense.id, expected_version=2))
+        self.assertEqual(other.load_expenses(), [])
+
+    def test_write_batch_is_all_or_nothing(self):
+        """Test that a batch whose second write fails stores nothing."""
+        for scheme in ("jsonl", "mmap", "sqlite", "memory"):
+            with self.subTest(scheme=scheme):
+                engine = self.open(scheme)
+                first, second = make_expense(1), make_expense(2)
+                engine.save_expenses([first, second])
+                first.amount = Decimal("9.99")
+                first.version = 2
+                with self.assertRaises(VersionMismatch):
+                    engine.write_batch(
+                        [
+                            Write(updated=first, expected_version=1),
+                            Write(deleted=second.id, expected_version=5),
+                            Write(appended=[make_expense(3)]),
+                        ]
+                    )
+                loaded = engine.load_expenses()
+                self.assertEqual([e.id for e in loaded], [first.id, second.id])
+                self.assertEqual(loaded[0].amount, Decimal("1.10"))
+
+    def test_version_errors_pickle(self):
+        """Test that conflict errors keep their fields through pickling."""
+        for error in (VersionMismatch("a", 1, 2), ConflictError("a", 1, None)):
+            with self.subTest(error=type(error).__name__):
+                copy = pickle.loads(pickle.dumps(error))
+                self.assertEqual(copy.args, error.args)
+                self.assertEqual(str(copy), str(error))
+                self.assertEqual(copy.actual, error.actual)
+
+
+class TestRegistry(TestCase):
+    """Test cases for opening engines by URL."""
+
+    def test_open_storage_selects_engine(self):
+        """Test that the URL scheme picks the engine class."""
+        self.assertIsInstance(open_storage("jsonl:///tmp/x.jsonl"), JSONLinesStorage)
+        self.assertIsInstance(open_storage("memory://registry"), MemoryStorage)
+        self.assertEqual(open_storage("sqlite://ledger.db").filepath, "ledger.db")
+
+    def test_invalid_urls(self):
+        """Test that malformed URLs and unknown engines are rejected."""
+        with self.assertRaises(ValueError):
+            open_storage("expenses.json")
+        with self.assertRaises(ValueError):
+            open_storage("redis://localhost")
+
+
+class TestManagerEngines(TestCase):
+    """Test cases for managers running on non-JSON engines."""
+
+    def setUp(self):
+        """Create a manager backed by SQLite in a temporary directory."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.url = storage_url("sqlite", self.tmpdir.name)
+        self.manager = ExpenseManager(storage=self.url)
+
+    def tearDown(self):
+        """Close the database and remove the temporary directory."""
+        self.manager.storage.close()
+        self.tmpdir.cleanup()
+
+    def test_changes_are_pushed_down(self):
+        """Test that single changes never rewrite the whole table."""
+        kept = self.manager.add_expense(make_expense(1))
+        dropped = self.manager.add_expense(make_expense(2))
+        self.manager.get_expenses()
+        with patch.object(SQLiteStorage, "save_expenses") as save:
+            kept.amount = Decimal("5")
+            self.manager.update_expense(kept.id, kept)
+            self.manager.delete_expense(dropped.id)
+        save.assert_not_called()
+
+        reopened = ExpenseManager(storage=self.url)
+        self.assertEqual([e.amount for e in reopened.get_expenses()], [Decimal("5")])
+        reopened.storage.close()
+
+    def test_transaction_commits_atomically(self):
+        """Test that a transaction whose second write fails persists nothing."""
+        kept = self.manager.add_expense(make_expense(1))
+        dropped = self.manager.add_expense(make_expense(2))
+        real_apply = SQLiteStorage._apply
+        calls = []
+
+        def failing_apply(engine, connection, write):
+            calls.append(write)
+            if len(calls) == 2:
+                raise sqlite3.OperationalError("disk I/O error")
+            return real_apply(engine, connection, write)
+
+        with patch.object(SQLiteStorage, "_apply", failing_apply):
+            with self.assertRaises(sqlite3.OperationalError):
+                with self.manager.transaction():
+                    self.manager.update_expense(kept.id, make_expense(1, "5.00"))
+                    self.manager.delete_expense(dropped.id)
+                    self.manager.add_expense(make_expense(3))
+        self.assertEqual(len(calls), 2)
+
+        reopened = ExpenseManager(storage=self.url)
+        stored = {e.id: e.amount for e in reopened.get_expenses()}
+        self.assertEqual(
+            stored, {kept.id: Decimal("1.10"), dropped.id: Decimal("1.10")}
+        )
+        reopened.storage.close()
+
+    def test_stale_manager_conflicts(self):
+        """Test that a manager's stale copy cannot overwrite another's write."""
+        expense = self.manager.add_expense(make_expense(1))
+        self.manager.get_expenses()
+        other = ExpenseManager(storage=self.url)
+        other.update_expense(expense.id, make_expense(1, "2.00"), 1)
+        other.storage.close()
+        with self.assertRaises(ConflictError):
+            self.manager.update_expense(expense.id, make_expense(1, "3.00"), 1)
+        self.assertEqual(self.manager.get_expense(expense.id).amount, Decimal("2.00"))
+
+    def test_update_after_remote_delete_conflicts(self):
+        """Test that a row deleted by another process is not written back."""
+        expense = self.manager.add_expense(make_expense(1))
+        self.manager.get_expenses()
+        other = ExpenseManager(storage=self.url)
+        other.delete_expense(expense.id)
+        other.storage.close()
+        # The delete lands after this manager last checked storage
+        with patch.object(self.manager, "_refresh"):
+            with self.assertRaises(ConflictError) as raised:
+                self.manager.update_expense(expense.id, make_expense(1, "3.00"))
+        self.assertIsNone(raised.exception.actual)
+        self.assertIsNone(self.manager.get_expense(expense.id))
+
+        reopened = ExpenseManager(storage=self.url)
+        self.assertEqual(reopened.get_expenses(), [])
+        reopened.storage.close()
+
+    def test_range_read_skips_loading(self):
+        """Test that date ranges on an unloaded ledger use the engine."""
+        for day in (1, 5, 9):
+            self.manager.add_expense(make_expense(day))
+        reader = ExpenseManager(storage=self.url)
+        found = list(
+            reader.iter_expenses(datetime(2024, 1, 2), datetime(2024, 1, 9))
+        )
+        self.assertFalse(reader.loaded)
+        self.assertEqual([e.date.day for e in found], [5])
+        reader.storage.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""Unit tests for the web JSON API."""
+import gc
+import tempfile
+from decimal import Decimal
+from unittest import TestCase, main
+from unittest.mock import patch
+
+from expense_tracker.models.expense import Expense
+from expense_tracker.models.expense_manager import ExpenseManager
+from expense_tracker.services.metrics import EXPENSE_ROWS
+from expense_tracker.web.app import create_app, get_ledgers
+
+
+class TestWebAPI(TestCase):
+    """Test cases for the expense API routes."""
+
+    def setUp(self):
+        """Create an app whose ledgers live in a temporary directory."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.app = create_app({"DATA_DIR": self.tmpdir.name, "TESTING": True})
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        self.tmpdir.cleanup()
+
+    def add(self, amount="10", category="Food", description="Lunch"):
+        """Add an expense through the form endpoint and return it."""
+        response = self.client.post(
+            "/add_expense",
+            data={"amount": amount, "category": category, "description": description},
+        )
+        return response.get_json()["expense"]
+
+    def descriptions(self):
+        """Return the descriptions of the current user's expenses."""
+        with self.client.session_transaction() as session:
+            user_id = session["user_id"]
+        pool = self.app.extensions["ledgers"]
+        try:
+            manager = pool.acquire(user_id)
+            return sorted(e.description for e in manager.get_expenses())
+        finally:
+            pool.release(user_id)
+
+    def test_row_gauge_follows_live_apps(self):
+        """Test that the row gauge sums every app without keeping one alive."""
+        gc.collect()  # drop apps left over from earlier tests
+        before = EXPENSE_ROWS.samples()
+        other_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(other_dir.cleanup)
+        other = create_app({"DATA_DIR": other_dir.name, "TESTING": True})
+        with patch("atexit.register") as register, other.app_context():
+            pool = get_ledgers()
+            manager = pool.acquire("alice")
+            manager.add_expense(Expense(Decimal("1"), "Food", "Tea"))
+            manager.get_expenses()
+            pool.release("alice")
+        register.assert_not_called()
+        self.assertNotEqual(EXPENSE_ROWS.samples(), before)
+
+        del other, pool, manager
+        gc.collect()
+        self.assertEqual(EXPENSE_ROWS.samples(), before)
+
+    def test_batch_applies_all_changes(self):
+        """Test that a batch deletes and adds in one request."""
+        old = self.add(description="Old lunch")
+        response = self.client.post(
+            "/api/expenses/batch",
+            json={
+                "delete": [old["id"]],
+                "add": [
+                    {"amount": "4.50", "category": "Food", "description": "Soup"},
+                    {"amount": "6", "category": "Food", "description": "Salad"},
+                ],
+            },
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.get_json()["added"]), 2)
+        self.assertEqual(self.descriptions(), ["Salad", "Soup"])
+
+    def test_batch_is_all_or_nothing(self):
+        """Test that an invalid change leaves the ledger untouched."""
+        kept = self.add(description="Kept lunch")
+        response = self.client.post(
+            "/api/expenses/batch",
+            json={
+                "delete": [kept["id"]],
+                "add": [{"amount": "-1", "category": "Food", "description": "Bad"}],
+            },
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.descriptions(), ["Kept lunch"])
+
+        response = self.client.post(
+            "/api/expenses/batch", json={"delete": [kept["id"], "missing"]}
+        )
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(self.descriptions(), ["Kept lunch"])
+
+    def test_batch_rejects_malformed_payloads(self):
+        """Test that wrongly typed delete and add lists are a 400."""
+        kept = self.add(description="Kept lunch")
+        for payload in (
+            {"delete": kept["id"]},
+            {"delete": [1]},
+            {"add": {"amount": "1", "category": "Food", "description": "x"}},
+            {"add": ["Soup"]},
+        ):
+            response = self.client.post("/api/expenses/batch", json=payload)
+            self.assertEqual(response.status_code, 400, payload)
+        self.assertEqual(self.descriptions(), ["Kept lunch"])
+
+    def test_search_limits_and_counts(self):
+        """Test that a limited search still reports every match."""
+        for description in ("Soup", "Soup and bread", "Salad"):
+            self.add(description=description)
+        data = self.client.get("/api/expenses/search?q=sou&limit=1").get_json()
+        self.assertEqual((data["count"], len(data["expenses"])), (2, 1))
+        response = self.client.get("/api/expenses/search?q=sou&limit=-1")
+        self.assertEqual(response.status_code, 400)
+
+    def test_batch_skips_duplicates(self):
+        """Test that a batch can leave out rows already in the ledger."""
+        existing = self.add(amount="4.50", description="Soup")
+        response = self.client.post(
+            "/api/expenses/batch",
+            json={
+                "duplicates": "skip",
+                "add": [
+                    {"amount": "4.50", "category": "Food", "description": "SOUP"},
+                    {"amount": "6", "category": "Food", "description": "Salad"},
+                ],
+            },
+        )
+        data = response.get_json()
+        self.assertEqual([e["description"] for e in data["added"]], ["Salad"])
+        self.assertEqual(data["duplicates"][0]["matches"], existing["id"])
+        self.assertEqual(self.descriptions(), ["Salad", "Soup"])
+
+    def test_update_requires_current_etag(self):
+        """Test that If-Match versions turn lost updates into 409s."""
+        expense = self.add()
+        url = f"/api/expenses/{expense['id']}"
+        etag = self.client.get(url).headers["ETag"]
+
+        response = self.client.put(
+            url, json={"amount": "12"}, headers={"If-Match": etag}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()["expense"]["amount"], "12")
+        self.assertEqual(response.get_json()["expense"]["description"], "Lunch")
+        self.assertNotEqual(response.headers["ETag"], etag)
+
+        stale = self.client.put(
+            url, json={"amount": "99"}, headers={"If-Match": etag}
+        )
+        self.assertEqual(stale.status_code, 409)
+        self.assertEqual(stale.get_json()["version"], 2)
+        stale_delete = self.client.delete(url, headers={"If-Match": etag})
+        self.assertEqual(stale_delete.status_code, 409)
+
+        current = self.client.get(url)
+        self.assertEqual(current.get_json()["expense"]["amount"], "12")
+        deleted = self.client.delete(url, headers={"If-Match": current.headers["ETag"]})
+        self.assertEqual(deleted.status_code, 200)
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_update_of_concurrently_deleted_expense(self):
+        """Test that an expense deleted mid-request is a 404, not a 200."""
+        expense = self.add()
+        url = f"/api/expenses/{expense['id']}"
+        with patch.object(ExpenseManager, "update_expense", return_value=False):
+            response = self.client.put(url, json={"amount": "12"})
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(response.get_json()["success"])
+
+    def test_dashboard_totals(self):
+        """Test the dashboard's monthly total and daily series."""
+        self.add(amount="10.50")
+        self.add(amount="4.25")
+        data = self.client.get("/api/dashboard").get_json()
+        self.assertEqual(sum(data["daily_expenses"]), 14.75)
+        self.assertIn("14.75", data["monthly_total"])
+        self.assertEqual(len(data["recent_expenses"]), 2)
+        self.assertEqual(self.client.get("/").status_code, 200)
+
+    def test_quantiles_and_distinct(self):
+        """Test sketch-backed stats and their exact mode."""
+        for amount, description in [("2", "Cafe"), ("4", "cafe "), ("9", "Deli")]:
+            self.add(amount=amount, description=description)
+        for exact in ("0", "1"):
+            data = self.client.get(
+                f"/api/stats/quantiles?q=0.5,1&exact={exact}"
+            ).get_json()
+            self.assertEqual(data["exact"], exact == "1")
+            food = data["categories"]["Food"]
+            self.assertEqual(Decimal(food["0.5"]["amount"]), Decimal("4"))
+            self.assertEqual(Decimal(food["1.0"]["amount"]), Decimal("9"))
+            months = self.client.get(f"/api/stats/distinct?exact={exact}").get_json()
+            self.assertEqual(list(months["months"].values()), [2])
+        response = self.client.get("/api/stats/quantiles?q=1.5")
+        self.assertEqual(response.status_code, 400)
+
+    def test_histogram(self):
+        """Test amount histograms per category and overall."""
+        for amount, category in [("1.50", "Food"), ("7", "Food"), ("30", "Bills")]:
+            self.add(amount=amount, category=category)
+        groups = self.client.get("/api/stats/histogram").get_json()["groups"]
+        self.assertEqual(
+            [g["key"] for g in groups], [{"category": "Bills"}, {"category": "Food"}]
+        )
+        food = groups[1]
+        self.assertEqual(food["count"], 2)
+        self.assertEqual(
+            [(b["low"], b["high"], b["count"]) for b in food["buckets"]],
+            [("1", "2", 1), ("2", "5", 0), ("5", "10", 1)],
+        )
+        groups = self.client.get("/api/stats/histogram?group_by=").get_json()["groups"]
+        self.assertEqual([(g["key"], g["count"]) for g in groups], [({}, 3)])
+        response = self.client.get("/api/stats/histogram?group_by=weekday")
+        self.assertEqual(response.status_code, 400)
+
+
+if __name__ == "__main__":
+    main()
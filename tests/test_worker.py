@@ -0,0 +1,70 @@
+"""Unit tests for the background UI worker."""
+import threading
+from unittest import TestCase, main
+
+from expense_tracker.ui.worker import BackgroundWorker
+
+
+class FakeRoot:
+    """Stands in for Tk, running after() callbacks when asked to."""
+
+    def __init__(self):
+        self.callbacks = []
+
+    def after(self, delay, callback):
+        self.callbacks.append(callback)
+
+    def run_pending(self):
+        callbacks, self.callbacks = self.callbacks, []
+        for callback in callbacks:
+            callback()
+
+
+class TestBackgroundWorker(TestCase):
+    """Test cases for the BackgroundWorker class."""
+
+    def setUp(self):
+        """Create a worker on a fake Tk root."""
+        self.root = FakeRoot()
+        self.counts = []
+        self.worker = BackgroundWorker(self.root, on_pending_change=self.counts.append)
+
+    def tearDown(self):
+        """Stop the worker thread."""
+        self.worker.shutdown()
+
+    def _finish(self, future):
+        future.result(timeout=5)
+        while self.worker.pending:
+            self.root.run_pending()
+
+    def test_results_are_delivered_by_the_poll(self):
+        """Test that callbacks run from after() rather than the worker thread."""
+        results = []
+        future = self.worker.submit(
+            threading.current_thread, on_success=results.append
+        )
+        future.result(timeout=5)
+        self.assertEqual(results, [])
+
+        self._finish(future)
+        self.assertEqual(len(results), 1)
+        self.assertIsNot(results[0], threading.current_thread())
+        self.assertEqual(self.counts, [1, 0])
+        self.assertEqual(self.root.callbacks, [])
+
+    def test_jobs_run_in_order_and_errors_are_reported(self):
+        """Test submission order and error delivery."""
+        order, errors = [], []
+        self.worker.submit(order.append, 1)
+        self.worker.submit(lambda: 1 / 0, on_error=errors.append)
+        last = self.worker.submit(order.append, 2)
+
+        self._finish(last)
+        self.assertEqual(order, [1, 2])
+        self.assertIsInstance(errors[0], ZeroDivisionError)
+        self.assertEqual(self.worker.pending, 0)
+
+
+if __name__ == "__main__":
+    main()
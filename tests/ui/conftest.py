@@ -5,16 +5,14 @@ from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from webdriver_manager.chrome import ChromeDriverManager
 
-from expense_tracker.web.app import app
+from expense_tracker.web.app import create_app
 from expense_tracker.models.expense_manager import ExpenseManager
 
 
 @pytest.fixture(scope="session")
 def flask_app():
     """Create a Flask application for testing."""
-    app.config['TESTING'] = True
-    app.config['WTF_CSRF_ENABLED'] = False
-    return app
+    return create_app({'TESTING': True, 'WTF_CSRF_ENABLED': False})
 
 
 @pytest.fixture(scope="session")
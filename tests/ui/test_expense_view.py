@@ -4,6 +4,7 @@ from decimal import Decimal
 from unittest import TestCase, main
 from unittest.mock import MagicMock, patch
 
+from expense_tracker.models.changes import ChangeEvent, ChangeType
 from expense_tracker.models.expense import Expense
 from expense_tracker.ui.expense_view import ExpenseView
 
@@ -61,6 +62,30 @@ class TestExpenseView(TestCase):
         mock_update_list.assert_called_once_with(expenses)
         mock_update_chart.assert_called_once_with(expenses)
 
+    @patch("expense_tracker.ui.widgets.ExpenseList.update_expenses")
+    @patch("expense_tracker.ui.widgets.ExpenseChart.update_totals")
+    def test_apply_changes(self, mock_update_totals, mock_update_list):
+        """Test that change events update the list and totals in place."""
+        lunch = Expense(Decimal("10"), "Food", "Lunch", id="a")
+        taxi = Expense(Decimal("20"), "Transport", "Taxi", id="b")
+        self.view.update_expenses([lunch], {"Food": Decimal("10")})
+
+        dinner = Expense(Decimal("15"), "Food", "Dinner", id="a", version=2)
+        applied = self.view.apply_changes(
+            [
+                ChangeEvent(1, ChangeType.ADDED, taxi),
+                ChangeEvent(2, ChangeType.UPDATED, dinner, lunch),
+                ChangeEvent(3, ChangeType.DELETED, taxi),
+            ]
+        )
+
+        self.assertTrue(applied)
+        mock_update_list.assert_called_with([dinner])
+        mock_update_totals.assert_called_with({"Food": Decimal("15")})
+        self.assertFalse(
+            self.view.apply_changes([ChangeEvent(4, ChangeType.RELOADED)])
+        )
+
 
 if __name__ == "__main__":
     main()
@@ -11,7 +11,7 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.select import Select
 from selenium.webdriver.support.ui import WebDriverWait
 
-from expense_tracker.web.app import app
+from expense_tracker.web.app import create_app
 from expense_tracker.web.config import CURRENCIES, DATE_FORMATS
 from expense_tracker.models.expense_manager import ExpenseManager
 
@@ -33,8 +33,7 @@ class TestWebInterface(unittest.TestCase):
         cls.driver.implicitly_wait(10)  # seconds
         
         # Start Flask server
-        app.config['TESTING'] = True
-        app.config['WTF_CSRF_ENABLED'] = False
+        app = create_app({'TESTING': True, 'WTF_CSRF_ENABLED': False})
         cls.app = app.test_client()
         
         # Clear any existing test data
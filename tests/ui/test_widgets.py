@@ -110,6 +110,74 @@ class TestExpenseList(TestCase):
         self.assertEqual(first_item_values[1], "Food")  # category
         self.assertEqual(first_item_values[2], "Lunch")  # description
 
+    def test_search_filters_expenses(self):
+        """Test that the search box narrows the list by description."""
+        expenses = [
+            Expense(
+                id=1,
+                amount=Decimal("50.25"),
+                category="Food",
+                description="Lunch",
+            ),
+            Expense(
+                id=2,
+                amount=Decimal("30.00"),
+                category="Transport",
+                description="Bus fare",
+            ),
+        ]
+        self.expense_list.update_expenses(expenses)
+
+        self.expense_list.search_var.set("bu")
+        items = self.expense_list.tree.get_children()
+        self.assertEqual(len(items), 1)
+        self.assertEqual(self.expense_list.tree.item(items[0])["values"][2], "Bus fare")
+
+        self.expense_list.search_var.set("")
+        self.assertEqual(len(self.expense_list.tree.get_children()), 2)
+
+    def _expenses(self, count):
+        return [
+            Expense(
+                id=str(i),
+                amount=Decimal(i),
+                category="Food",
+                description=f"Item {i}",
+            )
+            for i in range(count)
+        ]
+
+    def test_update_expenses_applies_diff(self):
+        """Test that unchanged rows keep their Treeview items."""
+        expenses = self._expenses(5)
+        self.expense_list.update_expenses(expenses)
+        tree = self.expense_list.tree
+
+        added = Expense(
+            id="new", amount=Decimal("9"), category="Food", description="New"
+        )
+        with patch.object(tree, "insert", wraps=tree.insert) as insert, patch.object(
+            tree, "delete", wraps=tree.delete
+        ) as delete:
+            self.expense_list.update_expenses([added] + expenses[:2] + expenses[3:])
+
+        self.assertEqual(insert.call_count, 1)
+        delete.assert_called_once_with("2")
+        self.assertEqual(tree.get_children(), ("new", "0", "1", "3", "4"))
+
+    def test_virtual_mode_materializes_window(self):
+        """Test that virtual mode only creates items around the visible rows."""
+        expense_list = ExpenseList(
+            self.root, self.on_delete_expense, virtual=True, buffer=10
+        )
+        expense_list.update_expenses(self._expenses(1000))
+        self.assertLess(len(expense_list.tree.get_children()), 100)
+
+        expense_list.scroll_to(500)
+        children = expense_list.tree.get_children()
+        self.assertIn("500", children)
+        self.assertLess(len(children), 100)
+
     @patch("expense_tracker.ui.widgets.messagebox.askyesno", return_value=True)
     def test_delete_expense(self, mock_confirm):
         """Test deleting an expense."""
@@ -172,6 +240,24 @@ class TestExpenseChart(TestCase):
         # Check if pie chart was created
         self.assertTrue(len(self.chart.ax.patches) > 0)
 
+    def test_update_totals_moves_wedges_in_place(self):
+        """Test that changed totals reuse the existing wedges."""
+        self.chart.update_totals({"Food": Decimal("30"), "Transport": Decimal("10")})
+        wedges = list(self.chart.ax.patches)
+
+        self.chart.update_totals({"Food": Decimal("20"), "Transport": Decimal("20")})
+        self.assertEqual(list(self.chart.ax.patches), wedges)
+        self.assertAlmostEqual(wedges[0].theta2 - wedges[0].theta1, 180.0)
+        self.assertEqual(self.chart.ax.texts[-1].get_text(), "50.0%")
+
+    def test_unchanged_totals_skip_redraw(self):
+        """Test that identical totals do not schedule a repaint."""
+        self.chart.update_totals({"Food": Decimal("30")})
+        self.chart._draw()
+        with patch.object(self.chart, "_schedule_draw") as schedule:
+            self.chart.update_totals({"Food": Decimal("30")})
+        schedule.assert_not_called()
+
 
 if __name__ == "__main__":
     main()
@@ -1,5 +1,7 @@
 """WSGI entry point for the Expense Tracker application."""
-from expense_tracker.web.app import app
+from expense_tracker.web.app import create_app
+
+app = create_app()
 
 if __name__ == "__main__":
     app.run(debug=True)